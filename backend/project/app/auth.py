@@ -5,6 +5,9 @@ Incluye: Login con BD, validación de tokens, control de acceso por roles
 """
 
 import os
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, List
 from fastapi import HTTPException, Request, Depends
@@ -15,6 +18,13 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 
 from app.database import get_db_connection
+from app.database_async import fetch_one, execute
+from app.passwords import (
+    is_bcrypt_hash, verify_password_async, hash_password_async,
+    burn_dummy_verification, PasswordPoolSaturated
+)
+from app.cache import TTLCache
+from app.ultimo_acceso import ultimo_acceso_buffer
 from app.models import RolEnum, Usuario
 
 load_dotenv(override=False)
@@ -24,6 +34,15 @@ SECRET_KEY = os.getenv("SECRET_KEY", "cambia_esto_en_produccion")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# Caché de usuarios autenticados (evita un SELECT por request)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", 1000))
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL, nombre="usuarios")
+
+# Modo stateless: rol y documento vinculado se toman de los claims del token
+STATELESS_AUTH = os.getenv("STATELESS_AUTH", "false").lower() in ("1", "true", "yes")
+
 
 # ==================== HTTP BEARER PERSONALIZADO ====================
 
@@ -68,57 +87,89 @@ security = HTTPBearerFixed()
 
 # ==================== AUTENTICACIÓN CON BASE DE DATOS ====================
 
-def authenticate_user(username: str, password: str) -> Optional[Usuario]:
+async def authenticate_user(username: str, password: str) -> Optional[Usuario]:
     """
     Autentica un usuario contra la base de datos.
 
+    La contraseña se verifica con bcrypt en la capa de API (pool acotado),
+    no con crypt() en el coordinador. Los hashes de pgcrypto con
+    gen_salt('bf') son bcrypt y se verifican igual; otros formatos
+    heredados se verifican una última vez en la BD y se re-hashean.
+
     Args:
         username: Nombre de usuario
         password: Contraseña en texto plano
 
     Returns:
         Usuario si las credenciales son válidas, None si no
+
+    Raises:
+        PasswordPoolSaturated: Si el pool de bcrypt está saturado
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Buscar usuario y verificar contraseña usando crypt
-        cur.execute("""
+        row = await fetch_one("""
             SELECT
-                id, username, rol, nombres, apellidos,
+                id, username, password_hash, rol, nombres, apellidos,
                 documento_vinculado, activo, fecha_creacion, ultimo_acceso
             FROM public.usuarios
-            WHERE username = %s
-            AND password_hash = crypt(%s, password_hash)
-            AND activo = TRUE
-        """, (username, password))
-
-        row = cur.fetchone()
+            WHERE username = %s AND activo = TRUE
+        """, (username,))
 
         if not row:
+            await burn_dummy_verification(password)
             return None
 
-        # Actualizar último acceso
-        cur.execute("""
-            UPDATE public.usuarios
-            SET ultimo_acceso = NOW()
-            WHERE id = %s
-        """, (row['id'],))
-        conn.commit()
+        password_hash = row.pop('password_hash')
 
-        cur.close()
+        if is_bcrypt_hash(password_hash):
+            valid = await verify_password_async(password, password_hash)
+        else:
+            valid = await _verify_legacy_hash(row['id'], password, password_hash)
+
+        if not valid:
+            return None
+
+        # Último acceso: se anota en memoria y se vuelca por lotes
+        ultimo_acceso_buffer.record(row['id'])
 
         # Convertir a modelo Usuario
-        return Usuario(**dict(row))
+        return Usuario(**row)
 
+    except PasswordPoolSaturated:
+        raise
     except Exception as e:
         print(f"Error en autenticación: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
+
+
+async def _verify_legacy_hash(user_id: int, password: str, password_hash: str) -> bool:
+    """
+    Compatibilidad con hashes pgcrypto que no son bcrypt (md5, des, xdes).
+    Se verifican con crypt() y, si son válidos, se migran a bcrypt para
+    que el próximo login ya no pase por el coordinador.
+    """
+    row = await fetch_one(
+        "SELECT crypt(%s, %s) = %s AS valido",
+        (password, password_hash, password_hash)
+    )
+    if not row or not row['valido']:
+        return False
+
+    nuevo_hash = await hash_password_async(password)
+    await execute(
+        "UPDATE public.usuarios SET password_hash = %s WHERE id = %s",
+        (nuevo_hash, user_id)
+    )
+    return True
+
+
+USUARIO_POR_USERNAME_SQL = """
+    SELECT
+        id, username, rol, nombres, apellidos,
+        documento_vinculado, activo, fecha_creacion, ultimo_acceso
+    FROM public.usuarios
+    WHERE username = %s AND activo = TRUE
+"""
 
 
 def get_user_by_username(username: str) -> Optional[Usuario]:
@@ -136,13 +187,7 @@ def get_user_by_username(username: str) -> Optional[Usuario]:
         conn = get_db_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
 
-        cur.execute("""
-            SELECT
-                id, username, rol, nombres, apellidos,
-                documento_vinculado, activo, fecha_creacion, ultimo_acceso
-            FROM public.usuarios
-            WHERE username = %s AND activo = TRUE
-        """, (username,))
+        cur.execute(USUARIO_POR_USERNAME_SQL, (username,))
 
         row = cur.fetchone()
         cur.close()
@@ -160,6 +205,35 @@ def get_user_by_username(username: str) -> Optional[Usuario]:
             conn.close()
 
 
+async def get_user_by_username_async(username: str) -> Optional[Usuario]:
+    """
+    Versión asíncrona de get_user_by_username.
+    No bloquea el event loop mientras espera a la base de datos.
+    """
+    try:
+        row = await fetch_one(USUARIO_POR_USERNAME_SQL, (username,))
+        if not row:
+            return None
+        return Usuario(**row)
+
+    except Exception as e:
+        print(f"Error obteniendo usuario: {e}")
+        return None
+
+
+def invalidate_user_cache(username: str) -> bool:
+    """
+    Descarta el usuario cacheado para que el próximo request lo relea.
+    Llamar al crear, modificar o desactivar usuarios.
+    """
+    return user_cache.invalidate(username)
+
+
+def get_user_cache_stats() -> dict:
+    """Contadores de la caché de usuarios para monitoreo"""
+    return user_cache.stats()
+
+
 # ==================== GESTIÓN DE TOKENS JWT ====================
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -219,6 +293,116 @@ def decode_token(token: str) -> dict:
         )
 
 
+def build_token_claims(user: Usuario) -> dict:
+    """
+    Claims del token para un usuario autenticado.
+
+    Además de sub/rol/user_id incluye lo necesario para decidir permisos
+    sin consultar la base de datos (modo STATELESS_AUTH) y un jti para
+    poder revocar el token.
+    """
+    return {
+        "sub": user.username,
+        "rol": user.rol,
+        "user_id": user.id,
+        "documento_vinculado": user.documento_vinculado,
+        "activo": user.activo,
+        "nombres": user.nombres,
+        "apellidos": user.apellidos,
+        "fecha_creacion": user.fecha_creacion.isoformat(),
+        "jti": uuid.uuid4().hex
+    }
+
+
+def usuario_from_claims(payload: dict) -> Optional[Usuario]:
+    """
+    Reconstruye el usuario a partir de los claims verificados del token.
+    Retorna None si el token no trae los claims del modo stateless
+    (p. ej. tokens emitidos antes de activarlo).
+    """
+    required = ("sub", "rol", "user_id", "activo", "fecha_creacion")
+    if any(claim not in payload for claim in required):
+        return None
+
+    return Usuario(
+        id=payload["user_id"],
+        username=payload["sub"],
+        rol=payload["rol"],
+        nombres=payload.get("nombres"),
+        apellidos=payload.get("apellidos"),
+        documento_vinculado=payload.get("documento_vinculado"),
+        activo=payload["activo"],
+        fecha_creacion=payload["fecha_creacion"]
+    )
+
+
+# ==================== REVOCACIÓN DE TOKENS ====================
+
+class TokenRevocationList:
+    """
+    Lista de revocación en memoria.
+
+    - Por jti: un token concreto (logout)
+    - Por usuario: todos los tokens emitidos antes de un instante
+      (desactivación del usuario)
+
+    Las entradas se descartan cuando los tokens afectados ya expiraron,
+    por lo que el tamaño queda acotado a la vida de un token.
+
+    El claim `iat` tiene resolución de segundos, así que la revocación por
+    usuario también: quedan revocados los tokens emitidos en el mismo
+    segundo de la revocación, aunque sean posteriores (el usuario vuelve a
+    iniciar sesión un segundo después). Nunca sobrevive uno anterior.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = {}   # jti -> exp (epoch)
+        self._users = {}  # username -> revocados si iat <= este epoch (segundos enteros)
+
+    def revoke_token(self, jti: str, exp: float):
+        with self._lock:
+            self._prune()
+            self._jtis[jti] = exp
+
+    def revoke_user(self, username: str):
+        with self._lock:
+            self._prune()
+            self._users[username] = int(time.time())
+
+    def is_revoked(self, payload: dict) -> bool:
+        with self._lock:
+            jti = payload.get("jti")
+            if jti and jti in self._jtis:
+                return True
+            revoked_at = self._users.get(payload.get("sub"))
+            return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tokens_revocados": len(self._jtis), "usuarios_revocados": len(self._users)}
+
+    def _prune(self):
+        now = time.time()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        horizon = now - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        self._users = {user: ts for user, ts in self._users.items() if ts > horizon}
+
+
+token_revocations = TokenRevocationList()
+
+
+def revoke_token(payload: dict):
+    """Revoca el token descrito por el payload (logout)"""
+    if payload.get("jti"):
+        token_revocations.revoke_token(payload["jti"], payload.get("exp", time.time()))
+
+
+def revoke_user_tokens(username: str):
+    """Revoca todos los tokens emitidos hasta ahora para un usuario"""
+    token_revocations.revoke_user(username)
+
+
 # ==================== DEPENDENCIES PARA ENDPOINTS ====================
 
 async def get_current_user(
@@ -228,6 +412,9 @@ async def get_current_user(
     Dependency que obtiene el usuario actual desde el token JWT.
     Valida el token y retorna el usuario autenticado.
 
+    Con STATELESS_AUTH el usuario se arma desde los claims verificados;
+    en otro caso se consulta la caché de usuarios y luego la base de datos.
+
     Args:
         credentials: Credenciales HTTP Bearer del header
 
@@ -247,13 +434,29 @@ async def get_current_user(
             detail="Token inválido: falta información del usuario"
         )
 
-    user = get_user_by_username(username)
-    if not user:
+    if token_revocations.is_revoked(payload):
         raise HTTPException(
             status_code=401,
-            detail="Usuario no encontrado o inactivo"
+            detail="Token revocado. Por favor, inicie sesión nuevamente.",
+            headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # Modo stateless: sin base de datos en la ruta de autenticación
+    if STATELESS_AUTH:
+        user = usuario_from_claims(payload)
+        if user is not None:
+            return user
+
+    user = user_cache.get(username)
+    if user is None:
+        user = await get_user_by_username_async(username)
+        if not user:
+            raise HTTPException(
+                status_code=401,
+                detail="Usuario no encontrado o inactivo"
+            )
+        user_cache.set(username, user)
+
     return user
 
 
@@ -282,7 +485,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: Usuario = Depends(get_current_active_user)) -> Usuario:
+    async def __call__(self, current_user: Usuario = Depends(get_current_active_user)) -> Usuario:
         """
         Verifica que el usuario tenga uno de los roles permitidos
 
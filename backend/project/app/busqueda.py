@@ -0,0 +1,212 @@
+# backend/project/app/busqueda.py
+"""
+Construcción de las consultas de búsqueda de pacientes
+
+- Modo indexado: compara contra public.nombre_busqueda(...) (nombre
+  completo en minúsculas y sin tildes) usando los índices GIN de
+  trigramas de infra/initdb/07_busqueda_trigram.sql; los resultados se
+  ordenan por similitud con el término
+- Modo fonético: prefijo del código fonético (app.normalizacion) contra
+  primer_nombre_fonetico/primer_apellido_fonetico, con índices btree de
+  infra/initdb/08_busqueda_fonetica.sql
+- Modo legado: ILIKE sobre primer_nombre/primer_apellido, sin índice
+
+Un documento completo se busca primero por igualdad: numero_documento es
+la columna de distribución, así que Citus envía la consulta a un único
+shard. Solo si no hay coincidencia exacta se recurre a la búsqueda por
+subcadena, que recorre todos los shards.
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.models import ModoBusquedaEnum
+from app.normalizacion import codigo_fonetico, tokenizar
+
+load_dotenv(override=False)
+
+# Longitud mínima para intentar la búsqueda exacta (evita la ida extra
+# mientras se teclean los primeros dígitos)
+BUSQUEDA_DOCUMENTO_MIN_EXACTO = int(os.getenv("BUSQUEDA_DOCUMENTO_MIN_EXACTO", 4))
+
+_DOCUMENTO_RE = re.compile(r"^[A-Za-z0-9-]+$")
+
+# Debe coincidir exactamente con la expresión del índice idx_pacientes_nombre_trgm
+NOMBRE_BUSQUEDA_SQL = "public.nombre_busqueda(primer_nombre, segundo_nombre, primer_apellido, segundo_apellido)"
+# El término se normaliza igual que la columna indexada
+TERMINO_SQL = "lower(public.f_unaccent(%s))"
+
+
+def escapar_like(termino: str) -> str:
+    """Escapa los comodines de LIKE para buscar el texto literal"""
+    return termino.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def es_documento_exacto(documento: Optional[str]) -> bool:
+    """True si el término parece un número de documento completo"""
+    if not documento:
+        return False
+    documento = documento.strip()
+    return len(documento) >= BUSQUEDA_DOCUMENTO_MIN_EXACTO and bool(_DOCUMENTO_RE.match(documento))
+
+
+def construir_busqueda(
+    nombre: Optional[str],
+    documento: Optional[str],
+    modo: ModoBusquedaEnum = ModoBusquedaEnum.INDEXADO,
+    exacto: bool = False
+) -> Tuple[List[str], list, str, list]:
+    """
+    Condiciones y orden de la búsqueda.
+
+    Con `exacto=True` el documento se compara por igualdad (consulta
+    enrutada a un solo shard).
+
+    Returns:
+        (condiciones, params_condiciones, order_by, params_order_by)
+    """
+    if modo == ModoBusquedaEnum.LEGADO:
+        return _busqueda_legado(nombre, documento)
+
+    condiciones, params = [], []
+    rankings, rank_params = [], []
+
+    if documento and exacto:
+        condiciones.append("numero_documento = %s")
+        params.append(documento.strip())
+        documento = None
+
+    if nombre and modo == ModoBusquedaEnum.FONETICO:
+        codigos = (codigo_fonetico(nombre) or "").split()
+        if not codigos:
+            condiciones.append("FALSE")  # Sin letras: nada que comparar
+        # Cada palabra debe coincidir (por prefijo) con el nombre o el apellido
+        for codigo in codigos:
+            condiciones.append("(primer_nombre_fonetico LIKE %s OR primer_apellido_fonetico LIKE %s)")
+            params.extend([f"{codigo}%", f"{codigo}%"])
+            rankings.append("(primer_nombre_fonetico = %s)::int + (primer_apellido_fonetico = %s)::int")
+            rank_params.extend([codigo, codigo])
+    elif nombre:
+        nombre = nombre.strip()
+        # Subcadena (LIKE) o palabra parecida (<%): ambos usan el índice GIN
+        condiciones.append(
+            f"({NOMBRE_BUSQUEDA_SQL} LIKE '%%' || {TERMINO_SQL} || '%%' "
+            f"OR {TERMINO_SQL} <%% {NOMBRE_BUSQUEDA_SQL})"
+        )
+        params.extend([escapar_like(nombre), nombre])
+        rankings.append(f"word_similarity({TERMINO_SQL}, {NOMBRE_BUSQUEDA_SQL})")
+        rank_params.append(nombre)
+
+    if documento:
+        documento = documento.strip()
+        condiciones.append("numero_documento ILIKE %s")
+        params.append(f"%{escapar_like(documento)}%")
+        rankings.append("similarity(numero_documento, %s)")
+        rank_params.append(documento)
+
+    order_by = " + ".join(rankings) + " DESC, fecha_registro DESC" if rankings else "fecha_registro DESC"
+    return condiciones, params, order_by, rank_params
+
+
+def _busqueda_legado(nombre: Optional[str], documento: Optional[str]) -> Tuple[List[str], list, str, list]:
+    condiciones, params = [], []
+
+    if nombre:
+        condiciones.append("(primer_nombre ILIKE %s OR primer_apellido ILIKE %s)")
+        params.extend([f"%{nombre}%", f"%{nombre}%"])
+
+    if documento:
+        condiciones.append("numero_documento ILIKE %s")
+        params.append(f"%{documento}%")
+
+    return condiciones, params, "fecha_registro DESC", []
+
+
+def construir_autocompletado(texto: str) -> Tuple[List[str], list, str, list]:
+    """
+    Condiciones de GET /pacientes/buscar/sugerencias cuando no hay índice en memoria:
+    las mismas reglas que app.typeahead (cada palabra de `texto` es el
+    inicio de un nombre, apellido o del documento; mismo orden).
+
+    El LIKE '%palabra%' usa el índice GIN de trigramas y el de ' ' || nombre
+    exige que coincida al inicio de una palabra; el documento usa el índice
+    varchar_pattern_ops de infra/initdb/10_autocompletado_prefijo.sql.
+
+    Returns:
+        (condiciones, params_condiciones, order_by, params_order_by)
+    """
+    palabras = tokenizar(texto)
+    if not palabras:
+        return ["FALSE"], [], "fecha_registro DESC", []
+
+    condiciones, params = [], []
+    exactas, exactas_params = [], []
+    for palabra in palabras:
+        literal = escapar_like(palabra)
+        condiciones.append(
+            f"(({NOMBRE_BUSQUEDA_SQL} LIKE '%%' || %s || '%%' "
+            f"AND ' ' || {NOMBRE_BUSQUEDA_SQL} LIKE '%% ' || %s || '%%') "
+            f"OR numero_documento LIKE %s || '%%' OR numero_documento LIKE %s || '%%')"
+        )
+        params.extend([literal, literal, literal, literal.upper()])
+        exactas.append(f"(' ' || {NOMBRE_BUSQUEDA_SQL} || ' ' LIKE '%% ' || %s || ' %%')::int")
+        exactas_params.append(literal)
+
+    # Primero quienes tienen más palabras exactas, luego alfabético
+    order_by = (
+        f"{' + '.join(exactas)} DESC, "
+        "CONCAT_WS(' ', primer_nombre, primer_apellido), numero_documento"
+    )
+    return condiciones, params, order_by, exactas_params
+
+
+def rellenar_claves_foneticas(lote: int = 1000) -> int:
+    """
+    Calcula primer_nombre_fonetico/primer_apellido_fonetico de los
+    registros anteriores a la migración 08. Retorna las filas actualizadas.
+    """
+    from psycopg2.extras import execute_batch
+
+    from app.database import get_db_connection
+
+    total, ultimo_id = 0, 0
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        while True:
+            cur.execute("""
+                SELECT id, numero_documento, primer_nombre, primer_apellido
+                FROM public.pacientes
+                WHERE primer_apellido_fonetico IS NULL AND id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (ultimo_id, lote))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            # Un UPDATE por fila con la columna de distribución: cada uno va a un solo shard
+            execute_batch(cur, """
+                UPDATE public.pacientes
+                SET primer_nombre_fonetico = %s, primer_apellido_fonetico = %s
+                WHERE numero_documento = %s AND id = %s
+            """, [
+                (codigo_fonetico(r["primer_nombre"]), codigo_fonetico(r["primer_apellido"]),
+                 r["numero_documento"], r["id"])
+                for r in rows
+            ])
+            conn.commit()
+            total += len(rows)
+            ultimo_id = rows[-1]["id"]
+            print(f"  {total} pacientes actualizados")
+        cur.close()
+    finally:
+        conn.close()
+    return total
+
+
+if __name__ == "__main__":
+    # python -m app.busqueda  (después de aplicar 08_busqueda_fonetica.sql)
+    print(f"Claves fonéticas calculadas: {rellenar_claves_foneticas()}")
@@ -0,0 +1,129 @@
+# backend/project/app/cache.py
+"""
+Caché en memoria con expiración (TTL) y desalojo LRU
+Thread-safe y con contadores de aciertos/fallos/desalojos para monitoreo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con tiempo de vida por entrada.
+
+    Uso:
+        cache = TTLCache(maxsize=1000, ttl=60, nombre="usuarios")
+        cache.set("admin", usuario)
+        cache.get("admin")  # -> usuario o None si expiró
+
+    Opcionalmente acota también el peso total (p. ej. bytes) con
+    `max_weight` y una función `weigher(valor) -> int`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, nombre: str = "cache",
+                 max_weight: Optional[int] = None, weigher: Optional[Callable[[Any], int]] = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.nombre = nombre
+        self.max_weight = max_weight
+        self._weigher = weigher or (lambda value: 1)
+        self._weight = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna el valor vigente o `default`; un acierto lo marca como reciente"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self._misses += 1
+                return default
+
+            expires_at, value, weight = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._weight -= weight
+                self._expirations += 1
+                self._misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Guarda un valor; si se supera maxsize o max_weight se desalojan los menos usados"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        weight = self._weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            return  # Nunca cabría: no desalojar todo por él
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._weight -= previous[2]
+            self._data[key] = (expires_at, value, weight)
+            self._weight += weight
+            while len(self._data) > self.maxsize or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                _, (_, _, evicted_weight) = self._data.popitem(last=False)
+                self._weight -= evicted_weight
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Elimina una entrada; retorna True si existía"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+            if item is _MISSING:
+                return False
+            self._weight -= item[2]
+            self._invalidations += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Elimina todas las entradas cuya clave cumpla el predicado"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                self._weight -= self._data.pop(key)[2]
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Contadores de la caché para monitoreo"""
+        with self._lock:
+            total = self._hits + self._misses
+            stats = {
+                "nombre": self.nombre,
+                "entradas": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_segundos": self.ttl,
+                "aciertos": self._hits,
+                "fallos": self._misses,
+                "desalojos": self._evictions,
+                "expiraciones": self._expirations,
+                "invalidaciones": self._invalidations,
+                "tasa_aciertos": round(self._hits / total, 4) if total else 0.0,
+            }
+            if self.max_weight is not None:
+                stats["peso"] = self._weight
+                stats["max_peso"] = self.max_weight
+            return stats
@@ -0,0 +1,147 @@
+# backend/project/app/condicional.py
+"""
+GET condicional (ETag / Last-Modified) para historias clínicas
+
+ETag fuerte y legible:
+
+    "<id>-<ultima_actualizacion YYYYmmddHHMMSSffffff>-<día YYYYmmdd>[-variante]"
+
+- id + ultima_actualizacion identifican la versión del registro
+- el día se incluye porque la edad (y la fecha impresa en el PDF) cambian
+  aunque el registro no cambie
+- la variante distingue representaciones: proyección `fields=` o PDF
+
+Si el cliente envía If-None-Match / If-Modified-Since, primero se consulta
+solo (id, ultima_actualizacion): si coincide se responde 304 sin leer la fila.
+El navegador lo hace solo con `Cache-Control: private, no-cache`.
+
+En PUT, If-Match con ese mismo ETag hace la actualización condicional
+(concurrencia optimista): ver condicion_if_match.
+"""
+
+import hashlib
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Response
+
+from app.database_async import fetch_one
+
+# Datos clínicos: solo caché del navegador y siempre revalidando
+CACHE_CONTROL = "private, no-cache"
+
+_FORMATO_VERSION = "%Y%m%d%H%M%S%f"
+
+_VERSION_SQL = """
+    SELECT id, ultima_actualizacion FROM public.pacientes
+    WHERE numero_documento = %s
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+
+async def obtener_version(numero_documento: str) -> Optional[Dict[str, Any]]:
+    """(id, ultima_actualizacion) del paciente sin traer el resto de columnas"""
+    return await fetch_one(_VERSION_SQL, (numero_documento,))
+
+
+def variante_campos(campos: List[str]) -> str:
+    """Variante del ETag para una proyección `fields=`"""
+    return "f" + hashlib.sha256(",".join(sorted(campos)).encode("utf-8")).hexdigest()[:8]
+
+
+def etag_paciente(row: Dict[str, Any], variante: str = "") -> str:
+    ultima = row.get("ultima_actualizacion")
+    partes = [
+        str(row["id"]),
+        ultima.strftime(_FORMATO_VERSION) if ultima else "0",
+        date.today().strftime("%Y%m%d"),
+    ]
+    if variante:
+        partes.append(variante)
+    return '"' + "-".join(partes) + '"'
+
+
+def parsear_etag(etag: str) -> Optional[Tuple[int, Optional[datetime]]]:
+    """(id, ultima_actualizacion) de un ETag emitido por etag_paciente, o None"""
+    partes = etag.strip().removeprefix("W/").strip('"').split("-")
+    if len(partes) < 2:
+        return None
+    try:
+        ultima = None if partes[1] == "0" else datetime.strptime(partes[1], _FORMATO_VERSION)
+        return int(partes[0]), ultima
+    except ValueError:
+        return None
+
+
+def condicion_if_match(if_match: Optional[str]) -> Tuple[Optional[str], List[Any]]:
+    """
+    Condición WHERE que limita un UPDATE a la versión que leyó el cliente.
+
+    El ETag incluye el día, pero solo id + ultima_actualizacion cuentan: una
+    edición abierta ayer sigue siendo válida si nadie modificó el registro.
+
+    Returns:
+        (sql, params), o (None, []) si no hay If-Match o es "*"
+    """
+    if not if_match or if_match.strip() == "*":
+        return None, []
+    # If-Match usa comparación fuerte: los ETags débiles nunca coinciden
+    versiones = [
+        version for version in (
+            parsear_etag(candidato) for candidato in if_match.split(",")
+            if not candidato.strip().startswith("W/")
+        )
+        if version
+    ]
+    if not versiones:
+        return "FALSE", []
+    sql = " OR ".join("(id = %s AND ultima_actualizacion IS NOT DISTINCT FROM %s)" for _ in versiones)
+    return f"({sql})", [valor for version in versiones for valor in version]
+
+
+def ultima_modificacion(row: Dict[str, Any]) -> datetime:
+    """
+    Last-Modified (UTC): ultima_actualizacion, o la medianoche de hoy si es
+    posterior (la edad calculada cambia con el día)
+    """
+    medianoche = datetime.combine(date.today(), time())
+    ultima = row.get("ultima_actualizacion") or medianoche
+    if ultima.tzinfo is not None:
+        ultima = ultima.astimezone(timezone.utc).replace(tzinfo=None)
+    return max(ultima, medianoche).replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def headers_cache(row: Dict[str, Any], variante: str = "") -> Dict[str, str]:
+    return {
+        "ETag": etag_paciente(row, variante),
+        "Last-Modified": format_datetime(ultima_modificacion(row), usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    }
+
+
+def no_modificado(row: Dict[str, Any], variante: str, if_none_match: Optional[str],
+                  if_modified_since: Optional[str]) -> bool:
+    """True si la versión del cliente sigue vigente (RFC 7232: If-None-Match manda)"""
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        etag = etag_paciente(row, variante)
+        return any(
+            candidato.strip().removeprefix("W/") == etag
+            for candidato in if_none_match.split(",")
+        )
+    if if_modified_since:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if desde.tzinfo is None:
+            desde = desde.replace(tzinfo=timezone.utc)
+        return ultima_modificacion(row) <= desde
+    return False
+
+
+def respuesta_no_modificada(row: Dict[str, Any], variante: str = "") -> Response:
+    return Response(status_code=304, headers=headers_cache(row, variante))
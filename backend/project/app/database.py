@@ -5,7 +5,11 @@ VERSIÓN CORREGIDA - Con mejor manejo de errores
 """
 
 import os
+import threading
+import time
+from collections import deque
 from psycopg2 import connect, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
@@ -19,10 +23,20 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "historiaclinica")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
 
-def get_db_connection():
+# Configuración del pool de conexiones
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # Espera máxima con el pool agotado
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))  # Vida máxima de una conexión
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))  # Tiempo ocioso antes de cerrarla
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", 30))  # Ping si estuvo ociosa más de N s
+DB_POOL_REAP_INTERVAL = float(os.getenv("DB_POOL_REAP_INTERVAL", 30))
+
+
+def _connect():
     """
-    Establece conexión con la base de datos Citus/PostgreSQL.
-    Retorna una conexión con RealDictCursor por defecto.
+    Abre una conexión física nueva contra Citus/PostgreSQL.
 
     Raises:
         RuntimeError: Si no se puede conectar a la base de datos
@@ -52,6 +66,343 @@ def get_db_connection():
     except Exception as e:
         raise RuntimeError(f"Error inesperado al conectar: {str(e)}")
 
+
+# ==================== POOL DE CONEXIONES ====================
+
+class PoolTimeoutError(RuntimeError):
+    """El pool está agotado y no se liberó ninguna conexión a tiempo"""
+
+
+class _PoolEntry:
+    """Conexión física del pool con sus marcas de tiempo"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+    def expired(self, now: float) -> bool:
+        return now - self.created_at > DB_POOL_MAX_LIFETIME
+
+
+class PooledConnection:
+    """
+    Envoltura de una conexión del pool.
+
+    Se comporta como una conexión psycopg2 normal (cursor, commit,
+    rollback...), pero close() la devuelve al pool en lugar de cerrar
+    el socket. Así los llamadores existentes no necesitan cambios.
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get("_entry")
+        if entry is None:
+            raise AttributeError(f"Conexión ya devuelta al pool: {name}")
+        return getattr(entry.conn, name)
+
+    def __enter__(self):
+        self._entry.conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._entry.conn.__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self) -> int:
+        return 1 if self._entry is None else self._entry.conn.closed
+
+    def close(self):
+        """Devuelve la conexión al pool (idempotente)"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.putconn(entry)
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe para el coordinador Citus.
+
+    - Tamaño mínimo/máximo configurable
+    - Verificación de salud al entregar conexiones que estuvieron ociosas
+    - Vida máxima por conexión y cierre de conexiones ociosas
+    - Espera acotada cuando el pool está agotado
+    """
+
+    def __init__(self, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT):
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._reaper = None
+        self._stats = {
+            "checkouts": 0,
+            "conexiones_creadas": 0,
+            "conexiones_cerradas": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "fallos_health_check": 0,
+        }
+
+    # ---------- API pública ----------
+
+    def getconn(self, timeout: float = None) -> PooledConnection:
+        """
+        Entrega una conexión sana del pool, creando una nueva si hay cupo.
+
+        Raises:
+            PoolTimeoutError: Si el pool sigue agotado tras `timeout` segundos
+            RuntimeError: Si no se puede abrir una conexión nueva
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self._ensure_reaper()
+
+        while True:
+            entry = self._acquire(deadline)
+            if entry is None:
+                entry = self._create()
+            elif not self._is_healthy(entry):
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+            return PooledConnection(self, entry)
+
+    def putconn(self, entry: _PoolEntry):
+        """Devuelve una conexión al pool dejando la sesión limpia"""
+        conn = entry.conn
+        if not conn.closed:
+            try:
+                if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                self._discard(entry)
+                return
+
+        now = time.monotonic()
+        if conn.closed or entry.expired(now):
+            self._discard(entry)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._stats["conexiones_cerradas"] += 1
+                self._close_quietly(conn)
+                return
+            entry.last_used = now
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def reap(self):
+        """Cierra conexiones ociosas o vencidas y repone el mínimo configurado"""
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            keep = deque()
+            while self._idle:
+                entry = self._idle.popleft()
+                idle_too_long = now - entry.last_used > DB_POOL_MAX_IDLE
+                if entry.expired(now) or (idle_too_long and self._size - len(to_close) > self.min_size):
+                    to_close.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._size -= len(to_close)
+            self._stats["conexiones_cerradas"] += len(to_close)
+            missing = max(0, self.min_size - self._size) if not self._closed else 0
+            self._size += missing
+
+        for entry in to_close:
+            self._close_quietly(entry.conn)
+
+        for _ in range(missing):
+            try:
+                entry = _PoolEntry(_connect())
+            except RuntimeError:
+                with self._cond:
+                    self._size -= 1
+                continue
+            with self._cond:
+                self._stats["conexiones_creadas"] += 1
+            self.putconn(entry)
+
+    def close(self):
+        """Cierra todas las conexiones ociosas; las prestadas se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._stats["conexiones_cerradas"] += len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def stats(self) -> dict:
+        """Estadísticas del pool para monitoreo"""
+        with self._cond:
+            return {
+                "habilitado": True,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "abiertas": self._size,
+                "ociosas": len(self._idle),
+                "en_uso": self._size - len(self._idle),
+                **self._stats,
+            }
+
+    # ---------- Internos ----------
+
+    def _acquire(self, deadline: float):
+        """
+        Toma una conexión ociosa o reserva cupo para crear una.
+        Retorna la entrada ociosa, o None si se reservó cupo.
+        """
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+                if self._idle:
+                    return self._idle.pop()  # LIFO: las menos usadas envejecen y se cierran
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Pool de conexiones agotado ({self.max_size} en uso) "
+                        f"tras esperar {self.timeout:.1f}s"
+                    )
+                if not waited:
+                    self._stats["esperas"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+    def _create(self) -> _PoolEntry:
+        try:
+            entry = _PoolEntry(_connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["conexiones_creadas"] += 1
+        return entry
+
+    def _is_healthy(self, entry: _PoolEntry) -> bool:
+        now = time.monotonic()
+        conn = entry.conn
+        if conn.closed or entry.expired(now):
+            return False
+        if now - entry.last_used < DB_POOL_HEALTH_CHECK_AFTER:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["fallos_health_check"] += 1
+            return False
+
+    def _discard(self, entry: _PoolEntry):
+        self._close_quietly(entry.conn)
+        with self._cond:
+            self._size -= 1
+            self._stats["conexiones_cerradas"] += 1
+            self._cond.notify()
+
+    def _ensure_reaper(self):
+        if self._reaper is not None:
+            return
+        with self._cond:
+            if self._reaper is not None or self._closed:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="db-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(DB_POOL_REAP_INTERVAL)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Error limpiando pool de conexiones: {e}")
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Retorna el pool global, creándolo en el primer uso"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pool():
+    """Cierra el pool global (se llama al apagar la aplicación)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    """Estadísticas del pool global para monitoreo"""
+    if not DB_POOL_ENABLED:
+        return {"habilitado": False}
+    if _pool is None:
+        return {"habilitado": True, "abiertas": 0, "ociosas": 0, "en_uso": 0}
+    return _pool.stats()
+
+
+def get_db_connection():
+    """
+    Obtiene una conexión con la base de datos Citus/PostgreSQL.
+    Retorna una conexión con RealDictCursor por defecto.
+
+    Con DB_POOL_ENABLED la conexión sale del pool y close() la devuelve;
+    sin pool se abre una conexión física nueva en cada llamada.
+
+    Raises:
+        RuntimeError: Si no se puede conectar a la base de datos
+            (PoolTimeoutError si el pool está agotado)
+    """
+    if DB_POOL_ENABLED:
+        return get_pool().getconn()
+    return _connect()
+
 def test_connection():
     """
     Función de utilidad para probar la conexión.
@@ -81,7 +432,13 @@ def get_connection_info():
         "port": POSTGRES_PORT,
         "database": POSTGRES_DB,
         "user": POSTGRES_USER,
-        "password_set": bool(POSTGRES_PASSWORD)
+        "password_set": bool(POSTGRES_PASSWORD),
+        "pool": {
+            "habilitado": DB_POOL_ENABLED,
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT
+        }
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+# backend/project/app/database_async.py
+"""
+Acceso asíncrono a PostgreSQL/Citus
+Pool de conexiones asyncio (psycopg 3) con cursores que retornan diccionarios.
+
+Los endpoints usan fetch_one / fetch_all / execute sin preocuparse del
+driver: con DB_ASYNC_ENABLED=true las consultas van por el pool asyncio;
+con false se ejecutan en el threadpool sobre el pool síncrono de
+app.database (ruta de respaldo).
+"""
+
+import os
+from typing import Any, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app.database import (
+    get_db_connection,
+    POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT,
+    DB_POOL_MAX_LIFETIME, DB_POOL_MAX_IDLE, PoolTimeoutError
+)
+
+try:
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+except ImportError:  # psycopg 3 no instalado: solo queda la ruta síncrona
+    make_conninfo = None
+    dict_row = None
+    AsyncConnectionPool = None
+    PoolTimeout = None
+
+load_dotenv(override=False)
+
+# Configuración de la ruta asíncrona
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_ASYNC_POOL_MIN_SIZE = int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", DB_POOL_MIN_SIZE))
+DB_ASYNC_POOL_MAX_SIZE = int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", DB_POOL_MAX_SIZE))
+
+_async_pool = None
+
+
+def async_enabled() -> bool:
+    """True si las consultas van por el pool asyncio"""
+    return DB_ASYNC_ENABLED and AsyncConnectionPool is not None
+
+
+def _conninfo() -> str:
+    # make_conninfo escapa los valores (contraseñas con espacios, ' o \)
+    return make_conninfo(
+        host=POSTGRES_HOST, port=POSTGRES_PORT, dbname=POSTGRES_DB,
+        user=POSTGRES_USER, password=POSTGRES_PASSWORD, connect_timeout=5
+    )
+
+
+async def open_async_pool():
+    """Abre el pool asyncio (se llama al arrancar la aplicación)"""
+    global _async_pool
+    if not DB_ASYNC_ENABLED or _async_pool is not None:
+        return
+    if AsyncConnectionPool is None:
+        print("⚠️ psycopg 3 no está instalado: usando la ruta síncrona de base de datos")
+        return
+
+    _async_pool = AsyncConnectionPool(
+        _conninfo(),
+        min_size=DB_ASYNC_POOL_MIN_SIZE,
+        max_size=DB_ASYNC_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        max_idle=DB_POOL_MAX_IDLE,
+        check=AsyncConnectionPool.check_connection,
+        kwargs={"row_factory": dict_row},
+        open=False,
+        name="historiaclinica-async"
+    )
+    # wait=False: la API arranca aunque el coordinador aún no responda
+    await _async_pool.open(wait=False)
+
+
+async def close_async_pool():
+    """Cierra el pool asyncio (se llama al apagar la aplicación)"""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_pool_stats() -> dict:
+    """Estadísticas del pool asyncio para monitoreo"""
+    if not async_enabled():
+        return {"habilitado": False}
+    if _async_pool is None:
+        return {"habilitado": True, "abierto": False}
+    return {"habilitado": True, "abierto": True, **_async_pool.get_stats()}
+
+
+async def _get_async_pool():
+    if _async_pool is None:
+        await open_async_pool()
+    return _async_pool
+
+
+# ==================== RUTA SÍNCRONA DE RESPALDO ====================
+
+def _run_sync(query: str, params: Optional[Sequence[Any]], mode: str, commit: bool):
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, params)
+
+        if mode == "one":
+            result = cur.fetchone()
+            result = dict(result) if result else None
+        elif mode == "all":
+            result = [dict(row) for row in cur.fetchall()]
+        else:
+            result = cur.rowcount
+
+        if commit:
+            conn.commit()
+        cur.close()
+        return result
+    except Exception:
+        if conn and commit:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+
+# ==================== API ASÍNCRONA ====================
+
+async def _run(query: str, params: Optional[Sequence[Any]], mode: str, commit: bool):
+    if not async_enabled():
+        return await run_in_threadpool(_run_sync, query, params, mode, commit)
+
+    pool = await _get_async_pool()
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+
+                if mode == "one":
+                    result = await cur.fetchone()
+                elif mode == "all":
+                    result = await cur.fetchall()
+                else:
+                    result = cur.rowcount
+
+            # El context manager del pool hace commit al salir sin error
+            if not commit:
+                await conn.rollback()
+            return result
+    except PoolTimeout as e:
+        raise PoolTimeoutError(f"Pool asíncrono de conexiones agotado: {e}")
+
+
+async def fetch_one(query: str, params: Optional[Sequence[Any]] = None,
+                    commit: bool = False) -> Optional[dict]:
+    """
+    Ejecuta una consulta y retorna la primera fila como diccionario.
+
+    Args:
+        query: SQL con placeholders %s
+        params: Parámetros de la consulta
+        commit: True para sentencias de escritura con RETURNING
+
+    Returns:
+        Fila como dict, o None si no hay resultados
+    """
+    return await _run(query, params, "one", commit)
+
+
+async def fetch_all(query: str, params: Optional[Sequence[Any]] = None,
+                    commit: bool = False) -> List[dict]:
+    """Ejecuta una consulta y retorna todas las filas como diccionarios"""
+    return await _run(query, params, "all", commit)
+
+
+async def execute(query: str, params: Optional[Sequence[Any]] = None) -> int:
+    """Ejecuta una sentencia de escritura, hace commit y retorna rowcount"""
+    return await _run(query, params, "rowcount", True)
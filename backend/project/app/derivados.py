@@ -0,0 +1,32 @@
+# backend/project/app/derivados.py
+"""
+Campos derivados de pacientes: edad e IMC
+
+Se calculan en la consulta (expresiones SQL agregadas al SELECT o al
+RETURNING), de modo que los listados, la respuesta completa, las
+proyecciones y el PDF reciben la fila ya con `edad` e `imc`, sin
+aritmética de fechas por fila en Python.
+"""
+
+from typing import Dict, List, Optional
+
+# Edad en años cumplidos a la fecha del servidor de base de datos
+EDAD_SQL = "DATE_PART('year', AGE(fecha_nacimiento))::INTEGER"
+
+# IMC con peso en kg y talla en cm (NULL si falta alguno o es 0)
+IMC_SQL = "CASE WHEN peso > 0 AND talla > 0 THEN ROUND(peso / ((talla / 100.0) * (talla / 100.0)), 2) END"
+
+# Campo derivado -> expresión SQL
+CAMPOS_DERIVADOS: Dict[str, str] = {
+    "edad": EDAD_SQL,
+    "imc": IMC_SQL,
+}
+
+
+def select_derivados(campos: Optional[List[str]] = None) -> str:
+    """'<expr> AS edad, <expr> AS imc' para agregar a un SELECT o RETURNING"""
+    return ", ".join(
+        f"{CAMPOS_DERIVADOS[campo]} AS {campo}"
+        for campo in (campos if campos is not None else CAMPOS_DERIVADOS)
+    )
+
@@ -0,0 +1,264 @@
+# backend/project/app/importacion.py
+"""
+Importación masiva de pacientes (CSV o NDJSON con los campos de PacienteCreate)
+
+Flujo por lote de IMPORTACION_LOTE filas:
+1. Se lee y valida fila por fila (streaming): las filas inválidas se
+   reportan con su número y no detienen la carga
+2. Las válidas se cargan con COPY en una tabla temporal de staging
+3. Un solo INSERT ... SELECT ... ON CONFLICT (numero_documento) DO NOTHING
+   las pasa a public.pacientes; los documentos que ya existían se
+   reportan como duplicados
+Cada lote se confirma por separado: un lote fallido no deshace los anteriores.
+
+CLI (desde backend/project):
+    python -m app.importacion pacientes.csv
+    python -m app.importacion pacientes.ndjson --formato ndjson --lote 10000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from app.database import get_db_connection
+from app.models import PacienteCreate
+from app.normalizacion import claves_foneticas
+
+load_dotenv(override=False)
+
+IMPORTACION_LOTE = int(os.getenv("IMPORTACION_LOTE", 5000))
+# Errores detallados en el resumen (el resto solo se cuenta)
+IMPORTACION_MAX_ERRORES = int(os.getenv("IMPORTACION_MAX_ERRORES", 1000))
+
+FORMATOS = ("csv", "ndjson")
+
+COLUMNAS = list(PacienteCreate.model_fields) + ["primer_nombre_fonetico", "primer_apellido_fonetico"]
+
+# Mismos tipos que public.pacientes pero sin NOT NULL, defaults ni secuencia;
+# tabla local del coordinador que dura lo que la conexión
+_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS pacientes_importacion
+    ON COMMIT DELETE ROWS
+    AS SELECT {', '.join(COLUMNAS)} FROM public.pacientes
+    WITH NO DATA
+"""
+
+_MERGE_SQL = f"""
+    INSERT INTO public.pacientes ({', '.join(COLUMNAS)})
+    SELECT {', '.join(COLUMNAS)} FROM pacientes_importacion
+    ON CONFLICT (numero_documento) DO NOTHING
+    RETURNING id, numero_documento, primer_nombre, segundo_nombre, primer_apellido, segundo_apellido
+"""
+
+# Bytes que no son UTF-8 válido, decodificados con errors="surrogateescape"
+_BYTES_INVALIDOS = re.compile("[\udc80-\udcff]")
+
+
+class FilaIlegible(ValueError):
+    """Fila con bytes que no son UTF-8 válido"""
+
+
+class ResumenImportacion:
+    """Contadores y errores por fila de una importación"""
+
+    def __init__(self):
+        self.filas = 0
+        self.insertados = 0
+        self.duplicados = 0
+        self.invalidos = 0
+        self.errores: List[Dict[str, Any]] = []
+        self.errores_omitidos = 0
+
+    def error(self, fila: int, numero_documento: Optional[str], mensajes: List[str]):
+        if len(self.errores) < IMPORTACION_MAX_ERRORES:
+            self.errores.append({"fila": fila, "numero_documento": numero_documento, "errores": mensajes})
+        else:
+            self.errores_omitidos += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "filas": self.filas,
+            "insertados": self.insertados,
+            "duplicados": self.duplicados,
+            "invalidos": self.invalidos,
+            "errores": sorted(self.errores, key=lambda e: e["fila"]),
+            "errores_omitidos": self.errores_omitidos,
+        }
+
+
+# ==================== LECTURA Y VALIDACIÓN ====================
+
+def lineas_utf8(binario: BinaryIO) -> Iterator[str]:
+    """
+    Líneas de texto de un archivo binario (subida HTTP). Corta solo en \\n,
+    como open(..., newline=""): U+2028 dentro de un JSON no parte la línea.
+    Quita el BOM de la primera línea. Los bytes inválidos no cortan la
+    lectura: leer_registros reporta su fila como error.
+    """
+    for numero, linea in enumerate(binario):
+        yield linea.decode("utf-8-sig" if numero == 0 else "utf-8", errors="surrogateescape")
+
+
+def _ilegible(*textos: Any) -> bool:
+    return any(isinstance(t, str) and _BYTES_INVALIDOS.search(t) for t in textos)
+
+
+def leer_registros(stream: Iterable[str], formato: str) -> Iterator[Tuple[int, Any]]:
+    """
+    (número de fila, registro crudo); fila 1 = primer registro de datos.
+    Las filas que no se pueden leer llegan como excepción en lugar del registro.
+    """
+    if formato == "csv":
+        for fila, registro in enumerate(csv.DictReader(stream), start=1):
+            if _ilegible(*registro.keys(), *registro.values()):
+                yield fila, FilaIlegible("La fila contiene caracteres que no son UTF-8 válido")
+                continue
+            # Celdas vacías = campo no informado
+            yield fila, {k: v for k, v in registro.items() if k and v not in (None, "")}
+    elif formato == "ndjson":
+        for fila, linea in enumerate(stream, start=1):
+            if not linea.strip():
+                continue
+            if _ilegible(linea):
+                yield fila, FilaIlegible("La línea contiene caracteres que no son UTF-8 válido")
+                continue
+            try:
+                yield fila, json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield fila, e
+    else:
+        raise ValueError(f"Formato no soportado: {formato} (use {' o '.join(FORMATOS)})")
+
+
+def validar_registro(registro: Any) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """(fila lista para COPY, []) o (None, mensajes de error)"""
+    if isinstance(registro, FilaIlegible):
+        return None, [str(registro)]
+    if isinstance(registro, Exception):
+        return None, [f"JSON inválido: {registro}"]
+    if not isinstance(registro, dict):
+        return None, ["El registro debe ser un objeto"]
+    try:
+        paciente = PacienteCreate(**registro)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+    datos = paciente.model_dump(mode="json")
+    datos.update(claves_foneticas(datos))
+    return datos, []
+
+
+# ==================== CARGA ====================
+
+def _copiar_lote(cur, lote: List[Dict[str, Any]]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for datos in lote:
+        writer.writerow(["" if datos.get(c) is None else datos[c] for c in COLUMNAS])
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY pacientes_importacion ({', '.join(COLUMNAS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def _cargar_lote(conn, lote: List[Tuple[int, Dict[str, Any]]], resumen: ResumenImportacion,
+                 al_insertar: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+    cur = conn.cursor()
+    try:
+        cur.execute(_STAGING_SQL)
+        _copiar_lote(cur, [datos for _, datos in lote])
+        cur.execute(_MERGE_SQL)
+        filas_insertadas = cur.fetchall()
+        conn.commit()  # ON COMMIT DELETE ROWS vacía el staging
+    except Exception as e:
+        conn.rollback()
+        # El lote completo se reporta; los siguientes continúan
+        for fila, datos in lote:
+            resumen.error(fila, datos["numero_documento"], [f"Error al cargar el lote: {e}"])
+        resumen.invalidos += len(lote)
+        return
+    finally:
+        cur.close()
+
+    if al_insertar is not None and filas_insertadas:
+        al_insertar(filas_insertadas)
+    insertados = {row["numero_documento"] for row in filas_insertadas}
+    resumen.insertados += len(insertados)
+    for fila, datos in lote:
+        if datos["numero_documento"] not in insertados:
+            resumen.duplicados += 1
+            resumen.error(fila, datos["numero_documento"], ["Ya existe un paciente con este documento"])
+
+
+def importar_pacientes(stream: Iterable[str], formato: str = "csv", lote: int = IMPORTACION_LOTE,
+                       al_insertar: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> dict:
+    """
+    Importa pacientes desde un stream de texto (o cualquier iterable de líneas).
+
+    `al_insertar(filas)` se llama tras confirmar cada lote con las filas
+    insertadas (id, documento y nombres), p. ej. para el autocompletado.
+
+    Returns:
+        Resumen: filas, insertados, duplicados, invalidos y errores por fila
+    """
+    resumen = ResumenImportacion()
+    vistos = set()
+    pendientes: List[Tuple[int, Dict[str, Any]]] = []
+    lote = max(1, lote)
+
+    conn = get_db_connection()
+    try:
+        for fila, registro in leer_registros(stream, formato):
+            resumen.filas += 1
+            datos, errores = validar_registro(registro)
+            if datos is None:
+                resumen.invalidos += 1
+                documento = registro.get("numero_documento") if isinstance(registro, dict) else None
+                resumen.error(fila, None if documento is None else str(documento), errores)
+                continue
+            if datos["numero_documento"] in vistos:
+                resumen.duplicados += 1
+                resumen.error(fila, datos["numero_documento"], ["Documento repetido en el archivo"])
+                continue
+            vistos.add(datos["numero_documento"])
+            pendientes.append((fila, datos))
+            if len(pendientes) >= lote:
+                _cargar_lote(conn, pendientes, resumen, al_insertar)
+                pendientes = []
+        if pendientes:
+            _cargar_lote(conn, pendientes, resumen, al_insertar)
+    finally:
+        conn.close()
+
+    return resumen.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de pacientes")
+    parser.add_argument("archivo", help="Archivo CSV o NDJSON ('-' = entrada estándar)")
+    parser.add_argument("--formato", choices=FORMATOS, default=None,
+                        help="Por defecto se deduce de la extensión")
+    parser.add_argument("--lote", type=int, default=IMPORTACION_LOTE, help="Filas por lote de COPY")
+    args = parser.parse_args()
+
+    formato = args.formato or ("ndjson" if args.archivo.endswith((".ndjson", ".jsonl")) else "csv")
+    if args.archivo == "-":
+        resumen = importar_pacientes(sys.stdin, formato, args.lote)
+    else:
+        with open(args.archivo, encoding="utf-8-sig", errors="surrogateescape", newline="") as stream:
+            resumen = importar_pacientes(stream, formato, args.lote)
+
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    return 0 if resumen["invalidos"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,31 +4,91 @@ API Principal - Sistema de Historia Clínica Distribuida
 VERSIÓN CORREGIDA - Fixes para listar, buscar y exportar PDF
 """
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from datetime import timedelta, datetime
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Header, Response, UploadFile, File
 from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from psycopg2.extras import RealDictCursor
 import io
 
-from app.database import get_db_connection
+from app.database import get_db_connection, get_pool_stats, close_pool
+from app.database_async import (
+    fetch_one, fetch_all, execute,
+    open_async_pool, close_async_pool, get_async_pool_stats
+)
 from app.models import (
     Usuario, UsuarioCreate, UsuarioLogin, TokenResponse,
     PacienteCreate, PacienteUpdate, PacienteResponse, PacienteResumen,
-    RolEnum
+    PacienteSugerencia, PacientesLoteRequest, PacientesLoteResponse,
+    FormatoImportacionEnum, ResumenImportacionResponse,
+    ExportacionPdfResponse, ExportacionZipRequest,
+    ModoBusquedaEnum, RolEnum
 )
 from app.auth import (
     authenticate_user, create_access_token, get_token_expiration,
     get_current_active_user, require_role, require_admin,
     require_medico, require_admisionista, require_staff,
-    user_can_access_patient
+    user_can_access_patient, invalidate_user_cache, get_user_cache_stats,
+    build_token_claims, decode_token, revoke_token, revoke_user_tokens,
+    token_revocations, security
+)
+from app.passwords import (
+    hash_password_async, PasswordPoolSaturated,
+    shutdown_password_pool, get_password_pool_stats
 )
+from app.ultimo_acceso import ultimo_acceso_buffer
+from app.pdf_generator import precargar_recursos_pdf
+from app.pdf_pool import pdf_render_pool, PdfPoolSaturated, PdfRenderTimeout
+from app.pdf_cache import pdf_cache
+from app.pdf_jobs import pdf_jobs, PdfJobQueueFull, ESTADO_COMPLETADO
+from app.pdf_zip import stream_zip_pdfs, PDF_ZIP_MAX_DOCUMENTOS
+from app.paginacion import decodificar_cursor, recortar_pagina, CursorInvalido
+from app.busqueda import construir_busqueda, construir_autocompletado, es_documento_exacto
+from app.typeahead import typeahead_index
+from app.normalizacion import claves_foneticas
+from app.shards import agrupar_por_shard, consultar_por_shard, PACIENTES_LOTE_MAX
+from app.importacion import importar_pacientes, lineas_utf8
+from app.proyeccion import SELECT_PACIENTE, resolver_campos, select_columnas, proyectar
+from app.serializacion import paciente_a_dict, resumen_a_dict, respuesta_json
+from app.derivados import EDAD_SQL, select_derivados
+from app.condicional import (
+    obtener_version, variante_campos, headers_cache, no_modificado, respuesta_no_modificada,
+    condicion_if_match
+)
+from app.pdf_generator import PDF_TEMPLATE_VERSION
+from app.paciente_cache import paciente_cache
 
 # ==================== CONFIGURACIÓN APP ====================
 
 from fastapi.middleware.cors import CORSMiddleware
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y apagado ordenado de los recursos compartidos"""
+    await open_async_pool()
+    ultimo_acceso_buffer.start()
+    precargar_recursos_pdf()
+    pdf_render_pool.start()
+    typeahead_index.start()
+    yield
+    typeahead_index.stop()
+    await paciente_cache.close()
+    await pdf_jobs.shutdown()
+    pdf_render_pool.shutdown()
+    # Volcar los últimos accesos pendientes antes de cerrar los pools
+    ultimo_acceso_buffer.stop()
+    # Cerrar conexiones de ambos pools al apagar
+    await close_async_pool()
+    close_pool()
+    shutdown_password_pool()
+
+
 app = FastAPI(
     title="🏥 Sistema de Historia Clínica Distribuida",
     description="""
@@ -77,7 +137,8 @@ app = FastAPI(
     contact={
         "name": "Equipo de Desarrollo",
         "email": "support@historiaclinica.com"
-    }
+    },
+    lifespan=lifespan
 )
 
 # ==================== CONFIGURACIÓN CORS ====================
@@ -94,6 +155,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Headers informativos que lee el frontend
+    expose_headers=["X-Siguiente-Cursor", "X-Busqueda-Ruta", "X-Autocompletado", "ETag", "Last-Modified"],
 )
 
 
@@ -249,12 +312,41 @@ def health_check():
             except:
                 pass
 
+    health_status["pool_conexiones"] = get_pool_stats()
+    health_status["pool_conexiones_async"] = get_async_pool_stats()
+
     # Retornar respuesta con código apropiado
     if status_code == 503:
         raise HTTPException(status_code=503, detail=health_status)
 
     return health_status
 
+@app.get(
+    "/metricas",
+    tags=["Sistema"],
+    summary="📈 Métricas internas"
+)
+def metricas():
+    """
+    Métricas de los recursos internos de la API (pools de conexiones).
+    Pensado para monitoreo; no consulta la base de datos.
+    """
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "pool_conexiones": get_pool_stats(),
+        "pool_conexiones_async": get_async_pool_stats(),
+        "cache_usuarios": get_user_cache_stats(),
+        "revocacion_tokens": token_revocations.stats(),
+        "pool_bcrypt": get_password_pool_stats(),
+        "ultimo_acceso": ultimo_acceso_buffer.stats(),
+        "pool_pdf": pdf_render_pool.stats(),
+        "cache_pdf": pdf_cache.stats(),
+        "exportaciones_pdf": pdf_jobs.stats(),
+        "autocompletado": typeahead_index.stats(),
+        "cache_pacientes": paciente_cache.stats()
+    }
+
+
 # ==================== AUTENTICACIÓN ====================
 
 @app.post(
@@ -263,7 +355,7 @@ def health_check():
     tags=["🔐 Autenticación"],
     summary="Iniciar sesión"
 )
-def login(credentials: UsuarioLogin):
+async def login(credentials: UsuarioLogin):
     """
     Autenticación de usuarios contra la base de datos.
 
@@ -280,7 +372,10 @@ def login(credentials: UsuarioLogin):
     - Token JWT válido por 30 minutos
     - Información del usuario autenticado
     """
-    user = authenticate_user(credentials.username, credentials.password)
+    try:
+        user = await authenticate_user(credentials.username, credentials.password)
+    except PasswordPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
 
     if not user:
         raise HTTPException(
@@ -289,13 +384,7 @@ def login(credentials: UsuarioLogin):
         )
 
     # Crear token con información del usuario
-    access_token = create_access_token(
-        data={
-            "sub": user.username,
-            "rol": user.rol,
-            "user_id": user.id
-        }
-    )
+    access_token = create_access_token(data=build_token_claims(user))
 
     return TokenResponse(
         access_token=access_token,
@@ -304,6 +393,23 @@ def login(credentials: UsuarioLogin):
     )
 
 
+@app.post(
+    "/logout",
+    tags=["🔐 Autenticación"],
+    summary="Cerrar sesión",
+    status_code=204
+)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Revoca el token actual; deja de ser aceptado aunque no haya expirado.
+    """
+    revoke_token(decode_token(credentials.credentials))
+    return None
+
+
 @app.get(
     "/me",
     response_model=Usuario,
@@ -327,7 +433,7 @@ def get_me(current_user: Usuario = Depends(get_current_active_user)):
     summary="Crear usuario (Admin)",
     status_code=201
 )
-def crear_usuario(
+async def crear_usuario(
     usuario: UsuarioCreate,
     current_user: Usuario = Depends(require_admin())
 ):
@@ -336,49 +442,45 @@ def crear_usuario(
 
     **Requiere rol**: Admin
 
-    La contraseña se hashea automáticamente con bcrypt.
+    La contraseña se hashea con bcrypt en la API; el texto plano nunca
+    viaja a la base de datos.
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
         # Verificar que el username no exista
-        cur.execute("SELECT id FROM public.usuarios WHERE username = %s", (usuario.username,))
-        if cur.fetchone():
+        existente = await fetch_one(
+            "SELECT id FROM public.usuarios WHERE username = %s", (usuario.username,)
+        )
+        if existente:
             raise HTTPException(status_code=400, detail="El username ya existe")
 
+        password_hash = await hash_password_async(usuario.password)
+
         # Insertar usuario con contraseña hasheada
-        cur.execute("""
+        row = await fetch_one("""
             INSERT INTO public.usuarios
             (username, password_hash, rol, nombres, apellidos, documento_vinculado)
-            VALUES (%s, crypt(%s, gen_salt('bf')), %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s)
             RETURNING id, username, rol, nombres, apellidos, documento_vinculado,
                       activo, fecha_creacion, ultimo_acceso
         """, (
             usuario.username,
-            usuario.password,
+            password_hash,
             usuario.rol,
             usuario.nombres,
             usuario.apellidos,
             usuario.documento_vinculado
-        ))
+        ), commit=True)
 
-        row = cur.fetchone()
-        conn.commit()
-        cur.close()
+        invalidate_user_cache(row['username'])
 
-        return Usuario(**dict(row))
+        return Usuario(**row)
 
     except HTTPException:
         raise
+    except PasswordPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear usuario: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
 
 @app.get(
@@ -421,6 +523,47 @@ def listar_usuarios(
             conn.close()
 
 
+@app.delete(
+    "/usuarios/{user_id}",
+    tags=["👥 Usuarios"],
+    summary="Desactivar usuario (Admin)",
+    status_code=204
+)
+async def desactivar_usuario(
+    user_id: int,
+    current_user: Usuario = Depends(require_admin())
+):
+    """
+    Desactiva un usuario (borrado lógico), lo retira de la caché de
+    autenticación y revoca sus tokens vigentes.
+
+    **Requiere rol**: Admin
+    """
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="No puede desactivar su propio usuario")
+
+    try:
+        row = await fetch_one("""
+            UPDATE public.usuarios
+            SET activo = FALSE
+            WHERE id = %s
+            RETURNING username
+        """, (user_id,), commit=True)
+
+        if not row:
+            raise HTTPException(status_code=404, detail=f"Usuario {user_id} no encontrado")
+
+        invalidate_user_cache(row['username'])
+        revoke_user_tokens(row['username'])
+
+        return None
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al desactivar usuario: {str(e)}")
+
+
 # ==================== CRUD PACIENTES ====================
 
 @app.post(
@@ -430,7 +573,7 @@ def listar_usuarios(
     summary="Crear paciente (Admisionista/Médico/Admin)",
     status_code=201
 )
-def crear_paciente(
+async def crear_paciente(
     paciente: PacienteCreate,
     current_user: Usuario = Depends(require_role(RolEnum.ADMISIONISTA, RolEnum.MEDICO, RolEnum.ADMIN))
 ):
@@ -449,55 +592,46 @@ def crear_paciente(
 
     **Campos opcionales**: 57 campos adicionales disponibles
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Verificar que el documento no exista
-        cur.execute(
-            "SELECT id FROM public.pacientes WHERE numero_documento = %s",
-            (paciente.numero_documento,)
-        )
-        if cur.fetchone():
-            raise HTTPException(
-                status_code=400,
-                detail=f"Ya existe un paciente con documento {paciente.numero_documento}"
-            )
-
         # Construir query dinámicamente
         fields = []
         values = []
         placeholders = []
 
-        for field, value in paciente.dict(exclude_unset=True).items():
+        datos = paciente.dict(exclude_unset=True)
+        # Claves de búsqueda fonética derivadas de los nombres
+        datos.update(claves_foneticas(datos))
+
+        for field, value in datos.items():
             if value is not None:
                 fields.append(field)
                 values.append(value)
                 placeholders.append("%s")
 
+        # Una sola ida a la base de datos: el índice único sobre
+        # numero_documento resuelve el duplicado sin SELECT previo
         query = f"""
             INSERT INTO public.pacientes ({', '.join(fields)})
             VALUES ({', '.join(placeholders)})
-            RETURNING *
+            ON CONFLICT (numero_documento) DO NOTHING
+            RETURNING *, {select_derivados()}
         """
 
-        cur.execute(query, values)
-        row = cur.fetchone()
-        conn.commit()
-        cur.close()
+        row = await fetch_one(query, values, commit=True)
+        if not row:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Ya existe un paciente con documento {paciente.numero_documento}"
+            )
+        typeahead_index.upsert(row)
+        await paciente_cache.invalidate(paciente.numero_documento)
 
-        return PacienteResponse.from_db(dict(row))
+        return respuesta_json(paciente_a_dict(row), status_code=201)
 
     except HTTPException:
         raise
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear paciente: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
 
 @app.get(
@@ -506,13 +640,29 @@ def crear_paciente(
     tags=["👨‍⚕️ Pacientes"],
     summary="Obtener paciente por documento"
 )
-def obtener_paciente(
+async def obtener_paciente(
     numero_documento: str,
+    fields: Optional[str] = Query(
+        None,
+        description="Campos o grupos separados por coma (identificacion, atencion, "
+                    "signos_vitales, diagnostico, cierre, profesional, registro)"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """
     Obtiene la historia clínica completa de un paciente.
 
+    Con `fields` solo se consultan y retornan esos campos (más `id` y
+    `numero_documento`), p. ej. `?fields=identificacion,signos_vitales`.
+
+    **Caché**: responde con `ETag` y `Last-Modified`; con `If-None-Match`
+    o `If-Modified-Since` vigentes retorna 304 consultando solo la versión
+    del registro. Los registros completos se sirven desde una caché de
+    lectura (app/paciente_cache.py) que se invalida al crear, actualizar
+    o eliminar.
+
     **Control de acceso**:
     - Staff (médico/admisionista/resultados/admin): acceso a cualquier paciente
     - Paciente: solo acceso a su propia historia
@@ -524,20 +674,36 @@ def obtener_paciente(
             detail="No tiene permiso para acceder a este paciente"
         )
 
-    conn = None
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        cur.execute("""
-            SELECT * FROM public.pacientes
-            WHERE numero_documento = %s
-            ORDER BY id DESC
-            LIMIT 1
-        """, (numero_documento,))
+    campos = None
+    variante = ""
+    if fields:
+        try:
+            campos = resolver_campos(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        variante = variante_campos(campos)
 
-        row = cur.fetchone()
-        cur.close()
+    try:
+        # Registro completo en caché: responde (incluso 304) sin ir a la BD
+        row = await paciente_cache.get(numero_documento)
+        if row is None and (if_none_match or if_modified_since):
+            # Solo (id, ultima_actualizacion): si no cambió, no se lee la fila
+            version = await obtener_version(numero_documento)
+            if version and no_modificado(version, variante, if_none_match, if_modified_since):
+                return respuesta_no_modificada(version, variante)
+        elif row is not None and no_modificado(row, variante, if_none_match, if_modified_since):
+            return respuesta_no_modificada(row, variante)
+
+        if row is None:
+            if campos:
+                # La versión se lee siempre para los headers de caché
+                columnas = campos + [c for c in ["ultima_actualizacion"] if c not in campos]
+                row = await _leer_paciente(numero_documento, select_columnas(columnas))
+            else:
+                # Una sola lectura por paciente aunque lleguen muchas peticiones a la vez
+                row = await paciente_cache.obtener(
+                    numero_documento, lambda: _leer_paciente_completo(numero_documento), revisar_cache=False
+                )
 
         if not row:
             raise HTTPException(
@@ -545,15 +711,121 @@ def obtener_paciente(
                 detail=f"Paciente con documento {numero_documento} no encontrado"
             )
 
-        return PacienteResponse.from_db(dict(row))
+        headers = headers_cache(row, variante)
+        if campos:
+            # Respuesta parcial: no cumple el esquema completo de PacienteResponse
+            return respuesta_json(proyectar(row, campos), headers=headers)
+
+        return respuesta_json(row, headers=headers)
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener paciente: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
+
+
+async def _leer_paciente(numero_documento: str, columnas: str) -> Optional[dict]:
+    return await fetch_one(f"""
+        SELECT {columnas}
+        FROM public.pacientes
+        WHERE numero_documento = %s
+        ORDER BY id DESC
+        LIMIT 1
+    """, (numero_documento,))
+
+
+async def _leer_paciente_completo(numero_documento: str) -> Optional[dict]:
+    """Registro completo ya serializado (lo que guarda la caché de pacientes)"""
+    row = await _leer_paciente(numero_documento, SELECT_PACIENTE)
+    return paciente_a_dict(row) if row else None
+
+
+@app.post(
+    "/pacientes/lote",
+    response_model=PacientesLoteResponse,
+    tags=["👨‍⚕️ Pacientes"],
+    summary="Obtener varios pacientes por documento"
+)
+async def obtener_pacientes_lote(
+    solicitud: PacientesLoteRequest,
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Obtiene las historias clínicas de varios pacientes en un solo llamado
+    (hasta PACIENTES_LOTE_MAX documentos).
+
+    Los documentos se agrupan por shard de Citus y cada grupo se consulta
+    con una sola sentencia dirigida a ese shard; los grupos van en paralelo,
+    con a lo sumo PACIENTES_LOTE_CONCURRENCIA consultas a la vez.
+
+    **Control de acceso**: el de `GET /pacientes/{numero_documento}`,
+    aplicado a cada documento; los no permitidos se listan en `sin_permiso`.
+
+    **Retorna**: `pacientes` indexado por numero_documento, más
+    `no_encontrados` y `sin_permiso`
+    """
+    documentos = list(dict.fromkeys(d.strip() for d in solicitud.documentos if d.strip()))
+    if len(documentos) > PACIENTES_LOTE_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {PACIENTES_LOTE_MAX} documentos por consulta"
+        )
+
+    permitidos, sin_permiso = [], []
+    for documento in documentos:
+        (permitidos if user_can_access_patient(current_user, documento) else sin_permiso).append(documento)
+
+    try:
+        grupos = await agrupar_por_shard(permitidos)
+        rows = await consultar_por_shard(
+            f"SELECT {SELECT_PACIENTE} FROM public.pacientes WHERE numero_documento = ANY(%s)",
+            grupos
+        )
+        pacientes = {row["numero_documento"]: paciente_a_dict(row) for row in rows}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener pacientes: {str(e)}")
+
+    return respuesta_json({
+        "pacientes": pacientes,
+        "no_encontrados": [d for d in permitidos if d not in pacientes],
+        "sin_permiso": sin_permiso,
+    })
+
+
+@app.post(
+    "/pacientes/importar",
+    response_model=ResumenImportacionResponse,
+    tags=["👨‍⚕️ Pacientes"],
+    summary="Importación masiva de pacientes (Admisionista/Admin)"
+)
+async def importar_pacientes_archivo(
+    archivo: UploadFile = File(..., description="CSV con encabezados o NDJSON con los campos de creación"),
+    formato: FormatoImportacionEnum = Query(FormatoImportacionEnum.CSV),
+    current_user: Usuario = Depends(require_role(RolEnum.ADMISIONISTA, RolEnum.ADMIN))
+):
+    """
+    Carga muchos pacientes en una sola operación.
+
+    Cada fila se valida como en `POST /pacientes`; las válidas se cargan
+    con COPY por lotes. Las filas inválidas (incluidas las que no son UTF-8
+    válido) o con documento existente no detienen la importación: se
+    reportan en `errores` con su número de fila.
+
+    **Requiere rol**: Admisionista o Admin
+
+    También disponible por consola: `python -m app.importacion archivo.csv`
+    """
+    try:
+        # El archivo ya está en disco/memoria temporal: se lee en streaming en un hilo.
+        # Sin io.TextIOWrapper: el SpooledTemporaryFile de Python 3.10 (imagen
+        # Docker) no tiene readable()/seekable()
+        lineas = lineas_utf8(archivo.file)
+        # Los importados aparecen en el autocompletado sin esperar la recarga
+        return await run_in_threadpool(
+            importar_pacientes, lineas, formato.value, al_insertar=typeahead_index.upsert_lote
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la importación: {str(e)}")
 
 
 # ==================== FIX 1: LISTAR PACIENTES CORREGIDO ====================
@@ -563,50 +835,62 @@ def obtener_paciente(
     tags=["👨‍⚕️ Pacientes"],
     summary="Listar pacientes (Staff)"
 )
-def listar_pacientes(
+async def listar_pacientes(
     current_user: Usuario = Depends(require_staff()),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Siguiente-Cursor)"),
+    offset: int = Query(0, ge=0, description="Legado: preferir `cursor`, OFFSET se degrada en páginas profundas")
 ):
     """
-    Lista todos los pacientes del sistema (vista resumida).
+    Lista todos los pacientes del sistema (vista resumida), del registro
+    más reciente al más antiguo.
+
+    **Paginación**: la respuesta trae el header `X-Siguiente-Cursor`;
+    para la página siguiente se envía su valor en `cursor`. Sin el
+    header, no hay más páginas. `offset` se mantiene por compatibilidad.
 
     **Requiere rol**: Médico, Admisionista, Resultados o Admin
 
-    **FIX**: Calcula edad usando DATE_PART en lugar de columna
+    **FIX**: Calcula edad en la consulta (app/derivados.py) en lugar de columna
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use 'cursor' u 'offset', no ambos")
+
+    condiciones = "activo = TRUE"
+    params = []
+    if cursor:
+        try:
+            params.extend(decodificar_cursor(cursor))
+        except CursorInvalido as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Keyset: cada shard arranca directo en la posición del cursor
+        condiciones += " AND (fecha_registro, id) < (%s, %s)"
+    params.extend([limit + 1, offset])
 
-        # ✅ FIX: Calcular edad con DATE_PART, no usar columna inexistente
-        cur.execute("""
+    try:
+        # ✅ FIX: Calcular edad en SQL, no usar columna inexistente
+        rows = await fetch_all(f"""
             SELECT
                 id,
                 numero_documento,
                 CONCAT(primer_nombre, ' ', primer_apellido) as nombre_completo,
-                DATE_PART('year', AGE(fecha_nacimiento))::INTEGER as edad,
+                {EDAD_SQL} as edad,
                 sexo,
                 tipo_atencion,
                 fecha_atencion,
-                nombre_profesional
+                nombre_profesional,
+                fecha_registro
             FROM public.pacientes
-            WHERE activo = TRUE
-            ORDER BY fecha_registro DESC
+            WHERE {condiciones}
+            ORDER BY fecha_registro DESC, id DESC
             LIMIT %s OFFSET %s
-        """, (limit, offset))
-
-        rows = cur.fetchall()
-        cur.close()
-
-        return [PacienteResumen(**dict(row)) for row in rows]
-
+        """, tuple(params))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar pacientes: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
+
+    rows, siguiente = recortar_pagina(rows, limit)
+    headers = {"X-Siguiente-Cursor": siguiente} if siguiente else None
+    return respuesta_json(resumen_a_dict.lista(rows), headers=headers)
 
 
 @app.put(
@@ -615,9 +899,10 @@ def listar_pacientes(
     tags=["👨‍⚕️ Pacientes"],
     summary="Actualizar paciente (Médico/Admin)"
 )
-def actualizar_paciente(
+async def actualizar_paciente(
     numero_documento: str,
     paciente: PacienteUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: Usuario = Depends(require_medico())
 ):
     """
@@ -626,28 +911,21 @@ def actualizar_paciente(
     **Requiere rol**: Médico o Admin
 
     Solo se actualizan los campos proporcionados (PATCH semántico).
+
+    **Concurrencia**: enviando en `If-Match` el `ETag` recibido al leer la
+    historia, la actualización solo se aplica si nadie la modificó desde
+    entonces; si no, responde 412 con el `ETag` vigente.
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Verificar que el paciente exista
-        cur.execute(
-            "SELECT id FROM public.pacientes WHERE numero_documento = %s",
-            (numero_documento,)
-        )
-        if not cur.fetchone():
-            raise HTTPException(
-                status_code=404,
-                detail=f"Paciente con documento {numero_documento} no encontrado"
-            )
-
         # Construir query de actualización dinámicamente
         updates = []
         values = []
 
-        for field, value in paciente.dict(exclude_unset=True).items():
+        datos = paciente.dict(exclude_unset=True)
+        # Claves de búsqueda fonética derivadas de los nombres
+        datos.update(claves_foneticas(datos))
+
+        for field, value in datos.items():
             if value is not None:
                 updates.append(f"{field} = %s")
                 values.append(value)
@@ -655,31 +933,49 @@ def actualizar_paciente(
         if not updates:
             raise HTTPException(status_code=400, detail="No hay campos para actualizar")
 
+        condiciones = ["numero_documento = %s"]
         values.append(numero_documento)
 
+        # Concurrencia optimista: la versión esperada va en el mismo UPDATE
+        condicion_version, params_version = condicion_if_match(if_match)
+        if condicion_version:
+            condiciones.append(condicion_version)
+            values.extend(params_version)
+
         query = f"""
             UPDATE public.pacientes
             SET {', '.join(updates)}, ultima_actualizacion = NOW()
-            WHERE numero_documento = %s
-            RETURNING *
+            WHERE {' AND '.join(condiciones)}
+            RETURNING *, {select_derivados()}
         """
 
-        cur.execute(query, values)
-        row = cur.fetchone()
-        conn.commit()
-        cur.close()
+        # Sin SELECT previo: si no se actualizó ninguna fila, no existe
+        # o (con If-Match) alguien la modificó antes
+        row = await fetch_one(query, values, commit=True)
+        if not row:
+            if condicion_version:
+                version = await obtener_version(numero_documento)
+                if version:
+                    raise HTTPException(
+                        status_code=412,
+                        detail="La historia clínica fue modificada por otro usuario. "
+                               "Recargue los datos antes de guardar.",
+                        headers=headers_cache(version)
+                    )
+            raise HTTPException(
+                status_code=404,
+                detail=f"Paciente con documento {numero_documento} no encontrado"
+            )
+        await pdf_cache.invalidate(numero_documento)
+        await paciente_cache.invalidate(numero_documento)
+        typeahead_index.upsert(row)
 
-        return PacienteResponse.from_db(dict(row))
+        return respuesta_json(paciente_a_dict(row), headers=headers_cache(row))
 
     except HTTPException:
         raise
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar paciente: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
 
 @app.delete(
@@ -688,7 +984,7 @@ def actualizar_paciente(
     summary="Eliminar paciente (Admin)",
     status_code=204
 )
-def eliminar_paciente(
+async def eliminar_paciente(
     numero_documento: str,
     current_user: Usuario = Depends(require_admin())
 ):
@@ -699,37 +995,29 @@ def eliminar_paciente(
 
     **Nota**: No se eliminan datos, solo se marca como inactivo.
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute("""
+        rowcount = await execute("""
             UPDATE public.pacientes
             SET activo = FALSE, ultima_actualizacion = NOW()
             WHERE numero_documento = %s
         """, (numero_documento,))
 
-        if cur.rowcount == 0:
+        if rowcount == 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"Paciente con documento {numero_documento} no encontrado"
             )
 
-        conn.commit()
-        cur.close()
+        await pdf_cache.invalidate(numero_documento)
+        await paciente_cache.invalidate(numero_documento)
+        typeahead_index.remove(numero_documento)
 
         return None
 
     except HTTPException:
         raise
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar paciente: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
 
 # ==================== FIX 2: BÚSQUEDA CORREGIDA ====================
@@ -739,9 +1027,10 @@ def eliminar_paciente(
     tags=["👨‍⚕️ Pacientes"],
     summary="Buscar pacientes (Staff)"
 )
-def buscar_pacientes(
+async def buscar_pacientes(
     nombre: Optional[str] = Query(None, description="Nombre o apellido del paciente"),
     documento: Optional[str] = Query(None, description="Número de documento"),
+    modo: ModoBusquedaEnum = Query(ModoBusquedaEnum.INDEXADO, description="indexado (por similitud), fonetico (suena igual) o legado (ILIKE)"),
     current_user: Usuario = Depends(require_staff()),
     limit: int = Query(20, ge=1, le=100)
 ):
@@ -753,8 +1042,12 @@ def buscar_pacientes(
     **FIX**: Endpoint correcto con parámetros query
 
     **Parámetros**:
-    - `nombre`: Busca en primer_nombre y primer_apellido (ILIKE)
-    - `documento`: Busca en numero_documento (ILIKE)
+    - `nombre`: Busca en nombres y apellidos, sin distinguir tildes ni mayúsculas;
+      tolera errores de digitación y ordena por similitud
+    - `documento`: Un documento completo se busca primero por igualdad
+      (consulta a un solo shard); si no existe, busca por subcadena
+    - `modo`: `indexado` (por defecto, usa índices de trigramas), `fonetico`
+      (Rodríguez = Rodrigues, Vélez = Belez; prefijo por palabra) o `legado` (ILIKE)
 
     **Uso**:
     ```
@@ -769,56 +1062,163 @@ def buscar_pacientes(
             detail="Debe proporcionar al menos un parámetro de búsqueda (nombre o documento)"
         )
 
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        rows = None
+        if modo != ModoBusquedaEnum.LEGADO and es_documento_exacto(documento):
+            # Igualdad sobre la columna de distribución: un solo shard
+            rows = await _ejecutar_busqueda(nombre, documento, modo, limit, exacto=True)
+            ruta = "shard"
+        if not rows:
+            rows = await _ejecutar_busqueda(nombre, documento, modo, limit)
+            ruta = "amplia"
 
-        conditions = ["activo = TRUE"]
-        params = []
+        return respuesta_json(resumen_a_dict.lista(rows), headers={"X-Busqueda-Ruta": ruta})
 
-        if nombre:
-            conditions.append("(primer_nombre ILIKE %s OR primer_apellido ILIKE %s)")
-            params.extend([f"%{nombre}%", f"%{nombre}%"])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
 
-        if documento:
-            conditions.append("numero_documento ILIKE %s")
-            params.append(f"%{documento}%")
 
-        params.append(limit)
+async def _ejecutar_busqueda(nombre: Optional[str], documento: Optional[str],
+                             modo: ModoBusquedaEnum, limit: int, exacto: bool = False) -> list:
+    conditions, params, order_by, order_params = construir_busqueda(nombre, documento, modo, exacto)
+    conditions.insert(0, "activo = TRUE")
+    params.extend(order_params)
+    params.append(limit)
+
+    # ✅ FIX: Calcular edad en SQL
+    query = f"""
+        SELECT
+            id,
+            numero_documento,
+            CONCAT(primer_nombre, ' ', primer_apellido) as nombre_completo,
+            {EDAD_SQL} as edad,
+            sexo,
+            tipo_atencion,
+            fecha_atencion,
+            nombre_profesional
+        FROM public.pacientes
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order_by}
+        LIMIT %s
+    """
 
-        # ✅ FIX: Calcular edad correctamente
-        query = f"""
-            SELECT
-                id,
-                numero_documento,
-                CONCAT(primer_nombre, ' ', primer_apellido) as nombre_completo,
-                DATE_PART('year', AGE(fecha_nacimiento))::INTEGER as edad,
-                sexo,
-                tipo_atencion,
-                fecha_atencion,
-                nombre_profesional
-            FROM public.pacientes
-            WHERE {' AND '.join(conditions)}
-            ORDER BY fecha_registro DESC
-            LIMIT %s
-        """
+    return await fetch_all(query, params)
 
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        cur.close()
 
-        return [PacienteResumen(**dict(row)) for row in rows]
+@app.get(
+    "/pacientes/buscar/sugerencias",
+    response_model=List[PacienteSugerencia],
+    tags=["👨‍⚕️ Pacientes"],
+    summary="Autocompletar pacientes (Staff)"
+)
+async def sugerir_pacientes(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Inicio de nombres, apellidos o documento"),
+    current_user: Usuario = Depends(require_staff()),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Sugerencias mientras se escribe: cada palabra de `q` debe ser el
+    inicio de un nombre, apellido o del documento (sin distinguir tildes).
+
+    Con TYPEAHEAD_ENABLED se responde desde el índice en memoria; si está
+    deshabilitado o aún cargando, se consulta la base de datos con las
+    mismas reglas (header `X-Autocompletado`: memoria o base_datos).
 
+    **Requiere rol**: Médico, Admisionista, Resultados o Admin
+    """
+    sugerencias = typeahead_index.buscar(q, limit)
+    if sugerencias is not None:
+        response.headers["X-Autocompletado"] = "memoria"
+        return sugerencias
+
+    try:
+        conditions, params, order_by, order_params = construir_autocompletado(q)
+        rows = await fetch_all(f"""
+            SELECT id, numero_documento, CONCAT_WS(' ', primer_nombre, primer_apellido) as nombre_completo
+            FROM public.pacientes
+            WHERE activo = TRUE AND {' AND '.join(conditions)}
+            ORDER BY {order_by}
+            LIMIT %s
+        """, params + order_params + [limit])
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
+        raise HTTPException(status_code=500, detail=f"Error en autocompletado: {str(e)}")
+
+    response.headers["X-Autocompletado"] = "base_datos"
+    return rows
 
 
 # ==================== FIX 3: EXPORTACIÓN PDF CORREGIDA ====================
-from app.pdf_generator import generar_pdf_paciente
+
+async def generar_pdf_historia(numero_documento: str, version_registro: Optional[dict] = None) -> tuple:
+    """
+    Obtiene el PDF de la historia clínica: desde la caché si el registro
+    no cambió, o renderizándolo en el pool de procesos.
+
+    La clave de la caché sale de (id, ultima_actualizacion): la fila
+    completa solo se lee si hay que renderizar. `version_registro` evita
+    repetir esa consulta si el llamador ya la hizo (obtener_version).
+
+    Returns:
+        (pdf_bytes, "HIT" | "MISS")
+
+    Raises:
+        HTTPException 404: Si el paciente no existe
+        PdfPoolSaturated / PdfRenderTimeout: Si el pool no puede atenderlo
+    """
+    if version_registro is None:
+        version_registro = await obtener_version(numero_documento)
+    if not version_registro:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Paciente con documento {numero_documento} no encontrado"
+        )
+
+    # PDF ya generado para esta versión del registro
+    version = pdf_cache.version_de(version_registro)
+    pdf_content = await pdf_cache.get(numero_documento, version)
+    cache_status = "HIT" if pdf_content is not None else "MISS"
+
+    if pdf_content is None:
+        # Obtener datos completos del paciente
+        row = await fetch_one(f"""
+            SELECT {SELECT_PACIENTE} FROM public.pacientes
+            WHERE numero_documento = %s
+            ORDER BY id DESC
+            LIMIT 1
+        """, (numero_documento,))
+        if not row:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Paciente con documento {numero_documento} no encontrado"
+            )
+        # Si cambió entre las dos lecturas, se guarda con la versión de lo renderizado
+        version = pdf_cache.version_de(row)
+
+        # Convertir a diccionario y preparar datos
+        paciente_dict = row
+
+        # Convertir fechas a string para el template
+        if paciente_dict.get('fecha_nacimiento'):
+            paciente_dict['fecha_nacimiento'] = str(paciente_dict['fecha_nacimiento'])
+        if paciente_dict.get('fecha_atencion'):
+            paciente_dict['fecha_atencion'] = str(paciente_dict['fecha_atencion'])
+        if paciente_dict.get('fecha_cierre'):
+            paciente_dict['fecha_cierre'] = str(paciente_dict['fecha_cierre'])
+
+        # edad e IMC ya vienen calculados en la consulta (SELECT_PACIENTE)
+
+        # ✅ FIX: Generar PDF en el pool de procesos (no bloquea la API)
+        pdf_content = await pdf_render_pool.render(paciente_dict)
+        await pdf_cache.put(numero_documento, version, pdf_content)
+
+    return pdf_content, cache_status
+
+
+def nombre_archivo_pdf(numero_documento: str) -> str:
+    """Nombre de descarga del PDF de una historia clínica"""
+    return f"HC_{numero_documento}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
 
 @app.get(
     "/pacientes/{numero_documento}/pdf",
@@ -826,8 +1226,10 @@ from app.pdf_generator import generar_pdf_paciente
     summary="Exportar historia clínica a PDF",
     response_class=StreamingResponse
 )
-def exportar_pdf(
+async def exportar_pdf(
     numero_documento: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """
@@ -839,6 +1241,12 @@ def exportar_pdf(
 
     **Retorna**: Archivo PDF para descarga
 
+    El PDF se genera en el pool de procesos de renderizado: responde
+    429 si la cola está llena y 504 si el render supera el tiempo máximo.
+
+    **Caché**: `ETag`/`Last-Modified` como en `GET /pacientes/{numero_documento}`;
+    si el cliente ya tiene esta versión del PDF responde 304 sin generarlo.
+
     **FIX**: Sintaxis correcta de WeasyPrint
     """
     # Verificar permisos
@@ -848,84 +1256,224 @@ def exportar_pdf(
             detail="No tiene permiso para exportar este paciente"
         )
 
-    conn = None
-    try:
-        # Obtener datos completos del paciente
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        cur.execute("""
-            SELECT * FROM public.pacientes
-            WHERE numero_documento = %s
-            ORDER BY id DESC
-            LIMIT 1
-        """, (numero_documento,))
-
-        row = cur.fetchone()
-        cur.close()
+    # El PDF cambia con el registro y con el diseño del template
+    variante = "pdf" + PDF_TEMPLATE_VERSION[:8]
 
-        if not row:
+    try:
+        version = await obtener_version(numero_documento)
+        if not version:
             raise HTTPException(
                 status_code=404,
                 detail=f"Paciente con documento {numero_documento} no encontrado"
             )
+        if no_modificado(version, variante, if_none_match, if_modified_since):
+            return respuesta_no_modificada(version, variante)
 
-        # Convertir a diccionario y preparar datos
-        paciente_dict = dict(row)
-
-        # Convertir fechas a string para el template
-        if paciente_dict.get('fecha_nacimiento'):
-            paciente_dict['fecha_nacimiento'] = str(paciente_dict['fecha_nacimiento'])
-        if paciente_dict.get('fecha_atencion'):
-            paciente_dict['fecha_atencion'] = str(paciente_dict['fecha_atencion'])
-        if paciente_dict.get('fecha_cierre'):
-            paciente_dict['fecha_cierre'] = str(paciente_dict['fecha_cierre'])
-
-        # Calcular edad e IMC para el PDF
-        if paciente_dict.get('fecha_nacimiento'):
-            from datetime import date
-            born = paciente_dict['fecha_nacimiento']
-            if isinstance(born, str):
-                from datetime import datetime
-                born = datetime.strptime(born, '%Y-%m-%d').date()
-            today = date.today()
-            paciente_dict['edad'] = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
-
-        peso = paciente_dict.get('peso')
-        talla = paciente_dict.get('talla')
-        if peso and talla and talla > 0:
-            paciente_dict['imc'] = round(peso / ((talla/100) ** 2), 2)
-        else:
-            paciente_dict['imc'] = None
-
-        # ✅ FIX: Generar PDF con sintaxis correcta
-        pdf_content = generar_pdf_paciente(paciente_dict)
+        pdf_content, cache_status = await generar_pdf_historia(numero_documento, version)
 
         # Crear stream de respuesta
         pdf_stream = io.BytesIO(pdf_content)
         pdf_stream.seek(0)
 
         # Nombre del archivo
-        nombre_archivo = f"HC_{numero_documento}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        nombre_archivo = nombre_archivo_pdf(numero_documento)
 
         return StreamingResponse(
             pdf_stream,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f'attachment; filename="{nombre_archivo}"'
+                "Content-Disposition": f'attachment; filename="{nombre_archivo}"',
+                "X-Cache": cache_status,
+                **headers_cache(version, variante)
             }
         )
 
     except HTTPException:
         raise
+    except PdfPoolSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except PdfRenderTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error al generar PDF: {str(e)}"
         )
-    finally:
-        if conn:
-            conn.close()
+
+
+def _obtener_exportacion(job_id: str, current_user: Usuario):
+    """Exportación visible para el usuario (propia, o cualquiera si es admin)"""
+    job = pdf_jobs.get(job_id)
+    if job is None or (job.owner != current_user.username and current_user.rol != RolEnum.ADMIN):
+        raise HTTPException(
+            status_code=404,
+            detail="Exportación no encontrada o expirada"
+        )
+    return job
+
+
+@app.post(
+    "/pacientes/{numero_documento}/pdf/exportaciones",
+    response_model=ExportacionPdfResponse,
+    status_code=202,
+    tags=["📄 Exportación"],
+    summary="Encolar exportación de historia clínica a PDF"
+)
+async def encolar_exportacion_pdf(
+    numero_documento: str,
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Encola la generación del PDF y responde de inmediato con el `job_id`.
+
+    Consultar el estado en `GET /exportaciones/{job_id}` y descargar en
+    `GET /exportaciones/{job_id}/descarga` cuando esté `completado`.
+    Los resultados se conservan por tiempo limitado.
+
+    **Control de acceso**: el mismo de `GET /pacientes/{numero_documento}/pdf`
+    """
+    if not user_can_access_patient(current_user, numero_documento):
+        raise HTTPException(
+            status_code=403,
+            detail="No tiene permiso para exportar este paciente"
+        )
+
+    async def generar():
+        pdf_content, _ = await generar_pdf_historia(numero_documento)
+        return pdf_content
+
+    try:
+        job = pdf_jobs.submit(numero_documento, current_user.username, generar)
+    except PdfJobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    return ExportacionPdfResponse(**job.to_dict())
+
+
+@app.get(
+    "/exportaciones/{job_id}",
+    response_model=ExportacionPdfResponse,
+    tags=["📄 Exportación"],
+    summary="Consultar estado de una exportación PDF"
+)
+async def estado_exportacion_pdf(
+    job_id: str,
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Estado de una exportación: `pendiente`, `procesando`, `completado` o `error`.
+    """
+    job = _obtener_exportacion(job_id, current_user)
+    return ExportacionPdfResponse(**job.to_dict())
+
+
+@app.get(
+    "/exportaciones/{job_id}/descarga",
+    tags=["📄 Exportación"],
+    summary="Descargar el PDF de una exportación",
+    response_class=StreamingResponse
+)
+async def descargar_exportacion_pdf(
+    job_id: str,
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Descarga el PDF de una exportación completada.
+
+    Responde 409 si la exportación aún no termina o terminó con error.
+    """
+    job = _obtener_exportacion(job_id, current_user)
+    if job.estado != ESTADO_COMPLETADO:
+        raise HTTPException(
+            status_code=409,
+            detail=job.error or f"La exportación está en estado '{job.estado}'"
+        )
+
+    return StreamingResponse(
+        io.BytesIO(job.pdf),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre_archivo_pdf(job.numero_documento)}"'
+        }
+    )
+
+
+@app.post(
+    "/pacientes/pdf/lote",
+    tags=["📄 Exportación"],
+    summary="Exportar varias historias clínicas en un ZIP (Admin)",
+    response_class=StreamingResponse
+)
+async def exportar_pdf_lote(
+    seleccion: ExportacionZipRequest,
+    current_user: Usuario = Depends(require_admin())
+):
+    """
+    Genera un ZIP con los PDFs de varias historias clínicas.
+
+    **Selección** (una de las dos):
+    - `documentos`: lista explícita de números de documento
+    - Filtro: `tipo_atencion` y/o rango `fecha_desde`–`fecha_hasta` (fecha de atención)
+
+    Los PDFs se generan en paralelo y el ZIP se transmite a medida que
+    cada uno termina. Los documentos que fallan se listan en `errores.txt`.
+
+    **Requiere rol**: Admin
+    """
+    if seleccion.documentos:
+        # Conservar el orden pedido sin duplicados
+        documentos = list(dict.fromkeys(seleccion.documentos))
+    elif seleccion.tipo_atencion or seleccion.fecha_desde or seleccion.fecha_hasta:
+        condiciones = ["activo = TRUE"]
+        params = []
+        if seleccion.tipo_atencion:
+            condiciones.append("tipo_atencion = %s")
+            params.append(seleccion.tipo_atencion)
+        if seleccion.fecha_desde:
+            condiciones.append("fecha_atencion >= %s")
+            params.append(seleccion.fecha_desde)
+        if seleccion.fecha_hasta:
+            condiciones.append("fecha_atencion < %s::date + 1")
+            params.append(seleccion.fecha_hasta)
+        params.append(PDF_ZIP_MAX_DOCUMENTOS + 1)
+
+        try:
+            rows = await fetch_all(f"""
+                SELECT numero_documento FROM public.pacientes
+                WHERE {' AND '.join(condiciones)}
+                ORDER BY numero_documento
+                LIMIT %s
+            """, tuple(params))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al seleccionar pacientes: {str(e)}")
+        documentos = [row['numero_documento'] for row in rows]
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Indique 'documentos' o al menos un filtro (tipo_atencion, fecha_desde, fecha_hasta)"
+        )
+
+    if not documentos:
+        raise HTTPException(status_code=404, detail="Ningún paciente coincide con la selección")
+    if len(documentos) > PDF_ZIP_MAX_DOCUMENTOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La exportación supera el máximo de {PDF_ZIP_MAX_DOCUMENTOS} historias; acote la selección"
+        )
+
+    async def generar(numero_documento: str) -> bytes:
+        pdf_content, _ = await generar_pdf_historia(numero_documento)
+        return pdf_content
+
+    nombre_archivo = f"HC_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_zip_pdfs(documentos, generar),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre_archivo}"',
+            "X-Total-Documentos": str(len(documentos))
+        }
+    )
 
 
 # ==================== ESTADÍSTICAS (Admin) ====================
@@ -935,7 +1483,7 @@ def exportar_pdf(
     tags=["📊 Estadísticas"],
     summary="Estadísticas del sistema (Admin)"
 )
-def obtener_estadisticas(
+async def obtener_estadisticas(
     current_user: Usuario = Depends(require_admin())
 ):
     """
@@ -943,39 +1491,29 @@ def obtener_estadisticas(
 
     **Requiere rol**: Admin
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Total de pacientes
-        cur.execute("SELECT COUNT(*) as total FROM public.pacientes WHERE activo = TRUE")
-        total_pacientes = cur.fetchone()['total']
-
-        # Total de usuarios
-        cur.execute("SELECT COUNT(*) as total FROM public.usuarios WHERE activo = TRUE")
-        total_usuarios = cur.fetchone()['total']
-
-        # Distribución por tipo de atención
-        cur.execute("""
-            SELECT tipo_atencion, COUNT(*) as cantidad
-            FROM public.pacientes
-            WHERE activo = TRUE AND tipo_atencion IS NOT NULL
-            GROUP BY tipo_atencion
-            ORDER BY cantidad DESC
-        """)
-        tipos_atencion = cur.fetchall()
-
-        # Distribución Citus
-        cur.execute("SELECT * FROM citus_tables WHERE table_name::text = 'pacientes'")
-        distribucion = cur.fetchone()
-
-        cur.close()
+        # Las cuatro consultas son independientes: se lanzan en paralelo
+        pacientes, usuarios, tipos_atencion, distribucion = await asyncio.gather(
+            # Total de pacientes
+            fetch_one("SELECT COUNT(*) as total FROM public.pacientes WHERE activo = TRUE"),
+            # Total de usuarios
+            fetch_one("SELECT COUNT(*) as total FROM public.usuarios WHERE activo = TRUE"),
+            # Distribución por tipo de atención
+            fetch_all("""
+                SELECT tipo_atencion, COUNT(*) as cantidad
+                FROM public.pacientes
+                WHERE activo = TRUE AND tipo_atencion IS NOT NULL
+                GROUP BY tipo_atencion
+                ORDER BY cantidad DESC
+            """),
+            # Distribución Citus
+            fetch_one("SELECT * FROM citus_tables WHERE table_name::text = 'pacientes'")
+        )
 
         return {
-            "total_pacientes": total_pacientes,
-            "total_usuarios": total_usuarios,
-            "tipos_atencion": [dict(row) for row in tipos_atencion],
+            "total_pacientes": pacientes['total'],
+            "total_usuarios": usuarios['total'],
+            "tipos_atencion": tipos_atencion,
             "distribucion_citus": {
                 "shards": distribucion['shard_count'] if distribucion else 0,
                 "columna_distribucion": distribucion['distribution_column'] if distribucion else None
@@ -984,6 +1522,3 @@ def obtener_estadisticas(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
@@ -5,7 +5,7 @@ Incluye: Usuario, Paciente (57 campos), Token
 """
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from enum import Enum
 
@@ -84,6 +84,19 @@ class EstadoEgresoEnum(str, Enum):
     REMITIDO = "Remitido"
 
 
+class ModoBusquedaEnum(str, Enum):
+    """Estrategias de búsqueda de pacientes"""
+    INDEXADO = "indexado"  # Trigramas sin tildes, ordenado por similitud
+    LEGADO = "legado"      # ILIKE sin índice (comportamiento anterior)
+    FONETICO = "fonetico"  # Código fonético: Rodríguez = Rodrigues, Vélez = Belez
+
+
+class FormatoImportacionEnum(str, Enum):
+    """Formatos de archivo para importación masiva"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 # ==================== MODELO USUARIO ====================
 
 class Usuario(BaseModel):
@@ -276,39 +289,10 @@ class PacienteUpdate(BaseModel):
 class PacienteResponse(PacienteBase):
     """Schema de respuesta completo con todos los campos"""
     id: int
-    # Campos calculados (se calculan en la API, no en BD)
+    # Campos calculados en la consulta (app/derivados.py)
     edad: Optional[int] = None
     imc: Optional[float] = None
 
-    @classmethod
-    def from_db(cls, db_row: dict):
-        """Crea instancia calculando edad e IMC"""
-        from datetime import date
-
-        # Calcular edad
-        edad = None
-        if db_row.get('fecha_nacimiento'):
-            today = date.today()
-            born = db_row['fecha_nacimiento']
-            if isinstance(born, str):
-                from datetime import datetime
-                born = datetime.strptime(born, '%Y-%m-%d').date()
-            edad = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
-
-        # Calcular IMC
-        imc = None
-        peso = db_row.get('peso')
-        talla = db_row.get('talla')
-        if peso and talla and talla > 0:
-            imc = round(peso / ((talla/100) ** 2), 2)
-
-        # Agregar campos calculados
-        data = dict(db_row)
-        data['edad'] = edad
-        data['imc'] = imc
-
-        return cls(**data)
-
     # Todos los campos opcionales del modelo completo
     segundo_apellido: Optional[str] = None
     segundo_nombre: Optional[str] = None
@@ -387,3 +371,58 @@ class PacienteResumen(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PacienteSugerencia(BaseModel):
+    """Resultado de autocompletado"""
+    id: int
+    numero_documento: str
+    nombre_completo: str
+
+
+class ExportacionPdfResponse(BaseModel):
+    """Estado de una exportación PDF asíncrona"""
+    job_id: str
+    numero_documento: str
+    estado: str = Field(..., description="pendiente | procesando | completado | error")
+    creado: datetime
+    finalizado: Optional[datetime] = None
+    error: Optional[str] = None
+    tamano_bytes: Optional[int] = None
+
+
+class ExportacionZipRequest(BaseModel):
+    """Selección de historias para exportación masiva: lista explícita o filtro"""
+    documentos: Optional[List[str]] = Field(None, description="Números de documento a exportar")
+    tipo_atencion: Optional[TipoAtencionEnum] = None
+    fecha_desde: Optional[date] = Field(None, description="Fecha de atención desde (inclusive)")
+    fecha_hasta: Optional[date] = Field(None, description="Fecha de atención hasta (inclusive)")
+
+
+class PacientesLoteRequest(BaseModel):
+    """Documentos a consultar en un solo llamado"""
+    documentos: List[str] = Field(..., min_length=1, description="Números de documento")
+
+
+class PacientesLoteResponse(BaseModel):
+    """Resultado de la consulta por lote, indexado por documento"""
+    pacientes: Dict[str, PacienteResponse]
+    no_encontrados: List[str] = []
+    sin_permiso: List[str] = []
+
+
+class ErrorImportacion(BaseModel):
+    """Fila rechazada en una importación"""
+    fila: int
+    numero_documento: Optional[str] = None
+    errores: List[str]
+
+
+class ResumenImportacionResponse(BaseModel):
+    """Resultado de una importación masiva"""
+    filas: int
+    insertados: int
+    duplicados: int
+    invalidos: int
+    errores: List[ErrorImportacion]
+    errores_omitidos: int = Field(0, description="Errores no detallados por superar el máximo")
@@ -0,0 +1,75 @@
+# backend/project/app/normalizacion.py
+"""
+Normalización de texto para búsquedas
+- normalizar_texto: equivale en Python a lower(f_unaccent(...)) de la
+  base de datos (minúsculas, sin tildes ni diéresis, espacios colapsados)
+- codigo_fonetico: clave fonética para nombres en español; variantes que
+  suenan igual (Rodríguez/Rodrigues, Yepes/Llepes, Vélez/Belez) comparten
+  código. Se guarda en primer_nombre_fonetico / primer_apellido_fonetico
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """'  José  MARÍA Núñez ' -> 'jose maria nunez'"""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.lower().split())
+
+
+def tokenizar(*partes: Optional[str]) -> List[str]:
+    """Palabras normalizadas de varias partes de un nombre, sin repetir"""
+    return list(dict.fromkeys(normalizar_texto(" ".join(p for p in partes if p)).split()))
+
+
+# Reglas en orden: primero grupos de letras, luego letras sueltas.
+# El resultado solo usa vocales y consonantes "canónicas".
+_REGLAS_FONETICAS = [
+    (re.compile(r"[^a-z]"), ""),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"ch"), "X"),          # che
+    (re.compile(r"ll"), "y"),          # yeísmo: ll = y
+    (re.compile(r"qu(?=[ei])"), "k"),
+    (re.compile(r"g(?=[ei])"), "j"),   # gente = jente
+    (re.compile(r"gu(?=[ei])"), "g"),  # guerra, guillermo (tras g+e/i)
+    (re.compile(r"c(?=[ei])"), "s"),   # seseo: ce/ci = se/si
+    (re.compile(r"[cqk]"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"[vw]"), "b"),
+    (re.compile(r"h"), ""),            # h muda
+    (re.compile(r"y(?![aeiou])"), "i"),  # Rey = Rei, y final o ante consonante
+    (re.compile(r"(.)\1+"), r"\1"),    # rr, ss, nn...
+]
+
+
+def _codigo_palabra(palabra: str) -> str:
+    for patron, reemplazo in _REGLAS_FONETICAS:
+        palabra = patron.sub(reemplazo, palabra)
+    return palabra.upper()
+
+
+def codigo_fonetico(texto: Optional[str]) -> Optional[str]:
+    """
+    Código fonético de un nombre o apellido (una o varias palabras).
+
+    'Rodríguez' -> 'RODRIGES', 'Rodrigues' -> 'RODRIGES',
+    'Gómez' -> 'GOMES', 'Llanos' -> 'YANOS', 'Yanos' -> 'YANOS'
+    """
+    palabras = [_codigo_palabra(p) for p in normalizar_texto(texto).split()]
+    codigo = " ".join(p for p in palabras if p)
+    return codigo or None
+
+
+def claves_foneticas(datos: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Columnas *_fonetico a guardar para los nombres presentes en `datos`"""
+    return {
+        f"{campo}_fonetico": codigo_fonetico(datos[campo])
+        for campo in ("primer_nombre", "primer_apellido")
+        if campo in datos
+    }
@@ -0,0 +1,246 @@
+# backend/project/app/paciente_cache.py
+"""
+Caché de lectura (read-through) de historias clínicas completas
+para GET /pacientes/{numero_documento}
+
+Dos niveles:
+- Memoria: LRU con TTL por proceso (app.cache.TTLCache)
+- Compartido (opcional, PACIENTE_CACHE_REDIS_URL): Redis o un servidor
+  compatible (Valkey, KeyDB, Dragonfly), común a todos los workers
+
+Se guarda el registro ya serializado (app/serializacion.py), con clave
+numero_documento. crear/actualizar/eliminar lo invalidan en ambos niveles.
+Con varios workers, el nivel en memoria de los otros procesos puede
+quedar desactualizado hasta PACIENTE_CACHE_TTL_LOCAL segundos (por eso
+es corto cuando hay nivel compartido); los PUT con If-Match siguen
+protegidos porque comparan contra la base de datos.
+
+Protección contra estampidas: si llegan muchas peticiones por el mismo
+paciente sin caché, solo la primera consulta la base de datos y las
+demás esperan ese mismo resultado (por proceso).
+"""
+
+import asyncio
+import os
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, get_args
+
+import orjson
+from dotenv import load_dotenv
+
+from app.cache import TTLCache
+from app.models import PacienteResponse
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis no instalado: solo nivel en memoria
+    redis_asyncio = None
+
+load_dotenv(override=False)
+
+PACIENTE_CACHE_ENABLED = os.getenv("PACIENTE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PACIENTE_CACHE_MAX_ENTRIES = int(os.getenv("PACIENTE_CACHE_MAX_ENTRIES", 2000))
+PACIENTE_CACHE_TTL = float(os.getenv("PACIENTE_CACHE_TTL", 60))
+# TTL del nivel en memoria cuando hay nivel compartido
+PACIENTE_CACHE_TTL_LOCAL = float(os.getenv("PACIENTE_CACHE_TTL_LOCAL", 5))
+PACIENTE_CACHE_REDIS_URL = os.getenv("PACIENTE_CACHE_REDIS_URL", "")  # Vacío = sin nivel compartido
+PACIENTE_CACHE_REDIS_PREFIX = os.getenv("PACIENTE_CACHE_REDIS_PREFIX", "hc:paciente:")
+
+
+def _tipo_fecha(anotacion):
+    for tipo in (datetime, date):
+        if anotacion is tipo or tipo in get_args(anotacion):
+            return tipo
+    return None
+
+
+# Campos de fecha a reconstruir al leer del nivel compartido (JSON)
+_CAMPOS_FECHA = {
+    nombre: tipo
+    for nombre, campo in PacienteResponse.model_fields.items()
+    if (tipo := _tipo_fecha(campo.annotation)) is not None
+}
+
+
+def _codificar(registro: Dict[str, Any]) -> bytes:
+    return orjson.dumps({"dia": date.today().isoformat(), "registro": registro})
+
+
+def _decodificar(valor: bytes) -> Optional[Dict[str, Any]]:
+    """Registro del nivel compartido, o None si es de otro día (la edad cambió)"""
+    entrada = orjson.loads(valor)
+    if entrada.get("dia") != date.today().isoformat():
+        return None
+    registro = entrada["registro"]
+    for nombre, tipo in _CAMPOS_FECHA.items():
+        if registro.get(nombre):
+            registro[nombre] = tipo.fromisoformat(registro[nombre])
+    return registro
+
+
+class _Carga:
+    """Lectura en curso de un paciente, compartida por las peticiones concurrentes"""
+
+    def __init__(self):
+        self.tarea: Optional[asyncio.Future] = None
+        self.vigente = True  # False si hubo una escritura mientras tanto
+
+
+class PacienteCache:
+    """
+    Caché read-through de registros de pacientes.
+
+    Uso:
+        registro = await paciente_cache.obtener(doc, cargar)  # cargar() -> dict o None
+        await paciente_cache.invalidate(doc)                  # tras INSERT/UPDATE/borrado
+    """
+
+    def __init__(self, enabled: bool = PACIENTE_CACHE_ENABLED, redis_url: str = PACIENTE_CACHE_REDIS_URL):
+        self.enabled = enabled
+        self._redis = None
+        if enabled and redis_url:
+            if redis_asyncio is None:
+                print("PACIENTE_CACHE_REDIS_URL definido pero el paquete 'redis' no está instalado: "
+                      "caché de pacientes solo en memoria")
+            else:
+                self._redis = redis_asyncio.from_url(redis_url)
+        self._memory = TTLCache(
+            maxsize=PACIENTE_CACHE_MAX_ENTRIES,
+            ttl=min(PACIENTE_CACHE_TTL, PACIENTE_CACHE_TTL_LOCAL) if self._redis else PACIENTE_CACHE_TTL,
+            nombre="pacientes"
+        )
+        self._en_vuelo: Dict[str, _Carga] = {}
+        self._lecturas_bd = 0
+        self._coalescidas = 0
+        self._aciertos_compartidos = 0
+        self._errores_compartidos = 0
+
+    # ---------- Lectura ----------
+
+    async def get(self, numero_documento: str) -> Optional[Dict[str, Any]]:
+        """Registro cacheado (memoria y luego nivel compartido), o None"""
+        if not self.enabled:
+            return None
+        entrada = self._memory.get(numero_documento)
+        if entrada is not None:
+            dia, registro = entrada
+            if dia == date.today():
+                return registro
+            self._memory.invalidate(numero_documento)
+        if self._redis is None:
+            return None
+
+        try:
+            valor = await self._redis.get(PACIENTE_CACHE_REDIS_PREFIX + numero_documento)
+            registro = _decodificar(valor) if valor is not None else None
+        except Exception as e:
+            self._errores_compartidos += 1
+            print(f"Error leyendo caché compartida de pacientes: {e}")
+            return None
+        if registro is not None:
+            self._aciertos_compartidos += 1
+            self._memory.set(numero_documento, (date.today(), registro))
+        return registro
+
+    async def obtener(self, numero_documento: str,
+                      cargar: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+                      revisar_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Registro desde la caché o, si no está, desde `cargar()` (una sola
+        lectura por paciente aunque haya muchas peticiones simultáneas).
+        None si el paciente no existe (no se cachea).
+
+        revisar_cache=False si el llamador ya hizo `get` y falló.
+        """
+        if not self.enabled:
+            self._lecturas_bd += 1
+            return await cargar()
+
+        if revisar_cache:
+            registro = await self.get(numero_documento)
+            if registro is not None:
+                return registro
+
+        carga = self._en_vuelo.get(numero_documento)
+        if carga is None:
+            carga = _Carga()
+            carga.tarea = asyncio.ensure_future(self._cargar(numero_documento, cargar, carga))
+            self._en_vuelo[numero_documento] = carga
+            carga.tarea.add_done_callback(lambda _: self._terminar(numero_documento, carga))
+        else:
+            self._coalescidas += 1
+        # shield: si una petición se cancela, la lectura sigue para las demás
+        return await asyncio.shield(carga.tarea)
+
+    async def _cargar(self, numero_documento: str, cargar, carga: _Carga) -> Optional[Dict[str, Any]]:
+        self._lecturas_bd += 1
+        registro = await cargar()
+        if registro is not None and carga.vigente:
+            await self._guardar(numero_documento, registro)
+            if not carga.vigente:
+                # Hubo una escritura mientras se guardaba en el nivel compartido
+                await self._descartar(numero_documento)
+        return registro
+
+    def _terminar(self, numero_documento: str, carga: _Carga):
+        if self._en_vuelo.get(numero_documento) is carga:
+            del self._en_vuelo[numero_documento]
+
+    async def _guardar(self, numero_documento: str, registro: Dict[str, Any]):
+        self._memory.set(numero_documento, (date.today(), registro))
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                PACIENTE_CACHE_REDIS_PREFIX + numero_documento,
+                _codificar(registro),
+                ex=max(1, int(PACIENTE_CACHE_TTL))
+            )
+        except Exception as e:
+            self._errores_compartidos += 1
+            print(f"Error guardando en caché compartida de pacientes: {e}")
+
+    # ---------- Invalidación ----------
+
+    async def invalidate(self, numero_documento: str):
+        """Descarta el registro en ambos niveles (crear, actualizar, eliminar)"""
+        if not self.enabled:
+            return
+        # Una lectura iniciada antes de la escritura no debe guardar su resultado
+        carga = self._en_vuelo.pop(numero_documento, None)
+        if carga is not None:
+            carga.vigente = False
+        await self._descartar(numero_documento)
+
+    async def _descartar(self, numero_documento: str):
+        self._memory.invalidate(numero_documento)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.delete(PACIENTE_CACHE_REDIS_PREFIX + numero_documento)
+        except Exception as e:
+            self._errores_compartidos += 1
+            print(f"Error invalidando caché compartida de pacientes: {e}")
+
+    async def close(self):
+        if self._redis is not None:
+            cerrar = getattr(self._redis, "aclose", None) or self._redis.close
+            await cerrar()
+            self._redis = None
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        stats.update({
+            "habilitado": self.enabled,
+            "lecturas_bd": self._lecturas_bd,
+            "peticiones_coalescidas": self._coalescidas,
+            "lecturas_en_curso": len(self._en_vuelo),
+            "compartida": {
+                "aciertos": self._aciertos_compartidos,
+                "errores": self._errores_compartidos,
+            } if self._redis is not None else None,
+        })
+        return stats
+
+
+paciente_cache = PacienteCache()
@@ -0,0 +1,53 @@
+# backend/project/app/paginacion.py
+"""
+Paginación por cursor (keyset) para listados ordenados por
+(fecha_registro DESC, id DESC)
+
+En lugar de OFFSET, cada página pide las filas estrictamente anteriores
+a la última entregada: cada shard de Citus resuelve la página con el
+índice y envía solo `limit` filas al coordinador, sin importar qué tan
+profunda sea la página.
+
+El cursor es opaco para el cliente (base64 de la última clave vista).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no tiene el formato esperado"""
+
+
+def codificar_cursor(row: Dict[str, Any]) -> str:
+    """Cursor que apunta justo después de `row` (necesita fecha_registro e id)"""
+    clave = [row["fecha_registro"].isoformat(), row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(clave).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Clave (fecha_registro, id) contenida en el cursor.
+
+    Raises:
+        CursorInvalido: Si el cursor está corrupto o fue alterado
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        fecha, row_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(fecha), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido("Cursor de paginación inválido") from e
+
+
+def recortar_pagina(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Separa la página de la fila de más (la consulta pide `limit + 1`)
+    y retorna (filas, cursor siguiente o None si es la última página).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, codificar_cursor(rows[-1])
@@ -0,0 +1,145 @@
+# backend/project/app/passwords.py
+"""
+Hash y verificación de contraseñas en la capa de API
+bcrypt se ejecuta en un pool de hilos propio y acotado, fuera del
+coordinador Citus y sin competir con el threadpool de los endpoints.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv(override=False)
+
+# Hilos dedicados a bcrypt (bcrypt libera el GIL: cada hilo usa un núcleo)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Verificaciones en cola antes de rechazar con 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+# Costo de los hashes nuevos
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 10))
+
+# bcrypt solo usa los primeros 72 bytes (pgcrypto trunca igual)
+_BCRYPT_MAX_BYTES = 72
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+
+class PasswordPoolSaturated(RuntimeError):
+    """Demasiadas verificaciones de contraseña en cola"""
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:_BCRYPT_MAX_BYTES]
+
+
+def is_bcrypt_hash(password_hash: str) -> bool:
+    """True si el hash es bcrypt ($2a$ de pgcrypto o $2b$ de la librería)"""
+    return bool(password_hash) and password_hash.startswith(_BCRYPT_PREFIXES)
+
+
+def hash_password(password: str) -> str:
+    """Genera un hash bcrypt compatible con crypt() de pgcrypto"""
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("ascii")
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verifica una contraseña contra un hash bcrypt"""
+    try:
+        return bcrypt.checkpw(_encode(password), password_hash.encode("ascii"))
+    except ValueError:
+        # Hash corrupto o con formato no soportado
+        return False
+
+
+# Hash de relleno: se verifica contra él cuando el usuario no existe para
+# que el tiempo de respuesta no revele qué usernames son válidos
+_DUMMY_HASH = "$2b$10$JIzMcaOPk1K7DaEHttrnzeZlLnlJgDV6g6uAdd25pda1/.6kHJeWW"
+
+
+# ==================== POOL ACOTADO ====================
+
+class _PasswordPool:
+    """Executor dedicado con límite de trabajos pendientes"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bcrypt"
+                    )
+        return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordPoolSaturated(
+                    "Demasiados inicios de sesión simultáneos. Intente de nuevo en unos segundos."
+                )
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hilos": self.workers,
+                "pendientes": self._pending,
+                "max_pendientes": self.max_pending,
+                "rechazadas": self._rejected,
+            }
+
+
+_pool = _PasswordPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password ejecutado en el pool de bcrypt"""
+    return await _pool.run(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """
+    verify_password ejecutado en el pool de bcrypt.
+
+    Raises:
+        PasswordPoolSaturated: Si hay demasiadas verificaciones en cola
+    """
+    return await _pool.run(verify_password, password, password_hash)
+
+
+async def burn_dummy_verification(password: str):
+    """Verificación de relleno para usuarios inexistentes"""
+    await _pool.run(verify_password, password, _DUMMY_HASH)
+
+
+def shutdown_password_pool():
+    """Libera los hilos de bcrypt (se llama al apagar la aplicación)"""
+    _pool.shutdown()
+
+
+def get_password_pool_stats() -> dict:
+    """Estado del pool de bcrypt para monitoreo"""
+    return _pool.stats()
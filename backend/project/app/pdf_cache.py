@@ -0,0 +1,148 @@
+# backend/project/app/pdf_cache.py
+"""
+Caché de PDFs de historias clínicas direccionada por contenido
+La clave combina numero_documento con una versión derivada de todo lo que
+determina el PDF: id + ultima_actualizacion del registro, versión del
+template y fecha del día (la edad impresa depende de ella).
+
+Dos niveles:
+- Memoria: LRU acotada por cantidad y por bytes
+- Disco (opcional, PDF_CACHE_DIR): sobrevive reinicios y se comparte
+  entre workers de uvicorn en el mismo nodo
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import TTLCache
+from app.pdf_generator import PDF_TEMPLATE_VERSION
+
+load_dotenv(override=False)
+
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", 500))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PDF_CACHE_TTL = float(os.getenv("PDF_CACHE_TTL", 6 * 3600))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")  # Vacío = sin nivel en disco
+
+
+def _documento_dir(numero_documento: str) -> str:
+    return hashlib.sha256(numero_documento.encode("utf-8")).hexdigest()[:24]
+
+
+class PdfCache:
+    """
+    Caché de dos niveles para PDFs ya generados.
+
+    Uso:
+        version = pdf_cache.version_de(row)  # basta (id, ultima_actualizacion)
+        pdf = await pdf_cache.get(doc, version)
+        if pdf is None:
+            pdf = render(...)
+            await pdf_cache.put(doc, version, pdf)
+    """
+
+    def __init__(self, enabled: bool = PDF_CACHE_ENABLED, disk_dir: str = PDF_CACHE_DIR):
+        self.enabled = enabled
+        self.disk_dir = disk_dir or None
+        self._memory = TTLCache(
+            maxsize=PDF_CACHE_MAX_ENTRIES,
+            ttl=PDF_CACHE_TTL,
+            nombre="pdf",
+            max_weight=PDF_CACHE_MAX_BYTES,
+            weigher=len
+        )
+        self._disk_hits = 0
+
+    @staticmethod
+    def version_de(row: Dict[str, Any]) -> str:
+        """Versión del PDF para una fila de public.pacientes"""
+        ultima = row.get("ultima_actualizacion")
+        material = "|".join([
+            str(row.get("id")),
+            ultima.isoformat() if ultima else "",
+            PDF_TEMPLATE_VERSION,
+            date.today().isoformat(),
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+    async def get(self, numero_documento: str, version: str) -> Optional[bytes]:
+        """PDF cacheado para esa versión, o None"""
+        if not self.enabled:
+            return None
+
+        pdf = self._memory.get((numero_documento, version))
+        if pdf is not None or not self.disk_dir:
+            return pdf
+
+        pdf = await run_in_threadpool(self._read_disk, numero_documento, version)
+        if pdf is not None:
+            self._disk_hits += 1
+            self._memory.set((numero_documento, version), pdf)
+        return pdf
+
+    async def put(self, numero_documento: str, version: str, pdf: bytes):
+        """Guarda un PDF recién generado en ambos niveles"""
+        if not self.enabled:
+            return
+        # Las versiones anteriores del mismo paciente ya no se van a pedir
+        self._memory.invalidate_where(lambda key: key[0] == numero_documento and key[1] != version)
+        self._memory.set((numero_documento, version), pdf)
+        if self.disk_dir:
+            await run_in_threadpool(self._write_disk, numero_documento, version, pdf)
+
+    async def invalidate(self, numero_documento: str):
+        """Descarta todos los PDFs de un paciente (actualización o borrado)"""
+        if not self.enabled:
+            return
+        self._memory.invalidate_where(lambda key: key[0] == numero_documento)
+        if self.disk_dir:
+            # rmtree toca el disco: fuera del event loop
+            await run_in_threadpool(
+                shutil.rmtree, os.path.join(self.disk_dir, _documento_dir(numero_documento)), ignore_errors=True
+            )
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        stats["habilitado"] = self.enabled
+        stats["disco"] = {"directorio": self.disk_dir, "aciertos": self._disk_hits} if self.disk_dir else None
+        return stats
+
+    # ---------- Nivel en disco ----------
+
+    def _path(self, numero_documento: str, version: str) -> str:
+        return os.path.join(self.disk_dir, _documento_dir(numero_documento), f"{version}.pdf")
+
+    def _read_disk(self, numero_documento: str, version: str) -> Optional[bytes]:
+        try:
+            with open(self._path(numero_documento, version), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, numero_documento: str, version: str, pdf: bytes):
+        path = self._path(numero_documento, version)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Escritura atómica: nunca se sirve un PDF a medio escribir
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+            # Conservar solo la versión vigente del paciente
+            for name in os.listdir(directory):
+                if name != os.path.basename(path) and name.endswith(".pdf"):
+                    os.remove(os.path.join(directory, name))
+        except OSError as e:
+            print(f"Error guardando PDF en caché de disco: {e}")
+
+
+pdf_cache = PdfCache()
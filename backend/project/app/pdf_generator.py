@@ -4,11 +4,185 @@ Generador de PDFs para Historias Clínicas
 VERSIÓN CORREGIDA - Sintaxis actualizada para WeasyPrint 60.1
 """
 
+import hashlib
 import io
+import os
+import stat
+import threading
 from datetime import datetime
 from typing import Dict, Any
 from weasyprint import HTML, CSS
-from jinja2 import Template
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, select_autoescape
+
+# Directorio del caché de bytecode de Jinja (compartido entre procesos).
+# Vacío = el de Jinja por usuario (<tmp>/_jinja2-cache-<uid>, 0700, verifica
+# el dueño). Uno propio debe ser del usuario del servicio y no accesible a
+# otros: Jinja carga con marshal lo que encuentre ahí.
+PDF_TEMPLATE_CACHE_DIR = os.getenv("PDF_TEMPLATE_CACHE_DIR", "")
+
+
+# ==================== HOJA DE ESTILOS ====================
+# Separada del HTML para parsearla una sola vez con WeasyPrint
+
+PDF_STYLESHEET = """
+@page {
+    size: Letter;
+    margin: 2cm;
+    @bottom-right {
+        content: "Página " counter(page) " de " counter(pages);
+        font-size: 9pt;
+        color: #666;
+    }
+}
+
+body {
+    font-family: 'Arial', sans-serif;
+    font-size: 10pt;
+    line-height: 1.4;
+    color: #333;
+}
+
+.header {
+    text-align: center;
+    border-bottom: 3px solid #2c3e50;
+    padding-bottom: 10px;
+    margin-bottom: 20px;
+}
+
+.header h1 {
+    color: #2c3e50;
+    font-size: 18pt;
+    margin: 0;
+}
+
+.header .subtitle {
+    color: #7f8c8d;
+    font-size: 10pt;
+    margin-top: 5px;
+}
+
+.section {
+    margin-bottom: 15px;
+    page-break-inside: avoid;
+}
+
+.section-title {
+    background-color: #3498db;
+    color: white;
+    padding: 6px 10px;
+    font-size: 12pt;
+    font-weight: bold;
+    margin-bottom: 8px;
+}
+
+.data-grid {
+    display: table;
+    width: 100%;
+    border-collapse: collapse;
+}
+
+.data-row {
+    display: table-row;
+}
+
+.data-cell {
+    display: table-cell;
+    padding: 4px 8px;
+    border-bottom: 1px solid #ecf0f1;
+}
+
+.data-label {
+    font-weight: bold;
+    color: #2c3e50;
+    width: 35%;
+}
+
+.data-value {
+    color: #555;
+}
+
+.full-width {
+    margin: 10px 0;
+    padding: 8px;
+    background-color: #f8f9fa;
+    border-left: 3px solid #3498db;
+}
+
+.full-width-label {
+    font-weight: bold;
+    color: #2c3e50;
+    display: block;
+    margin-bottom: 5px;
+}
+
+.footer {
+    position: fixed;
+    bottom: 0;
+    left: 0;
+    right: 0;
+    text-align: center;
+    font-size: 8pt;
+    color: #95a5a6;
+    border-top: 1px solid #ecf0f1;
+    padding-top: 5px;
+}
+
+.signature-section {
+    margin-top: 40px;
+    display: table;
+    width: 100%;
+}
+
+.signature-box {
+    display: table-cell;
+    text-align: center;
+    width: 50%;
+    padding: 10px;
+}
+
+.signature-line {
+    border-top: 2px solid #2c3e50;
+    margin-top: 60px;
+    padding-top: 5px;
+}
+
+.alert {
+    background-color: #fff3cd;
+    border: 1px solid #ffc107;
+    padding: 8px;
+    margin: 10px 0;
+    border-radius: 3px;
+}
+
+.vitals-grid {
+    display: table;
+    width: 100%;
+}
+
+.vitals-row {
+    display: table-row;
+}
+
+.vitals-cell {
+    display: table-cell;
+    padding: 5px;
+    text-align: center;
+    border: 1px solid #ddd;
+    background-color: #f8f9fa;
+}
+
+.vitals-label {
+    font-weight: bold;
+    font-size: 8pt;
+    color: #666;
+}
+
+.vitals-value {
+    font-size: 14pt;
+    color: #2c3e50;
+    font-weight: bold;
+}
+"""
 
 
 # ==================== TEMPLATE HTML ====================
@@ -19,165 +193,6 @@ HTML_TEMPLATE = """
 <head>
     <meta charset="UTF-8">
     <title>Historia Clínica - {{ paciente.numero_documento }}</title>
-    <style>
-        @page {
-            size: Letter;
-            margin: 2cm;
-            @bottom-right {
-                content: "Página " counter(page) " de " counter(pages);
-                font-size: 9pt;
-                color: #666;
-            }
-        }
-
-        body {
-            font-family: 'Arial', sans-serif;
-            font-size: 10pt;
-            line-height: 1.4;
-            color: #333;
-        }
-
-        .header {
-            text-align: center;
-            border-bottom: 3px solid #2c3e50;
-            padding-bottom: 10px;
-            margin-bottom: 20px;
-        }
-
-        .header h1 {
-            color: #2c3e50;
-            font-size: 18pt;
-            margin: 0;
-        }
-
-        .header .subtitle {
-            color: #7f8c8d;
-            font-size: 10pt;
-            margin-top: 5px;
-        }
-
-        .section {
-            margin-bottom: 15px;
-            page-break-inside: avoid;
-        }
-
-        .section-title {
-            background-color: #3498db;
-            color: white;
-            padding: 6px 10px;
-            font-size: 12pt;
-            font-weight: bold;
-            margin-bottom: 8px;
-        }
-
-        .data-grid {
-            display: table;
-            width: 100%;
-            border-collapse: collapse;
-        }
-
-        .data-row {
-            display: table-row;
-        }
-
-        .data-cell {
-            display: table-cell;
-            padding: 4px 8px;
-            border-bottom: 1px solid #ecf0f1;
-        }
-
-        .data-label {
-            font-weight: bold;
-            color: #2c3e50;
-            width: 35%;
-        }
-
-        .data-value {
-            color: #555;
-        }
-
-        .full-width {
-            margin: 10px 0;
-            padding: 8px;
-            background-color: #f8f9fa;
-            border-left: 3px solid #3498db;
-        }
-
-        .full-width-label {
-            font-weight: bold;
-            color: #2c3e50;
-            display: block;
-            margin-bottom: 5px;
-        }
-
-        .footer {
-            position: fixed;
-            bottom: 0;
-            left: 0;
-            right: 0;
-            text-align: center;
-            font-size: 8pt;
-            color: #95a5a6;
-            border-top: 1px solid #ecf0f1;
-            padding-top: 5px;
-        }
-
-        .signature-section {
-            margin-top: 40px;
-            display: table;
-            width: 100%;
-        }
-
-        .signature-box {
-            display: table-cell;
-            text-align: center;
-            width: 50%;
-            padding: 10px;
-        }
-
-        .signature-line {
-            border-top: 2px solid #2c3e50;
-            margin-top: 60px;
-            padding-top: 5px;
-        }
-
-        .alert {
-            background-color: #fff3cd;
-            border: 1px solid #ffc107;
-            padding: 8px;
-            margin: 10px 0;
-            border-radius: 3px;
-        }
-
-        .vitals-grid {
-            display: table;
-            width: 100%;
-        }
-
-        .vitals-row {
-            display: table-row;
-        }
-
-        .vitals-cell {
-            display: table-cell;
-            padding: 5px;
-            text-align: center;
-            border: 1px solid #ddd;
-            background-color: #f8f9fa;
-        }
-
-        .vitals-label {
-            font-weight: bold;
-            font-size: 8pt;
-            color: #666;
-        }
-
-        .vitals-value {
-            font-size: 14pt;
-            color: #2c3e50;
-            font-weight: bold;
-        }
-    </style>
 </head>
 <body>
     <!-- HEADER -->
@@ -584,6 +599,66 @@ HTML_TEMPLATE = """
 """
 
 
+# Cambia cuando cambia el diseño del PDF (invalida PDFs cacheados)
+PDF_TEMPLATE_VERSION = hashlib.sha256(
+    (HTML_TEMPLATE + PDF_STYLESHEET).encode("utf-8")
+).hexdigest()[:16]
+
+
+# ==================== RECURSOS PRECOMPILADOS ====================
+# Se construyen una vez por proceso y se reutilizan en cada PDF
+
+_TEMPLATE_NAME = "historia_clinica.html"
+_resources_lock = threading.Lock()
+_template = None
+_stylesheet = None
+
+
+def _directorio_privado(path: str) -> bool:
+    """Crea `path` con 0700; False si existe y es de otro usuario o accesible a otros"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    return stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def _build_environment() -> Environment:
+    try:
+        if not PDF_TEMPLATE_CACHE_DIR:
+            bytecode_cache = FileSystemBytecodeCache()
+        elif _directorio_privado(PDF_TEMPLATE_CACHE_DIR):
+            bytecode_cache = FileSystemBytecodeCache(PDF_TEMPLATE_CACHE_DIR)
+        else:
+            print(f"⚠️ {PDF_TEMPLATE_CACHE_DIR} no es privado del usuario del servicio: "
+                  "template sin caché de bytecode")
+            bytecode_cache = None
+    except (OSError, RuntimeError):
+        # RuntimeError: Jinja no pudo asegurar su directorio por usuario
+        bytecode_cache = None
+
+    return Environment(
+        loader=DictLoader({_TEMPLATE_NAME: HTML_TEMPLATE}),
+        autoescape=select_autoescape(default_for_string=True, default=True),
+        bytecode_cache=bytecode_cache,
+        auto_reload=False
+    )
+
+
+def precargar_recursos_pdf():
+    """
+    Compila el template y parsea la hoja de estilos.
+    Se llama al arrancar para que el primer PDF no pague ese costo.
+    """
+    global _template, _stylesheet
+    if _template is not None:
+        return
+    with _resources_lock:
+        if _template is not None:
+            return
+        # La hoja no tiene @font-face: no necesita FontConfiguration propia
+        _stylesheet = CSS(string=PDF_STYLESHEET)
+        _template = _build_environment().get_template(_TEMPLATE_NAME)
+
+
 # ==================== FUNCIONES ====================
 
 def generar_pdf_paciente(paciente_data: Dict[str, Any]) -> bytes:
@@ -608,16 +683,17 @@ def generar_pdf_paciente(paciente_data: Dict[str, Any]) -> bytes:
             "fecha_generacion": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         }
 
-        # Renderizar template
-        template = Template(HTML_TEMPLATE)
-        html_content = template.render(**context)
+        precargar_recursos_pdf()
+
+        # Renderizar template (ya compilado)
+        html_content = _template.render(**context)
 
         # ✅ SINTAXIS CORRECTA - Cambio clave aquí
         # Antes: HTML(string=html_content)  ❌
         # Ahora: HTML(string=html_content)  ✅ (correcto, el problema estaba en write_pdf())
 
         html_doc = HTML(string=html_content)
-        pdf_bytes = html_doc.write_pdf()
+        pdf_bytes = html_doc.write_pdf(stylesheets=[_stylesheet])
 
         return pdf_bytes
 
@@ -0,0 +1,247 @@
+# backend/project/app/pdf_jobs.py
+"""
+Trabajos asíncronos de exportación PDF
+El cliente encola la exportación (202 + job_id), consulta el estado y
+descarga el PDF cuando está listo, en lugar de mantener abierta la
+petición mientras se renderiza.
+
+- Cola en proceso: los trabajos corren como tareas de asyncio y pasan
+  por el mismo pool de renderizado (y caché) que el endpoint síncrono
+- Concurrencia acotada (PDF_JOBS_CONCURRENCY) para suavizar picos; por
+  defecto deja libre un proceso del pool para las descargas interactivas
+- Si el pool está saturado el trabajo no falla: reintenta con espera
+  exponencial (PDF_JOBS_RETRY_DELAY hasta PDF_JOBS_RETRY_MAX_DELAY) durante
+  como máximo PDF_JOBS_MAX_WAIT segundos
+- Máximo de trabajos sin terminar (PDF_JOBS_MAX_PENDING): más allá se
+  rechaza con PdfJobQueueFull (los endpoints responden 429)
+- Retención acotada: los trabajos terminados se conservan
+  PDF_JOBS_TTL segundos, como máximo PDF_JOBS_MAX_RETAINED trabajos y
+  PDF_JOBS_MAX_BYTES bytes de PDFs; se descartan primero los más antiguos
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+from app.pdf_pool import PDF_POOL_WORKERS, PdfPoolSaturated
+
+load_dotenv(override=False)
+
+PDF_JOBS_CONCURRENCY = int(os.getenv("PDF_JOBS_CONCURRENCY", max(1, PDF_POOL_WORKERS - 1)))
+PDF_JOBS_MAX_PENDING = int(os.getenv("PDF_JOBS_MAX_PENDING", 32))
+PDF_JOBS_MAX_RETAINED = int(os.getenv("PDF_JOBS_MAX_RETAINED", 200))
+PDF_JOBS_MAX_BYTES = int(os.getenv("PDF_JOBS_MAX_BYTES", 128 * 1024 * 1024))
+PDF_JOBS_TTL = float(os.getenv("PDF_JOBS_TTL", 600))
+PDF_JOBS_RETRY_DELAY = float(os.getenv("PDF_JOBS_RETRY_DELAY", 0.5))
+PDF_JOBS_RETRY_MAX_DELAY = float(os.getenv("PDF_JOBS_RETRY_MAX_DELAY", 10))
+PDF_JOBS_MAX_WAIT = float(os.getenv("PDF_JOBS_MAX_WAIT", 300))
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_PROCESANDO = "procesando"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+
+class PdfJobQueueFull(RuntimeError):
+    """Hay demasiadas exportaciones sin terminar"""
+
+
+class PdfJob:
+    """Estado de una exportación encolada"""
+
+    def __init__(self, numero_documento: str, owner: str):
+        self.job_id = uuid.uuid4().hex
+        self.numero_documento = numero_documento
+        self.owner = owner
+        self.estado = ESTADO_PENDIENTE
+        self.creado = datetime.now()
+        self.finalizado: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.pdf: Optional[bytes] = None
+        self._expires_at: Optional[float] = None
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in (ESTADO_COMPLETADO, ESTADO_ERROR)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "numero_documento": self.numero_documento,
+            "estado": self.estado,
+            "creado": self.creado,
+            "finalizado": self.finalizado,
+            "error": self.error,
+            "tamano_bytes": len(self.pdf) if self.pdf is not None else None,
+        }
+
+
+class PdfJobStore:
+    """
+    Registro de trabajos de exportación.
+
+    Uso:
+        job = pdf_jobs.submit(doc, username, lambda: generar_pdf(doc))
+        pdf_jobs.get(job.job_id)  # -> PdfJob o None si expiró
+    """
+
+    def __init__(self, concurrency: int = PDF_JOBS_CONCURRENCY, max_pending: int = PDF_JOBS_MAX_PENDING,
+                 max_retained: int = PDF_JOBS_MAX_RETAINED, max_bytes: int = PDF_JOBS_MAX_BYTES,
+                 ttl: float = PDF_JOBS_TTL):
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max(1, max_pending)
+        self.max_retained = max(1, max_retained)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, PdfJob]" = OrderedDict()
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._slots = None
+        self._bytes = 0
+        self._stats = {
+            "encolados": 0,
+            "completados": 0,
+            "fallidos": 0,
+            "rechazados": 0,
+            "descartados": 0,
+            "reintentos": 0,
+        }
+
+    def submit(self, numero_documento: str, owner: str,
+               factory: Callable[[], Awaitable[bytes]]) -> PdfJob:
+        """
+        Encola una exportación; `factory()` produce el PDF.
+
+        Raises:
+            PdfJobQueueFull: Si hay PDF_JOBS_MAX_PENDING trabajos sin terminar
+        """
+        self.prune()
+        with self._lock:
+            if len(self._tasks) >= self.max_pending:
+                self._stats["rechazados"] += 1
+                raise PdfJobQueueFull("Hay demasiadas exportaciones en curso. Intente de nuevo en unos segundos.")
+            job = PdfJob(numero_documento, owner)
+            self._jobs[job.job_id] = job
+            self._stats["encolados"] += 1
+            self._tasks[job.job_id] = asyncio.get_running_loop().create_task(self._run(job, factory))
+        return job
+
+    def get(self, job_id: str) -> Optional[PdfJob]:
+        """Trabajo vigente o None si no existe o ya expiró"""
+        self.prune()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def prune(self):
+        """Descarta trabajos terminados vencidos o que exceden los límites de retención"""
+        now = time.monotonic()
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.terminado]
+            excess = len(self._jobs) - self.max_retained
+            for job in finished:  # En orden de creación: primero los más antiguos
+                if job._expires_at > now and excess <= 0 and self._bytes <= self.max_bytes:
+                    continue
+                self._discard(job)
+                excess -= 1
+
+    async def shutdown(self):
+        """Cancela los trabajos en curso (se llama al apagar la aplicación)"""
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrencia": self.concurrency,
+                "en_curso": len(self._tasks),
+                "max_en_curso": self.max_pending,
+                "retenidos": len(self._jobs),
+                "max_retenidos": self.max_retained,
+                "bytes_retenidos": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_segundos": self.ttl,
+                **self._stats,
+            }
+
+    # ---------- Internos ----------
+
+    def _discard(self, job: PdfJob):
+        self._jobs.pop(job.job_id, None)
+        if job.pdf is not None:
+            self._bytes -= len(job.pdf)
+        self._stats["descartados"] += 1
+
+    def _finish(self, job: PdfJob, estado: str, pdf: Optional[bytes] = None, error: Optional[str] = None):
+        with self._lock:
+            job.pdf = pdf
+            job.error = error
+            job.finalizado = datetime.now()
+            job._expires_at = time.monotonic() + self.ttl
+            job.estado = estado
+            if pdf is not None:
+                self._bytes += len(pdf)
+            self._stats["completados" if estado == ESTADO_COMPLETADO else "fallidos"] += 1
+            self._tasks.pop(job.job_id, None)
+
+    async def _run(self, job: PdfJob, factory: Callable[[], Awaitable[bytes]]):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._slots:
+                job.estado = ESTADO_PROCESANDO
+                pdf = await self._render_con_reintentos(factory)
+        except asyncio.CancelledError:
+            self._finish(job, ESTADO_ERROR, error="Exportación cancelada")
+            raise
+        except Exception as e:
+            # HTTPException (p. ej. 404) trae el mensaje en `detail`
+            self._finish(job, ESTADO_ERROR, error=str(getattr(e, "detail", None) or e))
+        else:
+            self._finish(job, ESTADO_COMPLETADO, pdf=pdf)
+        self.prune()
+
+    async def _render_con_reintentos(self, factory: Callable[[], Awaitable[bytes]]) -> bytes:
+        """factory() reintentando mientras el pool de renderizado esté saturado"""
+        def contar():
+            with self._lock:
+                self._stats["reintentos"] += 1
+        return await render_con_reintentos(factory, al_reintentar=contar)
+
+
+async def render_con_reintentos(factory: Callable[[], Awaitable[bytes]],
+                                al_reintentar: Optional[Callable[[], None]] = None) -> bytes:
+    """
+    factory() reintentando con espera exponencial mientras el pool de
+    renderizado esté saturado, como máximo PDF_JOBS_MAX_WAIT segundos.
+
+    Raises:
+        PdfPoolSaturated: Si el pool sigue saturado al agotar la espera
+    """
+    limite = time.monotonic() + PDF_JOBS_MAX_WAIT
+    espera = PDF_JOBS_RETRY_DELAY
+    while True:
+        try:
+            return await factory()
+        except PdfPoolSaturated:
+            if time.monotonic() + espera > limite:
+                raise
+        if al_reintentar is not None:
+            al_reintentar()
+        # Jitter: los trabajos en espera no reintentan todos a la vez
+        await asyncio.sleep(espera * random.uniform(0.5, 1))
+        espera = min(espera * 2, PDF_JOBS_RETRY_MAX_DELAY)
+
+
+pdf_jobs = PdfJobStore()
@@ -0,0 +1,288 @@
+# backend/project/app/pdf_pool.py
+"""
+Pool de procesos para renderizar PDFs
+WeasyPrint es CPU puro y retiene el GIL: cada PDF se genera en un proceso
+aparte para no bloquear la API.
+
+- Tamaño configurable (PDF_POOL_WORKERS; 0 = renderizar en el threadpool)
+- Cola acotada: con más de PDF_POOL_MAX_QUEUE trabajos esperando se
+  rechaza con PdfPoolSaturated (los endpoints responden 429)
+- Timeout por trabajo: el proceso que se pasa de PDF_RENDER_TIMEOUT se
+  mata y se reemplaza
+- Reciclaje: cada proceso se reemplaza tras PDF_WORKER_MAX_RENDERS PDFs
+  para contener el crecimiento de memoria de WeasyPrint
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app.pdf_generator import generar_pdf_paciente, precargar_recursos_pdf
+
+load_dotenv(override=False)
+
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", 2))
+PDF_POOL_MAX_QUEUE = int(os.getenv("PDF_POOL_MAX_QUEUE", 16))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", 30))
+PDF_WORKER_MAX_RENDERS = int(os.getenv("PDF_WORKER_MAX_RENDERS", 100))
+
+# "spawn": no hereda hilos ni sockets del proceso de uvicorn
+_mp = multiprocessing.get_context("spawn")
+
+
+class PdfPoolSaturated(RuntimeError):
+    """La cola de renderizado está llena"""
+
+
+class PdfRenderTimeout(RuntimeError):
+    """El PDF no se generó dentro del tiempo permitido"""
+
+
+def _worker_main(conn):
+    """Bucle del proceso hijo: recibe datos del paciente y devuelve el PDF"""
+    precargar_recursos_pdf()
+    while True:
+        try:
+            payload = conn.recv()
+        except EOFError:
+            return
+        if payload is None:
+            return
+        try:
+            conn.send(("ok", generar_pdf_paciente(payload)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    """Proceso de renderizado con su canal de comunicación"""
+
+    def __init__(self):
+        self.conn, child_conn = _mp.Pipe()
+        self.process = _mp.Process(target=_worker_main, args=(child_conn,), daemon=True, name="pdf-worker")
+        self.process.start()
+        child_conn.close()
+        self.renders = 0
+        self.abandonado = False
+        self.pendiente: Optional[Future] = None  # Render que siguió tras abandonarlo
+
+    def alive(self) -> bool:
+        return not self.abandonado and self.process.is_alive()
+
+    def render(self, payload: Dict[str, Any], timeout: float) -> bytes:
+        """Bloqueante: se ejecuta en un hilo del supervisor"""
+        self.conn.send(payload)
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise PdfRenderTimeout(f"El PDF superó el tiempo máximo de {timeout:.0f}s")
+        try:
+            status, data = self.conn.recv()
+        except EOFError:
+            self.kill()
+            raise RuntimeError("El proceso de renderizado terminó inesperadamente")
+        self.renders += 1
+        if status != "ok":
+            raise RuntimeError(data)
+        return data
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=2)
+
+    def abandonar(self, pendiente: Future):
+        """
+        Descarta el proceso mientras un hilo del supervisor sigue usando su
+        Pipe: no vuelve a usarse (se reemplaza al tomarlo del pool) y al
+        matarlo ese hilo termina con EOFError.
+        """
+        self.abandonado = True
+        self.pendiente = pendiente
+        self.process.kill()
+
+    def liberar(self, timeout: float = 5):
+        """
+        Recoge un proceso muerto o abandonado y cierra su Pipe. Espera antes
+        al hilo que aún lo use: cerrar el descriptor bajo ese hilo permitiría
+        que un Pipe nuevo reciba el mismo número.
+        """
+        if self.pendiente is not None and not wait([self.pendiente], timeout).done:
+            print("Render abandonado sin terminar: el Pipe del proceso queda abierto")
+            return
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=2)
+        self.conn.close()
+
+
+class PdfRenderPool:
+    """
+    Conjunto de procesos de renderizado con admisión acotada.
+
+    Uso:
+        pdf_bytes = await pdf_render_pool.render(paciente_dict)
+    """
+
+    def __init__(self, workers: int = PDF_POOL_WORKERS, max_queue: int = PDF_POOL_MAX_QUEUE,
+                 timeout: float = PDF_RENDER_TIMEOUT, max_renders: int = PDF_WORKER_MAX_RENDERS):
+        self.workers = max(0, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.max_renders = max(1, max_renders)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._slots = None
+        self._executor = None
+        self._started = False
+        self._in_flight = 0
+        self._stats = {
+            "renderizados": 0,
+            "errores": 0,
+            "rechazados": 0,
+            "timeouts": 0,
+            "reciclados": 0,
+        }
+
+    def start(self):
+        """Lanza los procesos (se llama al arrancar la aplicación)"""
+        with self._lock:
+            if self._started or self.workers == 0:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-supervisor")
+            self._idle = [_Worker() for _ in range(self.workers)]
+            self._started = True
+
+    def shutdown(self):
+        """Detiene los procesos (se llama al apagar la aplicación)"""
+        with self._lock:
+            workers, self._idle = self._idle, []
+            executor, self._executor = self._executor, None
+            self._started = False
+        for worker in workers:
+            if worker.alive():
+                worker.stop()
+            else:
+                worker.liberar()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    async def render(self, paciente_data: Dict[str, Any]) -> bytes:
+        """
+        Genera el PDF en un proceso del pool.
+
+        Raises:
+            PdfPoolSaturated: Si la cola de espera está llena
+            PdfRenderTimeout: Si el PDF supera PDF_RENDER_TIMEOUT
+        """
+        self._admit()
+        try:
+            if self.workers == 0:
+                pdf = await run_in_threadpool(generar_pdf_paciente, paciente_data)
+            else:
+                pdf = await self._render_in_worker(paciente_data)
+            self._count("renderizados")
+            return pdf
+        except PdfRenderTimeout:
+            self._count("timeouts")
+            raise
+        except Exception:
+            self._count("errores")
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            en_proceso = min(self._in_flight, self.workers) if self.workers else self._in_flight
+            return {
+                "procesos": self.workers,
+                "en_proceso": en_proceso,
+                "en_cola": self._in_flight - en_proceso,
+                "max_cola": self.max_queue,
+                **self._stats,
+            }
+
+    # ---------- Internos ----------
+
+    def _admit(self):
+        with self._lock:
+            capacity = max(self.workers, 1) + self.max_queue
+            if self._in_flight >= capacity:
+                self._stats["rechazados"] += 1
+                raise PdfPoolSaturated("Hay demasiados PDFs en cola. Intente de nuevo en unos segundos.")
+            self._in_flight += 1
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    async def _render_in_worker(self, paciente_data: Dict[str, Any]) -> bytes:
+        if not self._started:
+            self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            with self._lock:
+                worker = self._idle.pop()
+            render = None
+            try:
+                if not worker.alive():
+                    worker = await loop.run_in_executor(self._executor, self._replace, worker)
+                tarea = self._executor.submit(worker.render, paciente_data, self.timeout)
+                render = asyncio.wrap_future(tarea)
+                # shield: al cancelar, `render` sigue reflejando si el hilo terminó
+                return await asyncio.shield(render)
+            except asyncio.CancelledError:
+                if render is not None and not render.done():
+                    # Cliente desconectado o apagado con el PDF a medias: el hilo sigue
+                    # en el Pipe del proceso y otra petición recibiría este PDF
+                    worker.abandonar(tarea)
+                    render.add_done_callback(_descartar_resultado)
+                raise
+            finally:
+                if worker.abandonado:
+                    pass  # Se reemplaza al tomarlo del pool (sin await: la tarea está cancelada)
+                elif not worker.alive() or worker.renders >= self.max_renders:
+                    try:
+                        worker = await loop.run_in_executor(self._executor, self._replace, worker)
+                    except Exception as e:
+                        # Se conserva el proceso muerto; se reintenta en el próximo uso
+                        print(f"Error reemplazando proceso de PDF: {e}")
+                with self._lock:
+                    self._idle.append(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        # Vivo: se detiene; muerto (timeout, abandonado): se recoge el proceso y se cierra el Pipe
+        if worker.alive():
+            worker.stop()
+        else:
+            worker.liberar()
+        self._count("reciclados")
+        return _Worker()
+
+
+def _descartar_resultado(render: asyncio.Future):
+    """Consume el resultado de un render abandonado (evita 'exception was never retrieved')"""
+    if not render.cancelled():
+        render.exception()
+
+
+pdf_render_pool = PdfRenderPool()
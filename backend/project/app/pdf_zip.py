@@ -0,0 +1,133 @@
+# backend/project/app/pdf_zip.py
+"""
+Exportación masiva de historias clínicas en un ZIP transmitido por partes
+Los PDFs se generan en paralelo (ventana acotada sobre el pool de
+renderizado) y cada uno se agrega al ZIP y se envía al cliente apenas
+termina. En memoria solo viven los PDFs de la ventana en curso, nunca
+el archivo completo.
+
+Si el pool de renderizado está saturado, cada historia reintenta con la
+misma espera exponencial que las exportaciones encoladas (pdf_jobs) en
+lugar de terminar en `errores.txt`.
+"""
+
+import asyncio
+import os
+import re
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List
+
+from dotenv import load_dotenv
+
+from app.pdf_jobs import render_con_reintentos
+from app.pdf_pool import PDF_POOL_WORKERS
+
+load_dotenv(override=False)
+
+# PDFs generándose a la vez por exportación
+PDF_ZIP_CONCURRENCY = int(os.getenv("PDF_ZIP_CONCURRENCY", max(PDF_POOL_WORKERS, 1)))
+# Máximo de historias por archivo
+PDF_ZIP_MAX_DOCUMENTOS = int(os.getenv("PDF_ZIP_MAX_DOCUMENTOS", 500))
+
+# Caracteres admitidos en los nombres de archivo dentro del ZIP
+_NOMBRE_NO_SEGURO = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class _ChunkSink:
+    """
+    Destino de escritura del ZipFile: acumula los bytes producidos hasta
+    que el generador los entrega. Sin tell()/seek(), zipfile escribe en
+    modo streaming (descriptores de datos tras cada archivo).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def stream_zip_pdfs(
+    documentos: List[str],
+    generar: Callable[[str], Awaitable[bytes]],
+    concurrency: int = PDF_ZIP_CONCURRENCY
+) -> AsyncIterator[bytes]:
+    """
+    Genera el ZIP por partes; las historias van en orden de finalización.
+
+    Los documentos que fallan no interrumpen la exportación: se listan
+    en `errores.txt` al final del archivo.
+
+    Args:
+        documentos: Números de documento a exportar
+        generar: Corrutina que produce el PDF de un documento
+        concurrency: PDFs generándose a la vez
+    """
+    sink = _ChunkSink()
+    # Los PDFs ya vienen comprimidos: ZIP_STORED evita gastar CPU en el event loop
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    errores = []
+    usados = set()
+    pendientes = iter(documentos)
+    en_curso = {}
+
+    def lanzar():
+        for documento in pendientes:
+            task = asyncio.ensure_future(render_con_reintentos(lambda d=documento: generar(d)))
+            en_curso[task] = documento
+            if len(en_curso) >= max(1, concurrency):
+                return
+
+    try:
+        lanzar()
+        while en_curso:
+            listos, _ = await asyncio.wait(en_curso, return_when=asyncio.FIRST_COMPLETED)
+            for task in listos:
+                documento = en_curso.pop(task)
+                try:
+                    pdf = task.result()
+                except Exception as e:
+                    errores.append(f"{documento}: {getattr(e, 'detail', None) or e}")
+                    continue
+                archive.writestr(_entrada(nombre_entrada(documento, usados)), pdf)
+                yield sink.drain()
+            lanzar()
+
+        if errores:
+            archive.writestr(_entrada("errores.txt"), "\n".join(errores) + "\n")
+        archive.close()
+        yield sink.drain()
+    finally:
+        # Cliente desconectado: no seguir renderizando para nadie
+        for task in en_curso:
+            task.cancel()
+
+
+def nombre_entrada(documento: str, usados: set) -> str:
+    """
+    Nombre del PDF de un documento dentro del ZIP: solo letras ASCII,
+    dígitos, '-' y '_' (sin rutas ni caracteres de control). Si dos
+    documentos quedan con el mismo nombre se agrega un sufijo.
+    """
+    base = "HC_" + (_NOMBRE_NO_SEGURO.sub("_", documento) or "_")
+    nombre, n = f"{base}.pdf", 1
+    while nombre in usados:
+        n += 1
+        nombre = f"{base}_{n}.pdf"
+    usados.add(nombre)
+    return nombre
+
+
+def _entrada(nombre: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(nombre, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    return info
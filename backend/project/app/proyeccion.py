@@ -0,0 +1,115 @@
+# backend/project/app/proyeccion.py
+"""
+Proyección de columnas para las lecturas de pacientes
+
+En lugar de SELECT * (≈60 columnas, muchas de texto largo) se piden solo
+las columnas necesarias. GET /pacientes/{numero_documento}?fields=...
+acepta campos sueltos o grupos con las secciones del modelo:
+
+    ?fields=identificacion
+    ?fields=signos_vitales,diagnostico
+    ?fields=primer_nombre,primer_apellido,edad
+
+Solo se aceptan nombres de la lista blanca: el SQL nunca incluye texto
+del cliente.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from app.derivados import CAMPOS_DERIVADOS
+from app.models import PacienteResponse
+from app.normalizacion import normalizar_texto
+
+# Todas las columnas de public.pacientes que expone la API, en el orden del modelo
+COLUMNAS_PACIENTE = [c for c in PacienteResponse.model_fields if c not in CAMPOS_DERIVADOS]
+
+# Se incluyen siempre: identifican el registro
+COLUMNAS_CLAVE = ["id", "numero_documento"]
+
+# Grupos con las secciones de PacienteCreate
+GRUPOS_CAMPOS: Dict[str, List[str]] = {
+    "identificacion": [
+        "tipo_documento", "numero_documento", "primer_apellido", "segundo_apellido",
+        "primer_nombre", "segundo_nombre", "fecha_nacimiento", "edad", "sexo", "genero",
+        "grupo_sanguineo", "factor_rh", "estado_civil", "direccion_residencia",
+        "municipio", "departamento", "telefono", "celular", "correo_electronico",
+        "ocupacion", "entidad", "regimen_afiliacion", "tipo_usuario",
+    ],
+    "atencion": [
+        "fecha_atencion", "tipo_atencion", "motivo_consulta", "enfermedad_actual",
+        "antecedentes_personales", "antecedentes_familiares", "alergias_conocidas",
+        "habitos", "medicamentos_actuales",
+    ],
+    "signos_vitales": [
+        "tension_arterial", "frecuencia_cardiaca", "frecuencia_respiratoria",
+        "temperatura", "saturacion_oxigeno", "peso", "talla", "imc",
+    ],
+    "diagnostico": [
+        "examen_fisico_general", "examen_fisico_sistemas", "impresion_diagnostica",
+        "codigos_cie10", "conducta_plan", "recomendaciones", "medicos_interconsultados",
+        "procedimientos_realizados", "resultados_examenes",
+    ],
+    "cierre": [
+        "diagnostico_definitivo", "evolucion_medica", "tratamiento_instaurado",
+        "formulacion_medica", "educacion_paciente", "referencia_contrarreferencia",
+        "estado_egreso", "fecha_cierre",
+    ],
+    "profesional": [
+        "nombre_profesional", "tipo_profesional", "registro_medico", "cargo_servicio",
+        "firma_profesional", "firma_paciente", "responsable_registro",
+    ],
+    "registro": ["fecha_registro", "ultima_actualizacion", "activo"],
+}
+
+_CAMPOS_VALIDOS = set(COLUMNAS_PACIENTE) | set(CAMPOS_DERIVADOS)
+
+
+def select_columnas(campos: List[str]) -> str:
+    """Lista para SELECT (solo campos de la lista blanca; edad/IMC como expresión SQL)"""
+    return ", ".join(
+        f"{CAMPOS_DERIVADOS[campo]} AS {campo}" if campo in CAMPOS_DERIVADOS else campo
+        for campo in campos
+    )
+
+
+# Respuesta completa y PDF: todas las columnas más edad e IMC
+SELECT_PACIENTE = select_columnas(COLUMNAS_PACIENTE + list(CAMPOS_DERIVADOS))
+
+
+def resolver_campos(fields: str) -> List[str]:
+    """
+    Traduce el parámetro `fields` a los campos a consultar y retornar.
+
+    Raises:
+        ValueError: Si hay nombres que no son campos ni grupos
+    """
+    salida: Dict[str, None] = dict.fromkeys(COLUMNAS_CLAVE)
+    desconocidos = []
+    for nombre in fields.split(","):
+        # "Signos vitales" / "identificación" -> signos_vitales / identificacion
+        clave = normalizar_texto(nombre).replace(" ", "_")
+        if not clave:
+            continue
+        if clave in GRUPOS_CAMPOS:
+            salida.update(dict.fromkeys(GRUPOS_CAMPOS[clave]))
+        elif clave in _CAMPOS_VALIDOS:
+            salida[clave] = None
+        else:
+            desconocidos.append(nombre.strip())
+    if desconocidos:
+        raise ValueError(
+            f"Campos no válidos: {', '.join(desconocidos)}. "
+            f"Grupos disponibles: {', '.join(GRUPOS_CAMPOS)}"
+        )
+    return list(salida)
+
+
+def proyectar(row: Dict[str, Any], campos: List[str]) -> Dict[str, Any]:
+    """Respuesta parcial: solo `campos` (edad/IMC ya vienen de la consulta)"""
+    data = {}
+    for campo in campos:
+        valor = row.get(campo)
+        # NUMERIC llega como Decimal; el modelo completo lo expone como float
+        data[campo] = float(valor) if isinstance(valor, Decimal) else valor
+    return data
@@ -0,0 +1,77 @@
+# backend/project/app/serializacion.py
+"""
+Serialización rápida de filas de pacientes
+
+Las filas vienen de nuestra propia base de datos (tipos ya garantizados
+por el esquema): validarlas con pydantic campo por campo, y otra vez
+contra el response_model de FastAPI, es trabajo repetido. Aquí cada fila
+se convierte directamente al dict de salida, en el orden de campos del
+modelo (precalculado una vez), y se responde serializando con orjson.
+
+Los modelos siguen siendo el contrato: definen campos, orden, valores por
+defecto y la documentación OpenAPI (response_model).
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Type, Union, get_args
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.models import PacienteResponse, PacienteResumen
+
+
+def _es_float(anotacion) -> bool:
+    return anotacion is float or float in get_args(anotacion)
+
+
+class SerializadorFilas:
+    """
+    Convierte filas (dict) en dicts listos para JSON según un modelo.
+
+    - Orden y valores por defecto de los campos del modelo
+    - Campos float: NUMERIC (Decimal) de la BD -> float (como haría pydantic)
+    """
+
+    def __init__(self, modelo: Type[BaseModel]):
+        self._campos = []
+        self._floats = []
+        for nombre, campo in modelo.model_fields.items():
+            self._campos.append((nombre, None if campo.is_required() else campo.default))
+            if _es_float(campo.annotation):
+                self._floats.append(nombre)
+
+    def __call__(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        # El dict se arma en el orden del modelo; luego solo se reemplazan valores
+        data = {nombre: row.get(nombre, default) for nombre, default in self._campos}
+        for nombre in self._floats:
+            valor = data[nombre]
+            if valor is not None:
+                data[nombre] = float(valor)
+        return data
+
+    def lista(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self(row) for row in rows]
+
+
+# edad e IMC vienen calculados en la consulta (app/derivados.py)
+paciente_a_dict = SerializadorFilas(PacienteResponse)
+
+resumen_a_dict = SerializadorFilas(PacienteResumen)
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse serializada con orjson (fechas nativas, sin validación)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def respuesta_json(content: Union[Dict[str, Any], List[Any]], status_code: int = 200,
+                   headers: Optional[Dict[str, str]] = None) -> OrjsonResponse:
+    """
+    Respuesta ya serializada: FastAPI no la vuelve a validar contra
+    response_model (el contenido debe venir de los serializadores de arriba)
+    """
+    return OrjsonResponse(content=content, status_code=status_code, headers=headers)
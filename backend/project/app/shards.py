@@ -0,0 +1,81 @@
+# backend/project/app/shards.py
+"""
+Agrupación de documentos por shard de Citus
+public.pacientes está distribuida por numero_documento: agrupando los
+documentos según el shard que los aloja, cada grupo se resuelve con una
+consulta que va a un único worker.
+"""
+
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from app.database_async import fetch_all, DB_ASYNC_POOL_MAX_SIZE
+
+load_dotenv(override=False)
+
+# Máximo de documentos por consulta en POST /pacientes/lote
+PACIENTES_LOTE_MAX = int(os.getenv("PACIENTES_LOTE_MAX", 100))
+# Consultas por shard simultáneas entre todas las peticiones de lote:
+# muy por debajo del pool para no dejar sin conexiones al resto de endpoints
+PACIENTES_LOTE_CONCURRENCIA = int(os.getenv("PACIENTES_LOTE_CONCURRENCIA", max(1, DB_ASYNC_POOL_MAX_SIZE // 4)))
+
+_SHARDS_SQL = """
+    SELECT d AS numero_documento,
+           get_shard_id_for_distribution_column('public.pacientes', d) AS shard_id
+    FROM unnest(%s::text[]) AS d
+"""
+
+_UNDEFINED_FUNCTION = "42883"
+
+# None = aún no se sabe si la base de datos es Citus
+_citus_disponible = None
+
+_consultas_lote = None
+
+
+async def agrupar_por_shard(documentos: List[str]) -> Dict[int, List[str]]:
+    """
+    {shard_id: [documentos]} calculado en el coordinador (no toca los workers).
+
+    Sin Citus (PostgreSQL simple, desarrollo local) retorna un único grupo.
+    """
+    global _citus_disponible
+    if not documentos:
+        return {}
+    if _citus_disponible is not False:
+        try:
+            rows = await fetch_all(_SHARDS_SQL, (documentos,))
+            _citus_disponible = True
+        except Exception as e:
+            # 42883 = undefined_function (psycopg 3: sqlstate, psycopg2: pgcode)
+            if getattr(e, "sqlstate", None) != _UNDEFINED_FUNCTION and getattr(e, "pgcode", None) != _UNDEFINED_FUNCTION:
+                raise
+            print("Citus no disponible: consultas por lote sin agrupar por shard")
+            _citus_disponible = False
+        else:
+            grupos = defaultdict(list)
+            for row in rows:
+                grupos[row["shard_id"]].append(row["numero_documento"])
+            return dict(grupos)
+    return {0: list(documentos)}
+
+
+async def consultar_por_shard(sql: str, grupos: Dict[int, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Ejecuta `sql` (con un parámetro: la lista de documentos) por cada grupo,
+    en paralelo pero con a lo sumo PACIENTES_LOTE_CONCURRENCIA a la vez.
+    """
+    global _consultas_lote
+    if _consultas_lote is None:
+        _consultas_lote = asyncio.Semaphore(max(1, PACIENTES_LOTE_CONCURRENCIA))
+
+    async def consultar(docs: List[str]) -> List[Dict[str, Any]]:
+        async with _consultas_lote:
+            return await fetch_all(sql, (docs,))
+
+    resultados = await asyncio.gather(*(consultar(docs) for docs in grupos.values()))
+    return [row for rows in resultados for row in rows]
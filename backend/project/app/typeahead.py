@@ -0,0 +1,298 @@
+# backend/project/app/typeahead.py
+"""
+Índice en memoria para autocompletar pacientes por nombre o documento
+(opcional, TYPEAHEAD_ENABLED)
+
+Cada palabra normalizada del nombre (y el documento) se guarda en una
+lista ordenada de (palabra, documento): una consulta por prefijo es una
+búsqueda binaria en memoria, sin ir a la base de datos.
+
+- Se carga en segundo plano al arrancar y se recarga cada
+  TYPEAHEAD_REFRESH_INTERVAL segundos
+- Los endpoints de crear/actualizar/eliminar lo mantienen al día
+  (cada worker de uvicorn ve sus propios cambios al instante y los de
+  los demás en la siguiente recarga)
+- Memoria acotada: con más de TYPEAHEAD_MAX_PACIENTES el índice se
+  desactiva y las sugerencias se resuelven en la base de datos
+"""
+
+import bisect
+import heapq
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.database import get_db_connection
+from app.normalizacion import normalizar_texto, tokenizar
+
+load_dotenv(override=False)
+
+TYPEAHEAD_ENABLED = os.getenv("TYPEAHEAD_ENABLED", "false").lower() in ("1", "true", "yes")
+TYPEAHEAD_MAX_PACIENTES = int(os.getenv("TYPEAHEAD_MAX_PACIENTES", 200000))
+TYPEAHEAD_REFRESH_INTERVAL = float(os.getenv("TYPEAHEAD_REFRESH_INTERVAL", 900))
+# Tope de coincidencias examinadas por palabra (prefijos muy cortos)
+TYPEAHEAD_MAX_CANDIDATOS = int(os.getenv("TYPEAHEAD_MAX_CANDIDATOS", 20000))
+
+_CARGA_SQL = """
+    SELECT id, numero_documento, primer_nombre, segundo_nombre, primer_apellido, segundo_apellido
+    FROM public.pacientes
+    WHERE activo = TRUE
+    LIMIT %s
+"""
+
+
+def _entrada(row: Dict[str, Any]) -> tuple:
+    """(id, numero_documento, nombre_completo, palabras indexadas)"""
+    nombre_completo = " ".join(
+        p for p in (row.get("primer_nombre"), row.get("primer_apellido")) if p
+    )
+    palabras = tokenizar(
+        row.get("primer_nombre"), row.get("segundo_nombre"),
+        row.get("primer_apellido"), row.get("segundo_apellido")
+    )
+    documento = normalizar_texto(row["numero_documento"])
+    if documento not in palabras:
+        palabras.append(documento)
+    return row["id"], row["numero_documento"], nombre_completo, tuple(palabras)
+
+
+class TypeaheadIndex:
+    """
+    Índice de prefijos de pacientes activos.
+
+    Uso:
+        typeahead_index.buscar("jua pe", 10)  # -> lista o None si no está listo
+        typeahead_index.upsert(row)           # tras INSERT/UPDATE ... RETURNING *
+        typeahead_index.upsert_lote(rows)     # tras una importación masiva
+        typeahead_index.remove(numero_documento)
+    """
+
+    def __init__(self, enabled: bool = TYPEAHEAD_ENABLED, max_pacientes: int = TYPEAHEAD_MAX_PACIENTES,
+                 interval: float = TYPEAHEAD_REFRESH_INTERVAL):
+        self.enabled = enabled
+        self.max_pacientes = max(1, max_pacientes)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, tuple] = {}  # numero_documento -> entrada
+        self._claves: List[tuple] = []         # (palabra, numero_documento) ordenado
+        self._listo = False
+        self._desbordado = False
+        self._cambios_en_recarga: Optional[list] = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._recargas = 0
+        self._errores = 0
+        self._ultima_recarga_ms = None
+
+    @property
+    def listo(self) -> bool:
+        return self.enabled and self._listo and not self._desbordado
+
+    # ---------- Consultas ----------
+
+    def buscar(self, texto: str, limit: int = 10) -> Optional[List[dict]]:
+        """
+        Pacientes cuyas palabras empiezan por cada palabra de `texto`.
+
+        Returns:
+            Lista de {id, numero_documento, nombre_completo}, o None si el
+            índice no está disponible (usar la base de datos)
+        """
+        if not self.listo:
+            return None
+        consulta = tokenizar(texto)
+        if not consulta:
+            return []
+
+        with self._lock:
+            candidatos = None
+            # Las palabras más largas son más selectivas: se intersecan primero
+            for palabra in sorted(consulta, key=len, reverse=True):
+                documentos = self._con_prefijo(palabra)
+                candidatos = documentos if candidatos is None else candidatos & documentos
+                if not candidatos:
+                    return []
+            entradas = [self._entradas[doc] for doc in candidatos]
+
+        # Primero quienes tienen más palabras exactas, luego alfabético
+        exactas = set(consulta)
+        mejores = heapq.nsmallest(limit, entradas, key=lambda e: (-len(exactas.intersection(e[3])), e[2], e[1]))
+        return [
+            {"id": e[0], "numero_documento": e[1], "nombre_completo": e[2]}
+            for e in mejores
+        ]
+
+    def _con_prefijo(self, prefijo: str) -> set:
+        inicio = bisect.bisect_left(self._claves, (prefijo,))
+        documentos = set()
+        for i in range(inicio, min(len(self._claves), inicio + TYPEAHEAD_MAX_CANDIDATOS)):
+            palabra, documento = self._claves[i]
+            if not palabra.startswith(prefijo):
+                break
+            documentos.add(documento)
+        return documentos
+
+    # ---------- Mantenimiento desde los endpoints ----------
+
+    def upsert(self, row: Optional[Dict[str, Any]]):
+        """Refleja un paciente creado o actualizado (fila completa de public.pacientes)"""
+        if not self.enabled or not row:
+            return
+        if row.get("activo") is False:
+            self.remove(row["numero_documento"])
+            return
+        entrada = _entrada(row)
+        with self._lock:
+            if self._cambios_en_recarga is not None:
+                self._cambios_en_recarga.append(("upsert", entrada))
+            self._aplicar_upsert(entrada)
+
+    def upsert_lote(self, rows: List[Dict[str, Any]]):
+        """
+        Varios pacientes nuevos de una vez (importación masiva): las claves
+        se agregan al final y se reordenan una sola vez, en lugar de un
+        insort por palabra.
+        """
+        if not self.enabled or not rows:
+            return
+        entradas = [_entrada(row) for row in rows if row.get("activo") is not False]
+        with self._lock:
+            if self._cambios_en_recarga is not None:
+                self._cambios_en_recarga.extend(("upsert", entrada) for entrada in entradas)
+            if self._desbordado:
+                return
+            nuevos = {entrada[1] for entrada in entradas} - self._entradas.keys()
+            if len(self._entradas) + len(nuevos) > self.max_pacientes:
+                self._desbordar()
+                return
+            for entrada in entradas:
+                self._aplicar_remove(entrada[1])
+                self._entradas[entrada[1]] = entrada
+                self._claves.extend((palabra, entrada[1]) for palabra in entrada[3])
+            self._claves.sort()
+
+    def remove(self, numero_documento: str):
+        """Quita un paciente eliminado (borrado lógico)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._cambios_en_recarga is not None:
+                self._cambios_en_recarga.append(("remove", numero_documento))
+            self._aplicar_remove(numero_documento)
+
+    def _aplicar_upsert(self, entrada: tuple):
+        if self._desbordado:
+            return
+        documento = entrada[1]
+        if documento not in self._entradas and len(self._entradas) >= self.max_pacientes:
+            self._desbordar()
+            return
+        self._aplicar_remove(documento)
+        self._entradas[documento] = entrada
+        for palabra in entrada[3]:
+            bisect.insort(self._claves, (palabra, documento))
+
+    def _aplicar_remove(self, documento: str):
+        anterior = self._entradas.pop(documento, None)
+        if anterior is None:
+            return
+        for palabra in anterior[3]:
+            i = bisect.bisect_left(self._claves, (palabra, documento))
+            if i < len(self._claves) and self._claves[i] == (palabra, documento):
+                del self._claves[i]
+
+    def _desbordar(self):
+        if not self._desbordado:
+            print(f"Índice de autocompletado desactivado: más de {self.max_pacientes} pacientes")
+        self._desbordado = True
+        self._entradas, self._claves = {}, []
+
+    # ---------- Carga y recarga ----------
+
+    def recargar(self):
+        """Reconstruye el índice desde la base de datos y lo reemplaza de una vez"""
+        with self._lock:
+            self._cambios_en_recarga = []
+        inicio = time.perf_counter()
+        conn = None
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            cur.execute(_CARGA_SQL, (self.max_pacientes + 1,))
+            rows = cur.fetchall()
+            cur.close()
+        except Exception as e:
+            with self._lock:
+                self._cambios_en_recarga = None
+                self._errores += 1
+            print(f"Error cargando índice de autocompletado: {e}")
+            return
+        finally:
+            if conn:
+                conn.close()
+
+        desbordado = len(rows) > self.max_pacientes
+        entradas, claves = {}, []
+        if not desbordado:
+            for row in rows:
+                entrada = _entrada(row)
+                entradas[entrada[1]] = entrada
+                claves.extend((palabra, entrada[1]) for palabra in entrada[3])
+            claves.sort()
+
+        with self._lock:
+            cambios, self._cambios_en_recarga = self._cambios_en_recarga, None
+            self._entradas, self._claves = entradas, claves
+            self._desbordado = False
+            if desbordado:
+                self._desbordar()
+            else:
+                # Cambios hechos por los endpoints mientras corría la consulta
+                for operacion, dato in cambios:
+                    if operacion == "upsert":
+                        self._aplicar_upsert(dato)
+                    else:
+                        self._aplicar_remove(dato)
+            self._listo = True
+            self._recargas += 1
+            self._ultima_recarga_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    def start(self):
+        """Carga inicial y recargas periódicas en un hilo (no retrasa el arranque)"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="typeahead-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "habilitado": self.enabled,
+                "listo": self.listo,
+                "desbordado": self._desbordado,
+                "pacientes": len(self._entradas),
+                "max_pacientes": self.max_pacientes,
+                "claves": len(self._claves),
+                "recargas": self._recargas,
+                "errores": self._errores,
+                "ultima_recarga_ms": self._ultima_recarga_ms,
+                "intervalo_segundos": self.interval,
+            }
+
+    def _run(self):
+        self.recargar()
+        while not self._stop.wait(self.interval):
+            self.recargar()
+
+
+typeahead_index = TypeaheadIndex()
@@ -0,0 +1,133 @@
+# backend/project/app/ultimo_acceso.py
+"""
+Registro diferido (write-behind) del último acceso de los usuarios
+El login solo anota el instante en memoria; un hilo en segundo plano
+vuelca todos los accesos pendientes en un único UPDATE por lote.
+"""
+
+import os
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from app.database import get_db_connection
+
+load_dotenv(override=False)
+
+# Cada cuántos segundos se vuelcan los accesos pendientes
+ULTIMO_ACCESO_FLUSH_INTERVAL = float(os.getenv("ULTIMO_ACCESO_FLUSH_INTERVAL", 5))
+
+_UPDATE_SQL = """
+    UPDATE public.usuarios AS u
+    SET ultimo_acceso = v.ultimo_acceso
+    FROM (VALUES %s) AS v(id, ultimo_acceso)
+    WHERE u.id = v.id
+    AND (u.ultimo_acceso IS NULL OR u.ultimo_acceso < v.ultimo_acceso)
+"""
+
+
+class LastAccessBuffer:
+    """
+    Buffer de últimos accesos por usuario.
+
+    Varios logins del mismo usuario entre dos volcados se reducen a una
+    sola fila (el más reciente). Si el volcado falla, los accesos vuelven
+    al buffer y se reintentan en el siguiente ciclo.
+    """
+
+    def __init__(self, interval: float = ULTIMO_ACCESO_FLUSH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> datetime
+        self._stop = threading.Event()
+        self._thread = None
+        self._flushes = 0
+        self._rows_written = 0
+        self._errors = 0
+
+    def record(self, user_id: int, when: datetime = None):
+        """
+        Anota un acceso; no toca la base de datos.
+
+        En UTC y con zona: al volcarlo como timestamptz PostgreSQL lo pasa a
+        la zona de la sesión, como hacía NOW(), aunque el pod use otra zona.
+        """
+        when = when or datetime.now(timezone.utc)
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or previous < when:
+                self._pending[user_id] = when
+
+    def flush(self) -> int:
+        """Vuelca los accesos pendientes en un solo UPDATE; retorna las filas enviadas"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        conn = None
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            execute_values(
+                cur, _UPDATE_SQL, list(batch.items()),
+                template="(%s::integer, %s::timestamptz)",
+                page_size=len(batch)
+            )
+            conn.commit()
+            cur.close()
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            # Devolver el lote al buffer sin pisar accesos más recientes
+            with self._lock:
+                for user_id, when in batch.items():
+                    current = self._pending.get(user_id)
+                    if current is None or current < when:
+                        self._pending[user_id] = when
+                self._errors += 1
+            print(f"Error registrando últimos accesos: {e}")
+            return 0
+        finally:
+            if conn:
+                conn.close()
+
+        with self._lock:
+            self._flushes += 1
+            self._rows_written += len(batch)
+        return len(batch)
+
+    def start(self):
+        """Arranca el hilo de volcado periódico"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ultimo-acceso-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo y hace un último volcado"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pendientes": len(self._pending),
+                "intervalo_segundos": self.interval,
+                "volcados": self._flushes,
+                "filas_escritas": self._rows_written,
+                "errores": self._errors,
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+ultimo_acceso_buffer = LastAccessBuffer()
@@ -0,0 +1,77 @@
+# backend/project/benchmarks/bench_busqueda_documento.py
+"""
+Benchmark: búsqueda por documento enrutada a un shard (igualdad sobre la
+columna de distribución) vs. búsqueda amplia (ILIKE '%doc%' en todos
+los shards).
+
+Requiere la base de datos configurada en .env / variables POSTGRES_*.
+
+Uso (desde backend/project):
+    python -m benchmarks.bench_busqueda_documento [documento] [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+
+from app.busqueda import construir_busqueda
+from app.database import get_db_connection
+from app.models import ModoBusquedaEnum
+
+
+def consulta(documento: str, exacto: bool):
+    condiciones, params, order_by, order_params = construir_busqueda(
+        None, documento, ModoBusquedaEnum.INDEXADO, exacto
+    )
+    sql = f"""
+        SELECT id, numero_documento, primer_nombre, primer_apellido
+        FROM public.pacientes
+        WHERE activo = TRUE AND {' AND '.join(condiciones)}
+        ORDER BY {order_by}
+        LIMIT 20
+    """
+    return sql, params + order_params
+
+
+def tareas_citus(cur, sql, params) -> str:
+    """Cantidad de shards que toca la consulta según EXPLAIN"""
+    cur.execute("EXPLAIN " + sql, params)
+    for row in cur.fetchall():
+        linea = row["QUERY PLAN"]
+        if "Task Count" in linea:
+            return linea.strip()
+    return "Task Count: ?"
+
+
+def medir(nombre, cur, sql, params, iteraciones):
+    cur.execute(sql, params)  # calentamiento
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1] if len(tiempos) >= 20 else tiempos[-1]
+    print(f"  {nombre:<28} p50 {statistics.median(tiempos):8.2f} ms   p95 {p95:8.2f} ms   ({tareas_citus(cur, sql, params)})")
+    return statistics.median(tiempos)
+
+
+def main():
+    documento = sys.argv[1] if len(sys.argv) > 1 else "12345"
+    iteraciones = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        print(f"Búsqueda por documento '{documento}' ({iteraciones} iteraciones)")
+        amplia = medir("amplia (ILIKE, todos)", cur, *consulta(documento, exacto=False), iteraciones)
+        enrutada = medir("enrutada (igualdad, 1 shard)", cur, *consulta(documento, exacto=True), iteraciones)
+        print(f"  aceleración p50: {amplia / enrutada:.1f}x")
+        cur.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
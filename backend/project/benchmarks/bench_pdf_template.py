@@ -0,0 +1,71 @@
+# backend/project/benchmarks/bench_pdf_template.py
+"""
+Benchmark: costo por PDF con template/hoja de estilos precompilados
+vs. compilar el template y parsear el CSS en cada exportación.
+
+Uso (desde backend/project):
+    python -m benchmarks.bench_pdf_template [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+from datetime import date
+
+from jinja2 import Template
+from weasyprint import HTML
+
+from app import pdf_generator
+from app.pdf_generator import HTML_TEMPLATE, PDF_STYLESHEET, generar_pdf_paciente, precargar_recursos_pdf
+
+# Template tal como era antes: CSS embebido y compilación por llamada
+TEMPLATE_EMBEBIDO = HTML_TEMPLATE.replace("</head>", f"<style>{PDF_STYLESHEET}</style>\n</head>", 1)
+
+PACIENTE = {
+    "tipo_documento": "CC", "numero_documento": "12345",
+    "primer_nombre": "Juan", "segundo_nombre": "Carlos",
+    "primer_apellido": "Pérez", "segundo_apellido": "Gómez",
+    "fecha_nacimiento": str(date(1995, 4, 12)), "edad": 30, "sexo": "M",
+    "tipo_atencion": "Consulta Externa", "motivo_consulta": "Control de rutina",
+    "enfermedad_actual": "Paciente asintomático que acude a control médico preventivo. " * 20,
+    "tension_arterial": "120/80", "frecuencia_cardiaca": 72, "temperatura": 36.5,
+    "peso": 75.0, "talla": 175.0, "imc": 24.49,
+    "impresion_diagnostica": "Paciente sano, control preventivo",
+    "nombre_profesional": "Dr. Carlos Rodríguez", "tipo_profesional": "Médico General",
+}
+CONTEXTO = {"paciente": PACIENTE, "fecha_generacion": "01/01/2025 00:00:00"}
+
+
+def medir(nombre, fn, iteraciones):
+    fn()  # calentamiento
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    media = statistics.mean(tiempos)
+    print(f"  {nombre:<38} media {media:8.2f} ms   p50 {statistics.median(tiempos):8.2f} ms")
+    return media
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    precargar_recursos_pdf()
+
+    print(f"Template Jinja ({iteraciones} iteraciones)")
+    antes = medir("Template() + render por llamada", lambda: Template(TEMPLATE_EMBEBIDO).render(**CONTEXTO), iteraciones)
+    despues = medir("template precompilado + render", lambda: pdf_generator._template.render(**CONTEXTO), iteraciones)
+    print(f"  ahorro por PDF: {antes - despues:.2f} ms\n")
+
+    print(f"PDF completo ({iteraciones} iteraciones)")
+    antes = medir(
+        "compilar + CSS embebido + WeasyPrint",
+        lambda: HTML(string=Template(TEMPLATE_EMBEBIDO).render(**CONTEXTO)).write_pdf(),
+        iteraciones
+    )
+    despues = medir("generar_pdf_paciente (precompilado)", lambda: generar_pdf_paciente(PACIENTE), iteraciones)
+    print(f"  ahorro por PDF: {antes - despues:.2f} ms ({(antes - despues) / antes:.1%})")
+
+
+if __name__ == "__main__":
+    main()
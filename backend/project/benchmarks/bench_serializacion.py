@@ -0,0 +1,103 @@
+# backend/project/benchmarks/bench_serializacion.py
+"""
+Benchmark: costo por registro de serializar un paciente a JSON.
+
+- pydantic: PacienteResponse(**row) (validación de ~60 campos), nueva
+  validación contra response_model y JSON con pydantic (lo que hacía
+  FastAPI al devolver el modelo)
+- directo: paciente_a_dict (orden de campos precalculado, sin validar)
+  y orjson (app/serializacion.py)
+
+No requiere base de datos.
+
+Uso (desde backend/project):
+    python -m benchmarks.bench_serializacion [iteraciones]
+"""
+
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.models import PacienteResponse
+from app.serializacion import paciente_a_dict
+
+TEXTO = "Paciente asintomático que acude a control médico preventivo. " * 8
+
+FILA = {
+    "id": 7, "tipo_documento": "CC", "numero_documento": "12345",
+    "primer_nombre": "Juan", "segundo_nombre": "Carlos",
+    "primer_apellido": "Pérez", "segundo_apellido": "Gómez",
+    "fecha_nacimiento": date(1995, 4, 12), "sexo": "M", "genero": "Masculino",
+    "grupo_sanguineo": "O", "factor_rh": "+", "estado_civil": "Soltero",
+    "direccion_residencia": "Calle 1 # 2-3", "municipio": "Medellín", "departamento": "Antioquia",
+    "telefono": "6041234567", "celular": "3001234567", "correo_electronico": "juan@example.com",
+    "ocupacion": "Ingeniero", "entidad": "EPS", "regimen_afiliacion": "Contributivo",
+    "tipo_usuario": "Cotizante", "fecha_atencion": datetime(2025, 1, 2, 10, 30),
+    "tipo_atencion": "Consulta Externa", "motivo_consulta": "Control de rutina",
+    "enfermedad_actual": TEXTO, "antecedentes_personales": TEXTO, "antecedentes_familiares": TEXTO,
+    "alergias_conocidas": "Ninguna", "habitos": TEXTO, "medicamentos_actuales": "Ninguno",
+    "tension_arterial": "120/80", "frecuencia_cardiaca": 72, "frecuencia_respiratoria": 16,
+    "temperatura": Decimal("36.5"), "saturacion_oxigeno": 98,
+    "peso": Decimal("75.00"), "talla": Decimal("175.00"),
+    "examen_fisico_general": TEXTO, "examen_fisico_sistemas": TEXTO,
+    "impresion_diagnostica": TEXTO, "codigos_cie10": "Z000", "conducta_plan": TEXTO,
+    "recomendaciones": TEXTO, "medicos_interconsultados": "Ninguno",
+    "procedimientos_realizados": "Ninguno", "resultados_examenes": TEXTO,
+    "diagnostico_definitivo": TEXTO, "evolucion_medica": TEXTO, "tratamiento_instaurado": TEXTO,
+    "formulacion_medica": TEXTO, "educacion_paciente": TEXTO, "referencia_contrarreferencia": "No",
+    "estado_egreso": "Vivo", "nombre_profesional": "Dr. Carlos Rodríguez",
+    "tipo_profesional": "Médico General", "registro_medico": "RM-1234",
+    "cargo_servicio": "Consulta Externa", "firma_profesional": "CR", "firma_paciente": "JP",
+    "fecha_cierre": datetime(2025, 1, 2, 11, 0), "responsable_registro": "admin",
+    "fecha_registro": datetime(2025, 1, 1), "ultima_actualizacion": datetime(2025, 1, 2, 11, 0, 5, 678),
+    "activo": True,
+    # Calculados en la consulta (app/derivados.py)
+    "edad": 30, "imc": Decimal("24.49"),
+}
+
+# Validación que FastAPI hace con response_model al recibir el modelo
+RESPONSE_MODEL = TypeAdapter(PacienteResponse)
+
+
+def via_pydantic() -> bytes:
+    modelo = PacienteResponse(**FILA)
+    validado = RESPONSE_MODEL.validate_python(modelo.model_dump())
+    return RESPONSE_MODEL.dump_json(validado)
+
+
+def via_directo() -> bytes:
+    return orjson.dumps(paciente_a_dict(FILA))
+
+
+def medir(nombre, fn, iteraciones):
+    for _ in range(100):  # calentamiento
+        fn()
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1_000_000)
+    mediana = statistics.median(tiempos)
+    print(f"  {nombre:<10} {mediana:8.1f} µs/registro   ({len(fn())} bytes)")
+    return mediana
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    if orjson.loads(via_pydantic()) != orjson.loads(via_directo()):
+        raise SystemExit("Las dos rutas no producen el mismo JSON")
+
+    print(f"Serialización de PacienteResponse ({iteraciones} iteraciones)")
+    antes = medir("pydantic", via_pydantic, iteraciones)
+    despues = medir("directo", via_directo, iteraciones)
+    print(f"  aceleración: {antes / despues:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+-- 06_keyset_pagination.sql
+-- Índice para la paginación por cursor de GET /pacientes
+-- (ORDER BY fecha_registro DESC, id DESC con (fecha_registro, id) < cursor)
+\connect historiaclinica
+
+-- La clave del cursor no admite NULL: rellenar registros antiguos
+UPDATE public.pacientes
+SET fecha_registro = COALESCE(ultima_actualizacion, NOW())
+WHERE fecha_registro IS NULL;
+
+ALTER TABLE public.pacientes ALTER COLUMN fecha_registro SET NOT NULL;
+
+-- Parcial sobre activos: es lo único que lista el endpoint.
+-- En una tabla distribuida Citus lo crea en cada shard.
+CREATE INDEX IF NOT EXISTS idx_pacientes_registro_keyset
+    ON public.pacientes (fecha_registro DESC, id DESC)
+    WHERE activo = TRUE;
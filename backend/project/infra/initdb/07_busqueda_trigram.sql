@@ -0,0 +1,39 @@
+-- 07_busqueda_trigram.sql
+-- Búsqueda indexada de pacientes (GET /pacientes/buscar/query):
+-- índices GIN de trigramas sobre el nombre normalizado (minúsculas, sin
+-- tildes) y sobre numero_documento
+\connect historiaclinica
+
+-- Citus propaga las extensiones y funciones a los workers
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE (depende del diccionario); con el diccionario fijo
+-- el resultado es determinista y se puede usar en índices
+CREATE OR REPLACE FUNCTION public.f_unaccent(texto text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texto)
+$$;
+
+-- Nombre completo normalizado; la API usa exactamente esta expresión
+CREATE OR REPLACE FUNCTION public.nombre_busqueda(
+    primer_nombre text, segundo_nombre text, primer_apellido text, segundo_apellido text
+)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT lower(public.f_unaccent(
+        coalesce(primer_nombre, '') || ' ' || coalesce(segundo_nombre, '') || ' ' ||
+        coalesce(primer_apellido, '') || ' ' || coalesce(segundo_apellido, '')
+    ))
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_pacientes_nombre_trgm
+    ON public.pacientes
+    USING GIN (public.nombre_busqueda(primer_nombre, segundo_nombre, primer_apellido, segundo_apellido) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_pacientes_documento_trgm
+    ON public.pacientes
+    USING GIN (numero_documento gin_trgm_ops);
@@ -0,0 +1,19 @@
+-- 08_busqueda_fonetica.sql
+-- Búsqueda fonética de pacientes (GET /pacientes/buscar/query?modo=fonetico)
+-- La API calcula los códigos (app/normalizacion.py: codigo_fonetico) al
+-- crear/actualizar. Para los registros existentes, después de esta
+-- migración ejecutar desde backend/project:
+--     python -m app.busqueda
+\connect historiaclinica
+
+ALTER TABLE public.pacientes ADD COLUMN IF NOT EXISTS primer_nombre_fonetico VARCHAR(100);
+ALTER TABLE public.pacientes ADD COLUMN IF NOT EXISTS primer_apellido_fonetico VARCHAR(100);
+
+-- varchar_pattern_ops: índice utilizable por LIKE 'CODIGO%' (búsqueda por prefijo)
+CREATE INDEX IF NOT EXISTS idx_pacientes_nombre_fonetico
+    ON public.pacientes (primer_nombre_fonetico varchar_pattern_ops)
+    WHERE activo = TRUE;
+
+CREATE INDEX IF NOT EXISTS idx_pacientes_apellido_fonetico
+    ON public.pacientes (primer_apellido_fonetico varchar_pattern_ops)
+    WHERE activo = TRUE;
@@ -0,0 +1,10 @@
+-- 09_documento_unico.sql
+-- Restricción única sobre numero_documento (columna de distribución).
+-- POST /pacientes usa INSERT ... ON CONFLICT (numero_documento) DO NOTHING
+-- y necesita un índice único sobre esa columna para inferir el conflicto.
+-- setup.sh ya la crea como pacientes_numero_documento_key; en bases
+-- antiguas sin ella, este índice la reemplaza (mismo nombre, no se duplica).
+\connect historiaclinica
+
+CREATE UNIQUE INDEX IF NOT EXISTS pacientes_numero_documento_key
+    ON public.pacientes (numero_documento);
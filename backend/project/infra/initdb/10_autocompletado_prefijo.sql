@@ -0,0 +1,10 @@
+-- 10_autocompletado_prefijo.sql
+-- Autocompletado sin índice en memoria (GET /pacientes/buscar/sugerencias con
+-- TYPEAHEAD_ENABLED=false o mientras carga): el documento se busca por
+-- prefijo. Los nombres usan idx_pacientes_nombre_trgm (07_busqueda_trigram.sql).
+\connect historiaclinica
+
+-- varchar_pattern_ops: índice utilizable por LIKE '123%' (búsqueda por prefijo)
+CREATE INDEX IF NOT EXISTS idx_pacientes_documento_prefijo
+    ON public.pacientes (numero_documento varchar_pattern_ops)
+    WHERE activo = TRUE;
@@ -218,7 +218,7 @@ CREATE TABLE public.pacientes (
     firma_paciente TEXT,
     fecha_cierre TIMESTAMP,
     responsable_registro VARCHAR(200),
-    fecha_registro TIMESTAMP DEFAULT NOW(),
+    fecha_registro TIMESTAMP NOT NULL DEFAULT NOW(),
     ultima_actualizacion TIMESTAMP DEFAULT NOW(),
     activo BOOLEAN DEFAULT TRUE,
     PRIMARY KEY (numero_documento, id)
@@ -227,6 +227,7 @@ CREATE TABLE public.pacientes (
 CREATE INDEX idx_pacientes_nombres ON public.pacientes(primer_nombre, primer_apellido);
 CREATE INDEX idx_pacientes_fecha_atencion ON public.pacientes(fecha_atencion);
 CREATE INDEX idx_pacientes_tipo_atencion ON public.pacientes(tipo_atencion);
+CREATE INDEX idx_pacientes_registro_keyset ON public.pacientes(fecha_registro DESC, id DESC) WHERE activo = TRUE;
 EOSQL'
 
 kubectl exec -n $NAMESPACE $COORDINATOR_POD -- psql -U postgres -f /tmp/create_pacientes.sql
@@ -237,6 +238,13 @@ echo -e "\n${BLUE}>>> Distribuyendo tabla pacientes en Citus...${NC}"
 kubectl exec -n $NAMESPACE $COORDINATOR_POD -- psql -U postgres -d historiaclinica -c "SELECT create_distributed_table('public.pacientes', 'numero_documento');"
 print_success "Tabla distribuida por numero_documento"
 
+# Migraciones de índices (infra/initdb)
+echo -e "\n${BLUE}>>> Aplicando migraciones de índices...${NC}"
+for MIGRACION in 06_keyset_pagination.sql 07_busqueda_trigram.sql 08_busqueda_fonetica.sql 09_documento_unico.sql 10_autocompletado_prefijo.sql; do
+    kubectl exec -i -n $NAMESPACE $COORDINATOR_POD -- psql -U postgres -v ON_ERROR_STOP=1 < "$PROJECT_DIR/infra/initdb/$MIGRACION"
+    print_success "Migración $MIGRACION aplicada"
+done
+
 # Insertar pacientes de prueba
 echo -e "\n${BLUE}>>> Insertando pacientes de prueba...${NC}"
 kubectl exec -n $NAMESPACE $COORDINATOR_POD -- bash -c 'cat > /tmp/insert_pacientes.sql << "EOSQL"
@@ -248,7 +256,8 @@ INSERT INTO public.pacientes (
     direccion_residencia, municipio, departamento, telefono, celular, correo_electronico,
     ocupacion, entidad, regimen_afiliacion, tipo_usuario, tipo_atencion, motivo_consulta, enfermedad_actual,
     tension_arterial, frecuencia_cardiaca, frecuencia_respiratoria, temperatura, saturacion_oxigeno, peso, talla,
-    impresion_diagnostica, nombre_profesional, tipo_profesional
+    impresion_diagnostica, nombre_profesional, tipo_profesional,
+    primer_nombre_fonetico, primer_apellido_fonetico
 ) VALUES
 (
     '"'"'CC'"'"', '"'"'12345'"'"', '"'"'Pérez'"'"', '"'"'Gómez'"'"', '"'"'Juan'"'"', '"'"'Carlos'"'"',
@@ -256,7 +265,8 @@ INSERT INTO public.pacientes (
     '"'"'Calle 123 #45-67'"'"', '"'"'Sincelejo'"'"', '"'"'Sucre'"'"', '"'"'2774500'"'"', '"'"'3001234567'"'"', '"'"'juanp@example.com'"'"',
     '"'"'Ingeniero'"'"', '"'"'Nueva EPS'"'"', '"'"'Contributivo'"'"', '"'"'Afiliado'"'"', '"'"'Consulta Externa'"'"', '"'"'Control de rutina'"'"', '"'"'Paciente asintomático que acude a control médico preventivo'"'"',
     '"'"'120/80'"'"', 72, 16, 36.5, 98, 75.0, 175.0,
-    '"'"'Paciente sano, control preventivo'"'"', '"'"'Dr. Carlos Rodríguez'"'"', '"'"'Médico General'"'"'
+    '"'"'Paciente sano, control preventivo'"'"', '"'"'Dr. Carlos Rodríguez'"'"', '"'"'Médico General'"'"',
+    '"'"'JUAN'"'"', '"'"'PERES'"'"'
 ),
 (
     '"'"'CC'"'"', '"'"'67890'"'"', '"'"'Gómez'"'"', '"'"'Martínez'"'"', '"'"'María'"'"', '"'"'Fernanda'"'"',
@@ -264,7 +274,8 @@ INSERT INTO public.pacientes (
     '"'"'Carrera 45 #12-34'"'"', '"'"'Sincelejo'"'"', '"'"'Sucre'"'"', '"'"'2774501'"'"', '"'"'3109876543'"'"', '"'"'mariag@example.com'"'"',
     '"'"'Docente'"'"', '"'"'Sanitas EPS'"'"', '"'"'Contributivo'"'"', '"'"'Afiliado'"'"', '"'"'Consulta Externa'"'"', '"'"'Dolor abdominal'"'"', '"'"'Paciente refiere dolor abdominal de 2 días de evolución'"'"',
     '"'"'110/70'"'"', 78, 18, 36.8, 97, 62.0, 165.0,
-    '"'"'Gastritis aguda'"'"', '"'"'Dra. Ana Martínez'"'"', '"'"'Médico General'"'"'
+    '"'"'Gastritis aguda'"'"', '"'"'Dra. Ana Martínez'"'"', '"'"'Médico General'"'"',
+    '"'"'MARIA'"'"', '"'"'GOMES'"'"'
 ),
 (
     '"'"'CC'"'"', '"'"'11111'"'"', '"'"'López'"'"', '"'"'Torres'"'"', '"'"'Pedro'"'"', '"'"'Antonio'"'"',
@@ -272,7 +283,8 @@ INSERT INTO public.pacientes (
     '"'"'Avenida 80 #20-10'"'"', '"'"'Sincelejo'"'"', '"'"'Sucre'"'"', '"'"'2774502'"'"', '"'"'3201112233'"'"', '"'"'pedro@example.com'"'"',
     '"'"'Comerciante'"'"', '"'"'Coosalud'"'"', '"'"'Subsidiado'"'"', '"'"'Subsidiado'"'"', '"'"'Urgencias'"'"', '"'"'Trauma en pierna derecha'"'"', '"'"'Paciente con trauma en miembro inferior derecho por caída'"'"',
     '"'"'130/85'"'"', 88, 20, 37.0, 96, 80.0, 172.0,
-    '"'"'Esguince grado II tobillo derecho'"'"', '"'"'Dr. Carlos Rodríguez'"'"', '"'"'Médico Urgencias'"'"'
+    '"'"'Esguince grado II tobillo derecho'"'"', '"'"'Dr. Carlos Rodríguez'"'"', '"'"'Médico Urgencias'"'"',
+    '"'"'PEDRO'"'"', '"'"'LOPES'"'"'
 )
 ON CONFLICT (numero_documento) DO NOTHING;
 EOSQL'
@@ -0,0 +1,60 @@
+# backend/project/tests/test_auth.py
+"""
+Lista de revocación de tokens (app/auth.py): por jti y por usuario, con
+la resolución de segundos del claim `iat`.
+"""
+
+import time
+
+from app import auth
+from app.auth import TokenRevocationList, create_access_token, decode_token
+
+AHORA = 1_750_000_000
+
+
+def _en(monkeypatch, instante: float):
+    monkeypatch.setattr(auth.time, "time", lambda: instante)
+
+
+def test_revocar_por_jti():
+    revocaciones = TokenRevocationList()
+    revocaciones.revoke_token("abc", time.time() + 60)
+    assert revocaciones.is_revoked({"jti": "abc", "sub": "ana", "iat": 0})
+    assert not revocaciones.is_revoked({"jti": "otro", "sub": "ana", "iat": 0})
+
+
+def test_revocar_usuario_se_guarda_en_segundos_enteros(monkeypatch):
+    revocaciones = TokenRevocationList()
+    _en(monkeypatch, AHORA + 0.75)
+    revocaciones.revoke_user("ana")
+    assert revocaciones._users["ana"] == AHORA
+
+
+def test_revocar_usuario_mismo_segundo(monkeypatch):
+    revocaciones = TokenRevocationList()
+    _en(monkeypatch, AHORA + 0.5)
+    revocaciones.revoke_user("ana")
+    # Emitidos antes de la revocación: revocados, también dentro del mismo segundo
+    assert revocaciones.is_revoked({"sub": "ana", "iat": AHORA - 1})
+    assert revocaciones.is_revoked({"sub": "ana", "iat": AHORA})
+    # Desde el segundo siguiente se aceptan; otros usuarios no se afectan
+    assert not revocaciones.is_revoked({"sub": "ana", "iat": AHORA + 1})
+    assert not revocaciones.is_revoked({"sub": "luis", "iat": AHORA})
+
+
+def test_token_real_emitido_antes_de_revocar():
+    revocaciones = TokenRevocationList()
+    payload = decode_token(create_access_token({"sub": "ana"}))
+    assert isinstance(payload["iat"], int)
+    revocaciones.revoke_user("ana")
+    assert revocaciones.is_revoked(payload)
+
+
+def test_entradas_vencidas_se_descartan(monkeypatch):
+    revocaciones = TokenRevocationList()
+    _en(monkeypatch, AHORA)
+    revocaciones.revoke_token("abc", AHORA + 1)
+    revocaciones.revoke_user("ana")
+    _en(monkeypatch, AHORA + auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 1)
+    revocaciones.revoke_user("luis")  # Descarta lo vencido al registrar
+    assert revocaciones.stats() == {"tokens_revocados": 0, "usuarios_revocados": 1}
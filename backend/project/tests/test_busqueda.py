@@ -0,0 +1,133 @@
+# backend/project/tests/test_busqueda.py
+"""
+Construcción de búsquedas de pacientes (app/busqueda.py): SQL y
+parámetros de cada modo, escape de comodines y de '%' en el SQL.
+
+El SQL se formatea como lo hace el driver (`%s` -> parámetro, `%%` -> `%`),
+así que un '%' sin escapar o un parámetro de más o de menos hace fallar
+la prueba.
+"""
+
+import pytest
+
+from app.busqueda import (
+    NOMBRE_BUSQUEDA_SQL,
+    construir_autocompletado,
+    construir_busqueda,
+    es_documento_exacto,
+    escapar_like,
+)
+from app.models import ModoBusquedaEnum
+
+
+def _formatear(condiciones, params, order_by, rank_params) -> str:
+    where = " AND ".join(condiciones) % tuple("<%s>" % p for p in params)
+    orden = order_by % tuple("<%s>" % p for p in rank_params)
+    return f"{where} ORDER BY {orden}"
+
+
+def test_escapar_like():
+    assert escapar_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+
+@pytest.mark.parametrize("documento, esperado", [
+    ("1020304050", True),
+    (" CE-1234 ", True),
+    ("123", False),
+    ("12 34", False),
+    ("12%4", False),
+    (None, False),
+])
+def test_es_documento_exacto(documento, esperado):
+    assert es_documento_exacto(documento) is esperado
+
+
+def test_sin_filtros():
+    assert construir_busqueda(None, None) == ([], [], "fecha_registro DESC", [])
+
+
+# ---------- Modo indexado ----------
+
+def test_indexado_nombre():
+    condiciones, params, order_by, rank_params = construir_busqueda(" Ana_50% ", None)
+    assert params == ["Ana\\_50\\%", "Ana_50%"]
+    assert rank_params == ["Ana_50%"]
+    sql = _formatear(condiciones, params, order_by, rank_params)
+    assert f"{NOMBRE_BUSQUEDA_SQL} LIKE '%' || lower(public.f_unaccent(<Ana\\_50\\%>)) || '%'" in sql
+    assert f"lower(public.f_unaccent(<Ana_50%>)) <% {NOMBRE_BUSQUEDA_SQL}" in sql
+    assert sql.endswith(
+        f"ORDER BY word_similarity(lower(public.f_unaccent(<Ana_50%>)), {NOMBRE_BUSQUEDA_SQL}) DESC, "
+        "fecha_registro DESC"
+    )
+
+
+def test_indexado_documento_subcadena():
+    condiciones, params, order_by, rank_params = construir_busqueda(None, " 10_20 ")
+    assert condiciones == ["numero_documento ILIKE %s"]
+    assert params == ["%10\\_20%"]
+    assert order_by == "similarity(numero_documento, %s) DESC, fecha_registro DESC"
+    assert rank_params == ["10_20"]
+
+
+def test_indexado_documento_exacto_y_nombre():
+    condiciones, params, order_by, rank_params = construir_busqueda("Ana", " 1020 ", exacto=True)
+    assert condiciones[0] == "numero_documento = %s"
+    assert params[0] == "1020"
+    # El documento exacto no agrega ILIKE ni ranking por documento
+    assert not any("ILIKE" in c for c in condiciones)
+    assert "similarity(numero_documento" not in order_by
+    _formatear(condiciones, params, order_by, rank_params)
+
+
+# ---------- Modo fonético ----------
+
+def test_fonetico_una_condicion_por_palabra():
+    condiciones, params, order_by, rank_params = construir_busqueda(
+        "Yanos Rodríguez", None, ModoBusquedaEnum.FONETICO
+    )
+    assert condiciones == ["(primer_nombre_fonetico LIKE %s OR primer_apellido_fonetico LIKE %s)"] * 2
+    assert params == ["YANOS%", "YANOS%", "RODRIGES%", "RODRIGES%"]
+    assert rank_params == ["YANOS", "YANOS", "RODRIGES", "RODRIGES"]
+    assert order_by.count(" + ") == 3 and order_by.endswith("DESC, fecha_registro DESC")
+    _formatear(condiciones, params, order_by, rank_params)
+
+
+def test_fonetico_sin_letras_no_coincide():
+    condiciones, params, _, _ = construir_busqueda("123 -", None, ModoBusquedaEnum.FONETICO)
+    assert condiciones == ["FALSE"] and params == []
+
+
+def test_fonetico_con_documento():
+    condiciones, params, _, rank_params = construir_busqueda("Ana", "99", ModoBusquedaEnum.FONETICO)
+    assert condiciones[-1] == "numero_documento ILIKE %s"
+    assert params[-1] == "%99%" and rank_params[-1] == "99"
+
+
+# ---------- Modo legado ----------
+
+def test_legado_sin_escape_ni_ranking():
+    condiciones, params, order_by, rank_params = construir_busqueda(
+        "Ana", "10", ModoBusquedaEnum.LEGADO, exacto=True
+    )
+    assert condiciones == [
+        "(primer_nombre ILIKE %s OR primer_apellido ILIKE %s)",
+        "numero_documento ILIKE %s",
+    ]
+    assert params == ["%Ana%", "%Ana%", "%10%"]
+    assert (order_by, rank_params) == ("fecha_registro DESC", [])
+
+
+# ---------- Autocompletado ----------
+
+def test_autocompletado_por_palabra():
+    condiciones, params, order_by, rank_params = construir_autocompletado("José ce_1")
+    assert len(condiciones) == 2
+    assert params == ["jose", "jose", "jose", "JOSE", "ce\\_1", "ce\\_1", "ce\\_1", "CE\\_1"]
+    assert rank_params == ["jose", "ce\\_1"]
+    sql = _formatear(condiciones, params, order_by, rank_params)
+    assert "numero_documento LIKE <CE\\_1> || '%'" in sql
+    assert f"' ' || {NOMBRE_BUSQUEDA_SQL} LIKE '% ' || <jose> || '%'" in sql
+
+
+def test_autocompletado_vacio():
+    assert construir_autocompletado("   ") == (["FALSE"], [], "fecha_registro DESC", [])
@@ -0,0 +1,140 @@
+# backend/project/tests/test_condicional.py
+"""
+ETag / Last-Modified de historias clínicas (app/condicional.py):
+parseo de ETags, 304 con If-None-Match / If-Modified-Since y la
+condición SQL de If-Match.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from email.utils import format_datetime
+
+from app.condicional import (
+    condicion_if_match,
+    etag_paciente,
+    no_modificado,
+    parsear_etag,
+    ultima_modificacion,
+)
+
+ULTIMA = datetime(2025, 1, 2, 3, 4, 5, 678)
+ROW = {"id": 7, "ultima_actualizacion": ULTIMA}
+
+
+def _http_date(valor: datetime) -> str:
+    return format_datetime(valor.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+# ---------- ETag ----------
+
+def test_etag_incluye_version_dia_y_variante():
+    hoy = date.today().strftime("%Y%m%d")
+    assert etag_paciente(ROW) == f'"7-20250102030405000678-{hoy}"'
+    assert etag_paciente(ROW, "pdfabc") == f'"7-20250102030405000678-{hoy}-pdfabc"'
+
+
+def test_etag_sin_ultima_actualizacion():
+    assert etag_paciente({"id": 7, "ultima_actualizacion": None}).startswith('"7-0-')
+
+
+def test_parsear_etag_fuerte_y_debil():
+    etag = etag_paciente(ROW, "f1234abcd")
+    assert parsear_etag(etag) == (7, ULTIMA)
+    assert parsear_etag("W/" + etag) == (7, ULTIMA)
+    assert parsear_etag('"7-0-20250101"') == (7, None)
+
+
+def test_parsear_etag_malformado():
+    assert parsear_etag('"abc"') is None
+    assert parsear_etag('"x-20250102030405000678"') is None
+    assert parsear_etag('"7-ayer"') is None
+    assert parsear_etag("") is None
+
+
+# ---------- If-None-Match ----------
+
+def test_if_none_match_coincide():
+    assert no_modificado(ROW, "", etag_paciente(ROW), None)
+
+
+def test_if_none_match_acepta_debil_y_listas():
+    etag = etag_paciente(ROW)
+    assert no_modificado(ROW, "", "W/" + etag, None)
+    assert no_modificado(ROW, "", f'"otro", {etag}', None)
+
+
+def test_if_none_match_asterisco():
+    assert no_modificado(ROW, "", "*", None)
+
+
+def test_if_none_match_otra_version_o_variante():
+    cambiado = {"id": 7, "ultima_actualizacion": ULTIMA + timedelta(seconds=1)}
+    assert not no_modificado(cambiado, "", etag_paciente(ROW), None)
+    # El ETag del PDF no vale para el JSON
+    assert not no_modificado(ROW, "", etag_paciente(ROW, "pdfabc"), None)
+
+
+def test_if_none_match_manda_sobre_if_modified_since():
+    futuro = _http_date(datetime.now() + timedelta(days=1))
+    assert not no_modificado(ROW, "", '"otro"', futuro)
+
+
+# ---------- If-Modified-Since ----------
+
+def test_last_modified_no_es_anterior_a_hoy():
+    # La edad cambia con el día: un registro antiguo se "modifica" a medianoche
+    medianoche = datetime.combine(date.today(), time()).replace(tzinfo=timezone.utc)
+    assert ultima_modificacion(ROW) == medianoche
+
+
+def test_if_modified_since_limites():
+    ultima = ultima_modificacion(ROW)
+    assert no_modificado(ROW, "", None, _http_date(ultima.replace(tzinfo=None)))
+    assert no_modificado(ROW, "", None, _http_date(ultima.replace(tzinfo=None) + timedelta(seconds=1)))
+    assert not no_modificado(ROW, "", None, _http_date(ultima.replace(tzinfo=None) - timedelta(seconds=1)))
+
+
+def test_if_modified_since_reciente_ignora_microsegundos():
+    reciente = datetime.now().replace(microsecond=0) + timedelta(hours=1)
+    row = {"id": 7, "ultima_actualizacion": reciente.replace(microsecond=500000)}
+    assert no_modificado(row, "", None, _http_date(reciente))
+
+
+def test_if_modified_since_invalido():
+    assert not no_modificado(ROW, "", None, "ayer por la tarde")
+    assert not no_modificado(ROW, "", None, None)
+
+
+# ---------- If-Match ----------
+
+def test_if_match_ausente_o_asterisco():
+    assert condicion_if_match(None) == (None, [])
+    assert condicion_if_match("") == (None, [])
+    assert condicion_if_match(" * ") == (None, [])
+
+
+def test_if_match_fuerte():
+    sql, params = condicion_if_match(etag_paciente(ROW))
+    assert sql == "((id = %s AND ultima_actualizacion IS NOT DISTINCT FROM %s))"
+    assert params == [7, ULTIMA]
+
+
+def test_if_match_ignora_el_dia():
+    # Una edición abierta ayer sigue siendo válida si el registro no cambió
+    _, params = condicion_if_match('"7-20250102030405000678-20000101"')
+    assert params == [7, ULTIMA]
+
+
+def test_if_match_lista():
+    sql, params = condicion_if_match('"7-20250102030405000678-20250102", "8-0-20250102"')
+    assert sql.count(" OR ") == 1
+    assert params == [7, ULTIMA, 8, None]
+
+
+def test_if_match_debil_nunca_coincide():
+    assert condicion_if_match("W/" + etag_paciente(ROW)) == ("FALSE", [])
+    _, params = condicion_if_match(f'W/"1-0-20250102", {etag_paciente(ROW)}')
+    assert params == [7, ULTIMA]
+
+
+def test_if_match_malformado():
+    assert condicion_if_match('"basura"') == ("FALSE", [])
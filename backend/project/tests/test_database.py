@@ -0,0 +1,210 @@
+# backend/project/tests/test_database.py
+"""
+Pool de conexiones (app/database.py): préstamo y devolución, limpieza de
+conexiones ociosas o vencidas y espera acotada con el pool agotado.
+
+Las conexiones son objetos simulados: no requiere base de datos.
+"""
+
+import threading
+import time
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_INTRANS
+
+from app import database
+from app.database import ConnectionPool, PoolTimeoutError
+
+
+class _Info:
+    transaction_status = database.TRANSACTION_STATUS_IDLE
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        if self.conn.caida:
+            raise database.OperationalError("server closed the connection unexpectedly")
+
+    def close(self):
+        pass
+
+
+class _Conexion:
+    """Lo mínimo de una conexión psycopg2 que usa el pool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.caida = False
+        self.rollbacks = 0
+        self.info = _Info()
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = database.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def conexiones(monkeypatch):
+    creadas = []
+
+    def conectar():
+        conn = _Conexion()
+        creadas.append(conn)
+        return conn
+
+    monkeypatch.setattr(database, "_connect", conectar)
+    return creadas
+
+
+def _pool(min_size=0, max_size=2, timeout=0.05) -> ConnectionPool:
+    pool = ConnectionPool(min_size=min_size, max_size=max_size, timeout=timeout)
+    pool._reaper = threading.current_thread()  # Sin hilo de limpieza: se llama reap() a mano
+    return pool
+
+
+def _envejecer(pool: ConnectionPool, segundos: float, vida: bool = False):
+    for entry in pool._idle:
+        entry.last_used -= segundos
+        if vida:
+            entry.created_at -= segundos
+
+
+# ---------- Préstamo y devolución ----------
+
+def test_devuelta_se_reutiliza(conexiones):
+    pool = _pool()
+    conn = pool.getconn()
+    conn.close()
+    conn.close()  # Idempotente
+    assert pool.getconn()._entry.conn is conexiones[0]
+    assert len(conexiones) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_conexion_devuelta_no_se_usa(conexiones):
+    conn = _pool().getconn()
+    conn.close()
+    assert conn.closed
+    with pytest.raises(AttributeError):
+        conn.cursor()
+
+
+def test_transaccion_abierta_se_revierte_al_devolver(conexiones):
+    pool = _pool()
+    conn = pool.getconn()
+    conexiones[0].info.transaction_status = TRANSACTION_STATUS_INTRANS
+    conn.close()
+    assert conexiones[0].rollbacks == 1
+    assert pool.stats()["ociosas"] == 1
+
+
+def test_conexion_cerrada_se_descarta_al_devolver(conexiones):
+    pool = _pool()
+    conn = pool.getconn()
+    conexiones[0].close()
+    conn.close()
+    assert pool.stats()["abiertas"] == 0
+    assert pool.stats()["conexiones_cerradas"] == 1
+
+
+def test_ociosa_caida_se_reemplaza(conexiones):
+    pool = _pool()
+    pool.getconn().close()
+    conexiones[0].caida = True
+    _envejecer(pool, database.DB_POOL_HEALTH_CHECK_AFTER + 1)
+    assert pool.getconn()._entry.conn is conexiones[1]
+    assert conexiones[0].closed
+    stats = pool.stats()
+    assert stats["fallos_health_check"] == 1 and stats["abiertas"] == 1
+
+
+def test_fallo_al_conectar_libera_el_cupo(monkeypatch):
+    def falla():
+        raise RuntimeError("sin base de datos")
+
+    monkeypatch.setattr(database, "_connect", falla)
+    pool = _pool(max_size=1)
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    assert pool.stats()["abiertas"] == 0
+
+
+# ---------- Pool agotado ----------
+
+def test_agotado_espera_y_falla(conexiones):
+    pool = _pool(max_size=2, timeout=0.05)
+    prestadas = [pool.getconn(), pool.getconn()]
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    assert time.monotonic() - inicio >= 0.05
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["esperas"] == 1 and stats["en_uso"] == 2
+    assert len(conexiones) == 2
+    for conn in prestadas:
+        conn.close()
+
+
+def test_agotado_recibe_la_que_se_libera(conexiones):
+    pool = _pool(max_size=1, timeout=2)
+    prestada = pool.getconn()
+    threading.Timer(0.05, prestada.close).start()
+    assert pool.getconn()._entry.conn is conexiones[0]
+    assert pool.stats()["esperas"] == 1
+
+
+def test_cerrado_no_entrega_y_cierra_al_devolver(conexiones):
+    pool = _pool()
+    prestada = pool.getconn()
+    pool.getconn().close()
+    pool.close()
+    assert conexiones[1].closed
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    prestada.close()
+    assert conexiones[0].closed
+    assert pool.stats()["abiertas"] == 0
+
+
+# ---------- Limpieza ----------
+
+def test_reap_cierra_ociosas_respetando_el_minimo(conexiones):
+    pool = _pool(min_size=1, max_size=3)
+    prestadas = [pool.getconn() for _ in range(3)]
+    for conn in prestadas:
+        conn.close()
+    _envejecer(pool, database.DB_POOL_MAX_IDLE + 1)
+    pool.reap()
+    stats = pool.stats()
+    assert stats["abiertas"] == 1 and stats["ociosas"] == 1
+    assert sum(conn.closed for conn in conexiones) == 2
+
+
+def test_reap_cierra_vencidas_y_repone_el_minimo(conexiones):
+    pool = _pool(min_size=1)
+    pool.getconn().close()
+    _envejecer(pool, database.DB_POOL_MAX_LIFETIME + 1, vida=True)
+    pool.reap()
+    assert conexiones[0].closed
+    assert len(conexiones) == 2 and not conexiones[1].closed
+    assert pool.stats()["ociosas"] == 1
+
+
+def test_reap_no_toca_las_prestadas(conexiones):
+    pool = _pool(min_size=0)
+    prestada = pool.getconn()
+    prestada._entry.created_at -= database.DB_POOL_MAX_LIFETIME + 1
+    pool.reap()
+    assert not conexiones[0].closed
+    # Vencida: se cierra al devolverla
+    prestada.close()
+    assert conexiones[0].closed and pool.stats()["abiertas"] == 0
@@ -0,0 +1,40 @@
+# backend/project/tests/test_importacion.py
+"""
+Lectura de archivos de importación (app/importacion.py): una fila con
+bytes que no son UTF-8 se reporta como error sin detener la lectura.
+"""
+
+import io
+
+from app.importacion import FilaIlegible, leer_registros, lineas_utf8, validar_registro
+
+
+def _leer(contenido: bytes, formato: str):
+    return list(leer_registros(lineas_utf8(io.BytesIO(contenido)), formato))
+
+
+def test_csv_quita_bom_y_conserva_saltos_en_celdas():
+    filas = _leer('﻿numero_documento,primer_nombre\n1,"Ana\nMaría"\n'.encode("utf-8"), "csv")
+    assert filas == [(1, {"numero_documento": "1", "primer_nombre": "Ana\nMaría"})]
+
+
+def test_csv_fila_no_utf8_se_reporta_y_sigue():
+    filas = _leer(b"numero_documento,primer_nombre\n1,Ana\n2,Jos\xe9\n3,Luis\n", "csv")
+    assert [fila for fila, _ in filas] == [1, 2, 3]
+    assert isinstance(filas[1][1], FilaIlegible)
+    assert filas[2][1] == {"numero_documento": "3", "primer_nombre": "Luis"}
+    assert validar_registro(filas[1][1])[0] is None
+
+
+def test_ndjson_linea_no_utf8_se_reporta_y_sigue():
+    filas = _leer(b'{"a": 1}\n{"a": "\xff"}\n\n{"a": "x\xe2\x80\xa8y"}\n', "ndjson")
+    assert filas[0] == (1, {"a": 1})
+    assert isinstance(filas[1][1], FilaIlegible)
+    # U+2028 dentro del JSON no parte la línea
+    assert filas[2] == (4, {"a": "x y"})
+
+
+def test_ndjson_json_invalido():
+    (fila, registro), = _leer(b"{no es json\n", "ndjson")
+    datos, errores = validar_registro(registro)
+    assert datos is None and errores[0].startswith("JSON inválido")
@@ -0,0 +1,62 @@
+# backend/project/tests/test_normalizacion.py
+"""
+Normalización de nombres y códigos fonéticos (app/normalizacion.py)
+"""
+
+import pytest
+
+from app.normalizacion import claves_foneticas, codigo_fonetico, normalizar_texto, tokenizar
+
+
+def test_normalizar_texto():
+    assert normalizar_texto("  José  MARÍA Núñez ") == "jose maria nunez"
+    assert normalizar_texto(None) == ""
+
+
+def test_tokenizar_sin_repetidos():
+    assert tokenizar("Ana María", None, "Ana", "Pérez") == ["ana", "maria", "perez"]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Rodríguez", "Rodrigues"),
+    ("Gómez", "Gomes"),
+    ("Llanos", "Yanos"),
+    ("Cecilia", "Sesilia"),
+    ("Quintero", "Kintero"),
+    ("Gerardo", "Jerardo"),
+    ("Guillermo", "Guiyermo"),
+    ("Valentina", "Balentina"),
+    ("Hernández", "Ernandes"),
+    ("Rey", "Rei"),
+    ("Carrillo", "Cariyo"),
+    ("Xiomara", "Ksiomara"),
+    ("Sophia", "Sofia"),
+])
+def test_variantes_ortograficas_mismo_codigo(a, b):
+    assert codigo_fonetico(a) == codigo_fonetico(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Gómez", "Gámez"),
+    ("Chávez", "Sánchez"),
+    ("Mora", "Mota"),
+    ("Guillermo", "Gillermo"),  # gi suena ji
+])
+def test_nombres_distintos_codigo_distinto(a, b):
+    assert codigo_fonetico(a) != codigo_fonetico(b)
+
+
+def test_codigo_fonetico_varias_palabras():
+    assert codigo_fonetico("María José") == "MARIA JOSE"
+    assert codigo_fonetico("Rodríguez") == "RODRIGES"
+
+
+def test_codigo_fonetico_vacio():
+    assert codigo_fonetico(None) is None
+    assert codigo_fonetico("") is None
+    assert codigo_fonetico("123 -") is None
+
+
+def test_claves_foneticas_solo_campos_presentes():
+    assert claves_foneticas({"primer_nombre": "Llanos", "telefono": "1"}) == {"primer_nombre_fonetico": "YANOS"}
+    assert claves_foneticas({"primer_apellido": None}) == {"primer_apellido_fonetico": None}
@@ -0,0 +1,208 @@
+# backend/project/tests/test_paciente_cache.py
+"""
+Caché de lectura de pacientes (app/paciente_cache.py): una sola lectura
+por paciente con peticiones concurrentes, e invalidación también
+mientras hay una lectura en curso.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+from app.paciente_cache import PacienteCache, PACIENTE_CACHE_REDIS_PREFIX
+
+
+class _Fuente:
+    """Base de datos simulada: cuenta lecturas y puede demorarlas"""
+
+    def __init__(self, espera: float = 0):
+        self.espera = espera
+        self.lecturas = 0
+        self.version = 1
+
+    def cargar(self, numero_documento: str):
+        async def leer():
+            self.lecturas += 1
+            version = self.version
+            await asyncio.sleep(self.espera)
+            return {"numero_documento": numero_documento, "version": version}
+        return leer
+
+
+class _RedisFalso:
+    """Lo mínimo de redis.asyncio que usa la caché; `set` puede demorarse"""
+
+    def __init__(self, espera_set: float = 0):
+        self.datos = {}
+        self.espera_set = espera_set
+
+    async def get(self, clave):
+        return self.datos.get(clave)
+
+    async def set(self, clave, valor, ex=None):
+        await asyncio.sleep(self.espera_set)
+        self.datos[clave] = valor
+
+    async def delete(self, clave):
+        self.datos.pop(clave, None)
+
+
+def _cache(redis=None) -> PacienteCache:
+    cache = PacienteCache(enabled=True, redis_url="")
+    cache._redis = redis
+    return cache
+
+
+def test_lectura_se_cachea():
+    cache, fuente = _cache(), _Fuente()
+
+    async def escenario():
+        primero = await cache.obtener("1", fuente.cargar("1"))
+        segundo = await cache.obtener("1", fuente.cargar("1"))
+        return primero, segundo
+
+    primero, segundo = asyncio.run(escenario())
+    assert primero == segundo
+    assert fuente.lecturas == 1
+
+
+def test_no_encontrado_no_se_cachea():
+    cache = _cache()
+    lecturas = []
+
+    async def no_existe():
+        lecturas.append(1)
+        return None
+
+    async def escenario():
+        assert await cache.obtener("1", no_existe) is None
+        assert await cache.obtener("1", no_existe) is None
+
+    asyncio.run(escenario())
+    assert len(lecturas) == 2
+
+
+def test_peticiones_concurrentes_una_lectura():
+    cache, fuente = _cache(), _Fuente(espera=0.05)
+
+    async def escenario():
+        return await asyncio.gather(*(cache.obtener("1", fuente.cargar("1")) for _ in range(20)))
+
+    resultados = asyncio.run(escenario())
+    assert fuente.lecturas == 1
+    assert all(r == resultados[0] for r in resultados)
+    assert cache.stats()["peticiones_coalescidas"] == 19
+    assert cache.stats()["lecturas_en_curso"] == 0
+
+
+def test_cancelar_una_peticion_no_cancela_la_lectura():
+    cache, fuente = _cache(), _Fuente(espera=0.05)
+
+    async def escenario():
+        cancelada = asyncio.ensure_future(cache.obtener("1", fuente.cargar("1")))
+        otra = asyncio.ensure_future(cache.obtener("1", fuente.cargar("1")))
+        await asyncio.sleep(0.01)
+        cancelada.cancel()
+        return await otra
+
+    assert asyncio.run(escenario())["version"] == 1
+    assert fuente.lecturas == 1
+
+
+def test_invalidar_con_lectura_en_curso():
+    cache, fuente = _cache(), _Fuente(espera=0.05)
+
+    async def escenario():
+        vieja = asyncio.ensure_future(cache.obtener("1", fuente.cargar("1")))
+        await asyncio.sleep(0.01)
+        # Escritura mientras se lee: la lectura en curso trae la versión anterior
+        fuente.version = 2
+        await cache.invalidate("1")
+        # Una petición posterior no se une a la lectura vieja (y termina antes que ella)
+        fuente.espera = 0
+        nueva = await cache.obtener("1", fuente.cargar("1"))
+        return await vieja, nueva, await cache.get("1")
+
+    vieja, nueva, cacheado = asyncio.run(escenario())
+    assert vieja["version"] == 1
+    assert nueva["version"] == 2
+    assert cacheado["version"] == 2
+    assert fuente.lecturas == 2
+
+
+def test_invalidar_descarta_lo_cacheado():
+    cache, fuente = _cache(), _Fuente()
+
+    async def escenario():
+        await cache.obtener("1", fuente.cargar("1"))
+        fuente.version = 2
+        await cache.invalidate("1")
+        return await cache.obtener("1", fuente.cargar("1"))
+
+    assert asyncio.run(escenario())["version"] == 2
+    assert fuente.lecturas == 2
+
+
+def test_entrada_de_otro_dia_se_descarta():
+    cache, fuente = _cache(), _Fuente()
+
+    async def escenario():
+        await cache.obtener("1", fuente.cargar("1"))
+        # La edad calculada cambia con el día
+        ayer = date.today() - timedelta(days=1)
+        cache._memory.set("1", (ayer, {"numero_documento": "1", "version": 0}))
+        return await cache.obtener("1", fuente.cargar("1"))
+
+    assert asyncio.run(escenario())["version"] == 1
+    assert fuente.lecturas == 2
+
+
+def test_deshabilitada_siempre_lee():
+    cache, fuente = PacienteCache(enabled=False, redis_url=""), _Fuente()
+
+    async def escenario():
+        await cache.obtener("1", fuente.cargar("1"))
+        await cache.obtener("1", fuente.cargar("1"))
+        await cache.invalidate("1")
+        return await cache.get("1")
+
+    assert asyncio.run(escenario()) is None
+    assert fuente.lecturas == 2
+
+
+# ---------- Nivel compartido ----------
+
+def test_nivel_compartido_reconstruye_fechas():
+    redis = _RedisFalso()
+    escritor, lector = _cache(redis), _cache(redis)
+    registro = {
+        "numero_documento": "1",
+        "fecha_nacimiento": date(1995, 4, 12),
+        "ultima_actualizacion": datetime(2025, 1, 2, 3, 4, 5, 678),
+    }
+
+    async def cargar():
+        return registro
+
+    async def escenario():
+        await escritor.obtener("1", cargar)
+        # Otro worker: lo encuentra en el nivel compartido
+        return await lector.get("1")
+
+    assert asyncio.run(escenario()) == registro
+    assert lector.stats()["compartida"]["aciertos"] == 1
+
+
+def test_invalidar_mientras_se_guarda_en_nivel_compartido():
+    redis = _RedisFalso(espera_set=0.05)
+    cache, fuente = _cache(redis), _Fuente()
+
+    async def escenario():
+        lectura = asyncio.ensure_future(cache.obtener("1", fuente.cargar("1")))
+        await asyncio.sleep(0.01)  # Leído y guardándose en el nivel compartido
+        await cache.invalidate("1")
+        await lectura
+
+    asyncio.run(escenario())
+    # El SET que terminó después de la invalidación no deja la versión vieja
+    assert PACIENTE_CACHE_REDIS_PREFIX + "1" not in redis.datos
+    assert cache._memory.get("1") is None
@@ -0,0 +1,64 @@
+# backend/project/tests/test_paginacion.py
+"""
+Paginación por cursor (app/paginacion.py): ida y vuelta del cursor,
+rechazo de cursores alterados y corte de la página.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.paginacion import CursorInvalido, codificar_cursor, decodificar_cursor, recortar_pagina
+
+FECHA = datetime(2025, 1, 2, 3, 4, 5, 678)
+
+
+def _cursor_crudo(valor) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valor).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _fila(row_id: int) -> dict:
+    return {"id": row_id, "fecha_registro": FECHA, "primer_nombre": "Ana"}
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = codificar_cursor(_fila(42))
+    assert decodificar_cursor(cursor) == (FECHA, 42)
+
+
+def test_cursor_seguro_en_url_y_sin_relleno():
+    cursor = codificar_cursor(_fila(10 ** 12))
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "no es base64!",
+    "gA",                                       # Bytes que no son UTF-8
+    _cursor_crudo({"fecha": "2025-01-02"}),
+    _cursor_crudo(["2025-01-02T03:04:05"]),
+    _cursor_crudo(["2025-01-02T03:04:05", 1, 2]),
+    _cursor_crudo(["ayer", 1]),
+    _cursor_crudo(["2025-01-02T03:04:05", "uno"]),
+    _cursor_crudo([None, 1]),
+    _cursor_crudo(5),
+])
+def test_cursor_malformado(cursor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor)
+
+
+def test_recortar_ultima_pagina():
+    filas = [_fila(3), _fila(2)]
+    assert recortar_pagina(filas, 2) == (filas, None)
+    assert recortar_pagina([], 2) == ([], None)
+
+
+def test_recortar_con_fila_de_mas():
+    filas = [_fila(3), _fila(2), _fila(1)]
+    pagina, siguiente = recortar_pagina(filas, 2)
+    assert pagina == filas[:2]
+    # El cursor apunta a la última fila entregada, no a la de más
+    assert decodificar_cursor(siguiente) == (FECHA, 2)
@@ -0,0 +1,142 @@
+# backend/project/tests/test_pdf_pool.py
+"""
+Pool de renderizado de PDFs: un render cancelado a medias no debe dejar
+su proceso en el pool (otra petición recibiría ese PDF).
+
+Los "procesos" son hilos con un Pipe real: se prueba la coordinación del
+pool sin WeasyPrint ni procesos hijos.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+try:
+    from app import pdf_pool
+except (ImportError, OSError) as e:  # WeasyPrint sin sus librerías de sistema
+    pytest.skip(f"app.pdf_pool no se puede importar: {e}", allow_module_level=True)
+
+
+class _ExtremoHijo:
+    """Extremo del hijo: _Worker lo cierra tras arrancar, pero aquí el hijo es un hilo"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def close(self):
+        pass
+
+    def recv(self):
+        try:
+            return self.conn.recv()
+        except (OSError, TypeError):  # Cerrado por kill() mientras esperaba
+            raise EOFError
+
+    def send(self, obj):
+        try:
+            self.conn.send(obj)
+        except OSError:
+            pass
+
+
+class _ProcesoHilo:
+    """Proceso simulado: kill() cierra su extremo del Pipe (el padre ve EOF)"""
+
+    def __init__(self, target, args, **kwargs):
+        self.extremo = args[0]
+        self.hilo = threading.Thread(target=target, args=args, daemon=True)
+        self.vivo = True
+        self.recogido = False
+
+    def start(self):
+        self.hilo.start()
+
+    def is_alive(self):
+        return self.vivo and self.hilo.is_alive()
+
+    def kill(self):
+        if self.vivo:
+            self.vivo = False
+            self.extremo.conn.close()
+
+    def join(self, timeout=None):
+        self.recogido = not self.is_alive()
+
+
+class _ContextoHilos:
+    Process = _ProcesoHilo
+
+    @staticmethod
+    def Pipe():
+        padre, hijo = multiprocessing.Pipe()
+        return padre, _ExtremoHijo(hijo)
+
+
+def _generar(paciente):
+    time.sleep(paciente.get("espera", 0))
+    return paciente["numero_documento"].encode()
+
+
+@pytest.fixture
+def creados(monkeypatch):
+    """Procesos creados por el pool (iniciales y reemplazos)"""
+    lista = []
+
+    class _WorkerRegistrado(pdf_pool._Worker):
+        def __init__(self):
+            super().__init__()
+            lista.append(self)
+
+    monkeypatch.setattr(pdf_pool, "_Worker", _WorkerRegistrado)
+    return lista
+
+
+@pytest.fixture
+def pool(monkeypatch, creados):
+    monkeypatch.setattr(pdf_pool, "_mp", _ContextoHilos)
+    monkeypatch.setattr(pdf_pool, "generar_pdf_paciente", _generar)
+    monkeypatch.setattr(pdf_pool, "precargar_recursos_pdf", lambda: None)
+    pool = pdf_pool.PdfRenderPool(workers=1, max_queue=4, timeout=5)
+    yield pool
+    pool.shutdown()
+
+
+def test_render_devuelve_su_pdf(pool):
+    async def escenario():
+        return await pool.render({"numero_documento": "111"})
+
+    assert asyncio.run(escenario()) == b"111"
+
+
+def test_render_cancelado_no_mezcla_pdfs(pool):
+    async def escenario():
+        tarea = asyncio.ensure_future(pool.render({"numero_documento": "111", "espera": 0.3}))
+        await asyncio.sleep(0.05)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+        primero = await pool.render({"numero_documento": "222"})
+        segundo = await pool.render({"numero_documento": "333"})
+        return primero, segundo
+
+    assert asyncio.run(escenario()) == (b"222", b"333")
+    assert pool.stats()["reciclados"] >= 1
+
+
+def test_proceso_reemplazado_se_recoge_y_cierra_su_pipe(pool, creados):
+    async def escenario():
+        tarea = asyncio.ensure_future(pool.render({"numero_documento": "111", "espera": 0.3}))
+        await asyncio.sleep(0.05)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+        await pool.render({"numero_documento": "222"})
+
+    asyncio.run(escenario())
+    abandonado, reemplazo = creados
+    assert abandonado.conn.closed
+    assert abandonado.process.recogido
+    assert not reemplazo.conn.closed
@@ -0,0 +1,66 @@
+# backend/project/tests/test_pdf_zip.py
+"""
+Exportación masiva en ZIP (app/pdf_zip.py): nombres de archivo seguros
+dentro del ZIP y reintento cuando el pool de renderizado está saturado.
+"""
+
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+try:
+    from app import pdf_jobs
+    from app.pdf_pool import PdfPoolSaturated
+    from app.pdf_zip import nombre_entrada, stream_zip_pdfs
+except (ImportError, OSError) as e:  # WeasyPrint sin sus librerías de sistema
+    pytest.skip(f"app.pdf_zip no se puede importar: {e}", allow_module_level=True)
+
+
+def _zip(documentos, generar) -> zipfile.ZipFile:
+    async def escenario():
+        return b"".join([parte async for parte in stream_zip_pdfs(documentos, generar, concurrency=2)])
+    return zipfile.ZipFile(io.BytesIO(asyncio.run(escenario())))
+
+
+def test_nombre_entrada_solo_caracteres_seguros():
+    usados = set()
+    assert nombre_entrada("1020-A_3", usados) == "HC_1020-A_3.pdf"
+    assert nombre_entrada("../../etc/passwd", usados) == "HC_______etc_passwd.pdf"
+    assert nombre_entrada("1\x00\n2", usados) == "HC_1__2.pdf"
+    assert nombre_entrada("", usados) == "HC__.pdf"
+
+
+def test_nombre_entrada_sin_colisiones():
+    usados = set()
+    assert nombre_entrada("1/2", usados) == "HC_1_2.pdf"
+    assert nombre_entrada("1:2", usados) == "HC_1_2_2.pdf"
+    assert nombre_entrada("1_2_2", usados) == "HC_1_2_2_2.pdf"
+
+
+def test_pool_saturado_reintenta_en_lugar_de_fallar(monkeypatch):
+    monkeypatch.setattr(pdf_jobs, "PDF_JOBS_RETRY_DELAY", 0.001)
+    intentos = {}
+
+    async def generar(documento: str) -> bytes:
+        intentos[documento] = intentos.get(documento, 0) + 1
+        if intentos[documento] < 3:
+            raise PdfPoolSaturated("saturado")
+        return documento.encode()
+
+    archivo = _zip(["1", "2"], generar)
+    assert sorted(archivo.namelist()) == ["HC_1.pdf", "HC_2.pdf"]
+    assert archivo.read("HC_1.pdf") == b"1"
+    assert intentos == {"1": 3, "2": 3}
+
+
+def test_saturado_sin_margen_va_a_errores(monkeypatch):
+    monkeypatch.setattr(pdf_jobs, "PDF_JOBS_MAX_WAIT", 0)
+
+    async def generar(documento: str) -> bytes:
+        raise PdfPoolSaturated("saturado")
+
+    archivo = _zip(["1"], generar)
+    assert archivo.namelist() == ["errores.txt"]
+    assert archivo.read("errores.txt") == b"1: saturado\n"
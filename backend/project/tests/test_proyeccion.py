@@ -0,0 +1,65 @@
+# backend/project/tests/test_proyeccion.py
+"""
+Proyección de columnas (app/proyeccion.py): lista blanca de `fields=`,
+grupos y SQL generado.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.derivados import CAMPOS_DERIVADOS
+from app.proyeccion import (
+    COLUMNAS_CLAVE,
+    GRUPOS_CAMPOS,
+    proyectar,
+    resolver_campos,
+    select_columnas,
+)
+
+
+def test_campos_sueltos_con_claves_primero():
+    assert resolver_campos("primer_nombre,edad") == COLUMNAS_CLAVE + ["primer_nombre", "edad"]
+
+
+def test_grupo():
+    campos = resolver_campos("signos_vitales")
+    assert campos[:len(COLUMNAS_CLAVE)] == COLUMNAS_CLAVE
+    assert set(GRUPOS_CAMPOS["signos_vitales"]) <= set(campos)
+
+
+def test_grupo_con_tildes_mayusculas_y_espacios():
+    assert resolver_campos(" Identificación ") == resolver_campos("identificacion")
+    assert resolver_campos("Signos Vitales") == resolver_campos("signos_vitales")
+
+
+def test_sin_repetidos():
+    campos = resolver_campos("identificacion,numero_documento,primer_nombre")
+    assert len(campos) == len(set(campos))
+
+
+def test_entradas_vacias_se_ignoran():
+    assert resolver_campos(",primer_nombre,,") == COLUMNAS_CLAVE + ["primer_nombre"]
+
+
+def test_desconocidos():
+    with pytest.raises(ValueError) as error:
+        resolver_campos("primer_nombre,contraseña,signos")
+    mensaje = str(error.value)
+    assert "contraseña" in mensaje and "signos" in mensaje
+    assert "signos_vitales" in mensaje  # Lista los grupos disponibles
+
+
+def test_no_acepta_sql():
+    with pytest.raises(ValueError):
+        resolver_campos("id; DROP TABLE pacientes")
+
+
+def test_select_columnas_derivados_como_expresion():
+    sql = select_columnas(["primer_nombre", "edad"])
+    assert sql == f"primer_nombre, {CAMPOS_DERIVADOS['edad']} AS edad"
+
+
+def test_proyectar_decimal_a_float():
+    row = {"id": 7, "numero_documento": "1", "peso": Decimal("75.50"), "imc": None, "otro": "x"}
+    assert proyectar(row, ["id", "peso", "imc"]) == {"id": 7, "peso": 75.5, "imc": None}
@@ -288,6 +288,27 @@ const API_UTILS = {
         }
     },
 
+    /**
+     * Petición GET que también retorna el ETag (versión del registro),
+     * para enviarlo luego en If-Match al actualizar
+     */
+    async getConVersion(endpoint) {
+        try {
+            const response = await this.fetchWithRetry(endpoint, { method: 'GET' });
+            if (!response) return null;
+
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || `HTTP ${response.status}`);
+            }
+
+            return { data: await response.json(), etag: response.headers.get('ETag') };
+        } catch (error) {
+            console.error(`❌ GET ${endpoint}:`, error);
+            throw error;
+        }
+    },
+
     /**
      * Petición POST
      */
@@ -314,11 +335,12 @@ const API_UTILS = {
     /**
      * Petición PUT
      */
-    async put(endpoint, data) {
+    async put(endpoint, data, headers = {}) {
         try {
             const response = await this.fetchWithRetry(endpoint, {
                 method: 'PUT',
-                body: JSON.stringify(data)
+                body: JSON.stringify(data),
+                headers
             });
             if (!response) return null;
 